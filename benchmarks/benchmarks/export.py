@@ -0,0 +1,44 @@
+import io
+
+import onnx
+
+import onnx_chainer
+
+from .models import models
+
+
+_opset_versions = list(range(
+    onnx_chainer.MINIMUM_OPSET_VERSION, onnx.defs.onnx_opset_version() + 1))
+
+
+class Export(object):
+
+    """Exports models of the zoo for each opset version."""
+
+    params = [sorted(models.keys()), _opset_versions]
+    param_names = ['model', 'opset_version']
+    timeout = 600
+
+    def setup(self, model_name, opset_version):
+        self.model, self.x = models[model_name]()
+
+    def _export(self, opset_version, filename=None):
+        return onnx_chainer.export(
+            self.model, self.x, filename=filename,
+            opset_version=opset_version)
+
+    def time_export(self, model_name, opset_version):
+        self._export(opset_version)
+
+    def peakmem_export(self, model_name, opset_version):
+        self._export(opset_version)
+
+    def track_file_size(self, model_name, opset_version):
+        f = io.BytesIO()
+        self._export(opset_version, filename=f)
+        return len(f.getvalue())
+    track_file_size.unit = 'bytes'
+
+    def track_node_count(self, model_name, opset_version):
+        return len(self._export(opset_version).graph.node)
+    track_node_count.unit = 'nodes'
@@ -0,0 +1,8 @@
+class Import(object):
+
+    """Imports ONNX-Chainer in a fresh interpreter."""
+
+    def timeraw_import(self):
+        # Chainer and ONNX are imported in advance, so that only the time of
+        # ONNX-Chainer itself is measured
+        return 'import onnx_chainer', 'import chainer, onnx'
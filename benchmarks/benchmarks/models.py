@@ -0,0 +1,191 @@
+import chainer
+import chainer.functions as F
+import chainer.links as L
+import numpy as np
+
+
+class VGG16(chainer.Chain):
+
+    def __init__(self):
+        super(VGG16, self).__init__()
+        with self.init_scope():
+            self.vgg = L.VGG16Layers(pretrained_model=None)
+
+    def __call__(self, x):
+        return self.vgg(x, layers=['prob'])['prob']
+
+
+class ResNet50(chainer.Chain):
+
+    def __init__(self):
+        super(ResNet50, self).__init__()
+        with self.init_scope():
+            self.resnet = L.ResNet50Layers(pretrained_model=None)
+
+    def __call__(self, x):
+        return self.resnet(x, layers=['prob'])['prob']
+
+
+class DepthwiseSeparableConv(chainer.Chain):
+
+    def __init__(self, in_channels, out_channels, stride):
+        super(DepthwiseSeparableConv, self).__init__()
+        with self.init_scope():
+            self.dw = L.Convolution2D(
+                in_channels, in_channels, 3, stride, 1, nobias=True,
+                groups=in_channels)
+            self.dw_bn = L.BatchNormalization(in_channels)
+            self.pw = L.Convolution2D(in_channels, out_channels, 1,
+                                      nobias=True)
+            self.pw_bn = L.BatchNormalization(out_channels)
+
+    def __call__(self, x):
+        h = F.clipped_relu(self.dw_bn(self.dw(x)), 6.)
+        return F.clipped_relu(self.pw_bn(self.pw(h)), 6.)
+
+
+class MobileNet(chainer.Chain):
+
+    # (out_channels, stride) of depthwise separable convolutions
+    _blocks = ((64, 1), (128, 2), (128, 1), (256, 2), (256, 1), (512, 2),
+               (512, 1), (512, 1), (512, 1), (512, 1), (512, 1), (1024, 2),
+               (1024, 1))
+
+    def __init__(self, n_class=1000):
+        super(MobileNet, self).__init__()
+        with self.init_scope():
+            self.conv = L.Convolution2D(3, 32, 3, 2, 1, nobias=True)
+            self.bn = L.BatchNormalization(32)
+            self.blocks = chainer.ChainList()
+            in_channels = 32
+            for out_channels, stride in self._blocks:
+                self.blocks.add_link(
+                    DepthwiseSeparableConv(in_channels, out_channels, stride))
+                in_channels = out_channels
+            self.fc = L.Linear(in_channels, n_class)
+
+    def __call__(self, x):
+        h = F.clipped_relu(self.bn(self.conv(x)), 6.)
+        for block in self.blocks:
+            h = block(h)
+        h = F.average_pooling_2d(h, h.shape[2:])
+        return F.softmax(self.fc(h))
+
+
+class LSTMLanguageModel(chainer.Chain):
+
+    """LSTM language model unrolled over the length of inputs.
+
+    LSTM cells are built from basic functions, since ``F.lstm`` used by
+    ``L.LSTM`` has no converter.
+    """
+
+    def __init__(self, n_vocab=10000, n_units=650, n_layers=2):
+        super(LSTMLanguageModel, self).__init__()
+        with self.init_scope():
+            self.embed = L.EmbedID(n_vocab, n_units)
+            self.upward = chainer.ChainList(
+                *[L.Linear(n_units, 4 * n_units) for _ in range(n_layers)])
+            self.lateral = chainer.ChainList(
+                *[L.Linear(n_units, 4 * n_units, nobias=True)
+                  for _ in range(n_layers)])
+            self.out = L.Linear(n_units, n_vocab)
+
+    def _cell(self, upward, lateral, x, h, c):
+        gates = upward(x)
+        if h is not None:
+            gates = gates + lateral(h)
+        a, i, f, o = F.split_axis(gates, 4, axis=1)
+        a = F.tanh(a)
+        i = F.sigmoid(i)
+        o = F.sigmoid(o)
+        c = a * i if c is None else a * i + F.sigmoid(f) * c
+        return o * F.tanh(c), c
+
+    def __call__(self, xs):
+        n_layers = len(self.upward)
+        hs = [None] * n_layers
+        cs = [None] * n_layers
+        ys = []
+        for t in range(xs.shape[1]):
+            h = self.embed(xs[:, t])
+            for i in range(n_layers):
+                hs[i], cs[i] = self._cell(
+                    self.upward[i], self.lateral[i], h, hs[i], cs[i])
+                h = hs[i]
+            ys.append(self.out(h))
+        # Stack is not supported by the exporter
+        return F.concat([F.expand_dims(y, 1) for y in ys], axis=1)
+
+
+def _layer_norm(x, gamma, beta, eps=1e-5):
+    mean = F.broadcast_to(F.mean(x, axis=1, keepdims=True), x.shape)
+    h = x - mean
+    var = F.broadcast_to(F.mean(h * h, axis=1, keepdims=True), x.shape)
+    h = h / F.sqrt(var + eps)
+    return h * F.broadcast_to(gamma, x.shape) +\
+        F.broadcast_to(beta, x.shape)
+
+
+class TransformerBlock(chainer.Chain):
+
+    """Transformer encoder block of post layer normalization.
+
+    Inputs are a sequence of vectors without batch dimension.
+    """
+
+    def __init__(self, n_units=512, n_heads=8, n_hidden=2048):
+        super(TransformerBlock, self).__init__()
+        self.n_heads = n_heads
+        with self.init_scope():
+            self.query = L.Linear(n_units, n_units)
+            self.key = L.Linear(n_units, n_units)
+            self.value = L.Linear(n_units, n_units)
+            self.attn_out = L.Linear(n_units, n_units)
+            self.ln1_gamma = chainer.Parameter(
+                np.ones((1, n_units), dtype=np.float32))
+            self.ln1_beta = chainer.Parameter(
+                np.zeros((1, n_units), dtype=np.float32))
+            self.ffn1 = L.Linear(n_units, n_hidden)
+            self.ffn2 = L.Linear(n_hidden, n_units)
+            self.ln2_gamma = chainer.Parameter(
+                np.ones((1, n_units), dtype=np.float32))
+            self.ln2_beta = chainer.Parameter(
+                np.zeros((1, n_units), dtype=np.float32))
+
+    def _split_heads(self, x):
+        length, n_units = x.shape
+        x = F.reshape(x, (length, self.n_heads, n_units // self.n_heads))
+        return F.transpose(x, (1, 0, 2))
+
+    def __call__(self, x):
+        length, n_units = x.shape
+        q = self._split_heads(self.query(x))
+        k = self._split_heads(self.key(x))
+        v = self._split_heads(self.value(x))
+        scores = F.matmul(q, k, transb=True) *\
+            (1. / np.sqrt(n_units // self.n_heads))
+        h = F.matmul(F.softmax(scores, axis=2), v)
+        h = F.reshape(F.transpose(h, (1, 0, 2)), (length, n_units))
+        h = _layer_norm(x + self.attn_out(h), self.ln1_gamma, self.ln1_beta)
+        y = self.ffn2(F.relu(self.ffn1(h)))
+        return _layer_norm(h + y, self.ln2_gamma, self.ln2_beta)
+
+
+def _image(batch_size=1, size=224):
+    return np.random.uniform(
+        -1, 1, (batch_size, 3, size, size)).astype(np.float32)
+
+
+# Builders of models and their inputs keyed by names
+models = {
+    'vgg16': lambda: (VGG16(), _image()),
+    'resnet50': lambda: (ResNet50(), _image()),
+    'mobilenet': lambda: (MobileNet(), _image()),
+    'lstm_lm': lambda: (
+        LSTMLanguageModel(),
+        np.random.randint(0, 10000, (4, 16)).astype(np.int32)),
+    'transformer': lambda: (
+        TransformerBlock(),
+        np.random.uniform(-1, 1, (64, 512)).astype(np.float32)),
+}
@@ -1,11 +1,41 @@
-import pkg_resources
+import sys
+
+from onnx_chainer.compatibility import check_exportable  # NOQA
+from onnx_chainer.compatibility import ExportIssue  # NOQA
 
 from onnx_chainer.export import convert_parameter  # NOQA
 from onnx_chainer.export import export  # NOQA
 
 from onnx_chainer.export import MINIMUM_OPSET_VERSION  # NOQA
 
+from onnx_chainer.export_many import export_many  # NOQA
+from onnx_chainer.export_many import ExportJob  # NOQA
+from onnx_chainer.export_many import ExportResult  # NOQA
+
 from onnx_chainer.export_testcase import export_testcase  # NOQA
 
+from onnx_chainer.mapping import supported_ops  # NOQA
+
+from onnx_chainer.profiler import profile  # NOQA
+from onnx_chainer.profiler import Profiler  # NOQA
+
+from onnx_chainer.update_weights import update_weights  # NOQA
+
+
+def _get_version():
+    # pkg_resources takes long to be imported, so it is imported only when
+    # the version is required
+    import pkg_resources
+    return pkg_resources.get_distribution('onnx-chainer').version
+
 
-__version__ = pkg_resources.get_distribution('onnx-chainer').version
+if sys.version_info >= (3, 7):
+    def __getattr__(name):
+        if name == '__version__':
+            version = _get_version()
+            globals()['__version__'] = version
+            return version
+        raise AttributeError(
+            'module {!r} has no attribute {!r}'.format(__name__, name))
+else:
+    __version__ = _get_version()
@@ -0,0 +1,89 @@
+import collections
+
+import chainer
+import onnx
+
+from onnx_chainer.export import _flatten_outputs
+from onnx_chainer.export import _forward
+from onnx_chainer.export import _iter_function_nodes
+from onnx_chainer import mapping
+
+
+ExportIssue = collections.namedtuple(
+    'ExportIssue', ['func_name', 'count', 'reason'])
+ExportIssue.__doc__ = """A problem found by :func:`check_exportable`.
+
+Attributes:
+    func_name (str): The name of the Chainer function.
+    count (int): The number of nodes of the function in the graph.
+    reason (str): Why the function cannot be exported.
+"""
+
+
+def _get_reason(func_name, opset_version, external_converters):
+    if external_converters and func_name in external_converters:
+        return None
+    if func_name not in mapping.converters:
+        return '{} is not supported'.format(func_name)
+    converter = mapping.converters[func_name].converter
+    versions = getattr(converter, 'opset_versions', None)
+    if versions and converter.resolve_opset_version(opset_version) is None:
+        return '{} is not supported with opset_version {}, it requires ' \
+            'opset_version {} or later'.format(
+                func_name, opset_version, versions[0])
+    return None
+
+
+def check_exportable(model, args, opset_version=None, train=False,
+                     external_converters=None):
+    """Finds functions of the model which cannot be exported.
+
+    The forward computation of the model is run as :func:`export` does, and
+    only names of functions in the computational graph are checked against
+    built-in converters. No converter is run and no parameter is converted,
+    so all problems are reported at once much faster than exporting.
+
+    Note that converters can still reject functions by their attributes,
+    e.g. ``GetItem`` with steps, on exporting.
+
+    >>> issues = onnx_chainer.check_exportable(model, x, opset_version=8)
+    >>> for issue in issues:
+    >>>     print(issue.reason)
+
+    Args:
+        model (~chainer.Chain): The model.
+        args (list or dict): The arguments which are given to the model
+            directly, as the same as :func:`export`.
+        opset_version (int): The operator set version of ONNX. If ``None``,
+            the latest opset version of the onnx module is used.
+        train (bool): If True, the graph is traced on train mode.
+        external_converters (dict): Add-on converters keyed by function
+            names, which are regarded as supporting any opset version.
+
+    Returns:
+        list: :class:`ExportIssue` objects of functions which cannot be
+        exported, in the order of the first appearance in the trace. An
+        empty list if the model can be exported.
+    """
+    if opset_version is None:
+        opset_version = int(onnx.defs.onnx_opset_version())
+
+    with chainer.using_config('train', train),\
+            chainer.using_config('in_recomputing', True),\
+            chainer.using_config('enable_backprop', True):
+        _, _, outputs = _forward(model, args)
+    outputs = _flatten_outputs(outputs)
+
+    counts = collections.OrderedDict()
+    for function in _iter_function_nodes(outputs):
+        if isinstance(function, chainer.function.FunctionAdapter):
+            function = function.function
+        func_name = function.__class__.__name__
+        counts[func_name] = counts.get(func_name, 0) + 1
+
+    issues = []
+    for func_name, count in counts.items():
+        reason = _get_reason(func_name, opset_version, external_converters)
+        if reason is not None:
+            issues.append(ExportIssue(func_name, count, reason))
+    return issues
@@ -1,40 +1,113 @@
+import weakref
+
 import chainer
 
 from onnx_chainer import onnx_helper
 
 
+class _Pin(object):
+    """Strong reference with the interface of ``weakref.ref``.
+
+    Used for objects which cannot be weakly referenced, so that their IDs are
+    not recycled while they are named by a context.
+    """
+
+    __slots__ = ('obj', 'key')
+
+    def __init__(self, obj, key):
+        self.obj = obj
+        self.key = key
+
+    def __call__(self):
+        return self.obj
+
+
+def _make_ref(obj, key, callback):
+    try:
+        return weakref.KeyedRef(obj, callback, key)
+    except TypeError:
+        return _Pin(obj, key)
+
+
 class Context(object):
     """Context of converter
 
     This context shares names during exporting.
 
+    Names are keyed by instance ID of objects, and each entry holds a weak
+    reference to the named object, so that an ID recycled by another object
+    does not alias the name and entries of garbage collected objects are
+    dropped. Objects which cannot be weakly referenced are pinned until the
+    context is released.
+
     Attributes:
-        name_list (dict): list of being exported as ONNX node name keyed by
-            instance ID. When the target variable is ``chainer.Variable`` or
-            ``chainer.Parameter``, instance ID of ``ndarray`` held by the
-            variable is also put as key, because some functions like
-            ``F.where`` internally unwrap variable.
+        dynamic_shape (bool): If True, some dimensions of values are symbolic,
+            so converters should not embed shapes of values while tracing in
+            the graph.
+        name_generator (~onnx_chainer.onnx_helper.NameGenerator): The
+            generator of temporary names of values in the export.
 
     """
 
-    def __init__(self, model):
-        self.name_list = dict()
+    def __init__(self, model, dynamic_shape=False):
+        # ``{id(obj): (ref, name)}``
+        self._names = dict()
+        self._name_counter = 0
+        self.dynamic_shape = dynamic_shape
+        self.name_generator = onnx_helper.NameGenerator()
+
+        selfref = weakref.ref(self)
+
+        def remove(ref):
+            self_ = selfref()
+            if self_ is not None:
+                entry = self_._names.get(ref.key)
+                if entry is not None and entry[0] is ref:
+                    del self_._names[ref.key]
+        self._remove = remove
+
+        # Aliased parameters share the name of the first one
+        aliases = onnx_helper.find_aliased_params(model)
         for name, param in model.namedparams():
             onnx_name = onnx_helper.cleanse_param_name(name)
-            self.set_name(param, onnx_name)
+            self.set_name(param, aliases.get(onnx_name, onnx_name))
+
+    def __len__(self):
+        return len(self._names)
+
+    @property
+    def name_list(self):
+        """dict: Names of live objects keyed by instance ID.
+
+        When the target variable is ``chainer.Variable`` or
+        ``chainer.Parameter``, instance ID of ``ndarray`` held by the variable
+        is also put as key, because some functions like ``F.where``
+        internally unwrap variable.
+        """
+        return {key: name for key, (ref, name) in list(self._names.items())
+                if ref() is not None}
+
+    def _lookup(self, obj):
+        entry = self._names.get(id(obj))
+        if entry is not None and entry[0]() is obj:
+            return entry[1]
+        return None
+
+    def _register(self, obj, name):
+        key = id(obj)
+        self._names[key] = (_make_ref(obj, key, self._remove), name)
 
     def get_name(self, variable):
-        str_id = id(variable)
-        if str_id in self.name_list:
-            return self.name_list[str_id]
-        else:
-            new_name = 'v{}'.format(len(self.name_list))
-            self.set_name(variable, new_name)
-            return new_name
+        name = self._lookup(variable)
+        if name is None:
+            name = 'v{}'.format(self._name_counter)
+            self._name_counter += 1
+            self.set_name(variable, name)
+        return name
 
     def set_name(self, variable, name):
-        str_id = id(variable)
-        self.name_list[str_id] = name
+        self._register(variable, name)
         if isinstance(variable, (chainer.Variable, chainer.Parameter)):
-            array_id = id(variable.array)
-            self.name_list[array_id] = name
+            array = variable.array
+            if array is not None:
+                self._register(array, name)
@@ -2,6 +2,8 @@ from __future__ import print_function
 
 import collections
 from collections import OrderedDict
+import hashlib
+import heapq
 import warnings
 
 import chainer
@@ -9,12 +11,17 @@ import onnx
 from onnx.mapping import NP_TYPE_TO_TENSOR_TYPE
 
 from onnx_chainer.context import Context
+from onnx_chainer import export_cache
+from onnx_chainer.external_data import ExternalDataWriter
 from onnx_chainer.functions.converter import FunctionConverterParams
 from onnx_chainer import mapping
 from onnx_chainer import onnx_helper
+from onnx_chainer import profiler
+from onnx_chainer import serialization
+from onnx_chainer.update_weights import update_initializers
+from onnx_chainer import validation
 
 try:
-    from onnx import checker
     from onnx import helper
     from onnx import numpy_helper
 
@@ -33,7 +40,24 @@ def _check_available():
             '\t$ pip install onnx\n\n')
 
 
-def convert_parameter(parameter, context):
+def convert_parameter(parameter, context, data_writer=None):
+    """Converts the parameter to an initializer.
+
+    If ``data_writer`` is given, the payload is written to its data file
+    directly from the buffer of the array, and the returned tensor only
+    refers to it. Otherwise the payload is copied into ``raw_data`` of the
+    returned tensor, since the model holds it in memory.
+
+    Args:
+        parameter (~chainer.Variable or array): The parameter.
+        context (~onnx_chainer.context.Context): The context of the export,
+            which names the parameter.
+        data_writer (~onnx_chainer.external_data.ExternalDataWriter): The
+            writer of external data.
+
+    Returns:
+        ~onnx.TensorProto: The initializer.
+    """
     if isinstance(parameter, chainer.Parameter):
         array = parameter.array
     elif isinstance(parameter, chainer.Variable):
@@ -45,6 +69,8 @@ def convert_parameter(parameter, context):
             'The type of parameter is unknown. It should be either Parameter '
             'or Variable or ndarray, but the type was {}.'.format(
                 type(parameter)))
+    if data_writer is not None:
+        return data_writer.make_tensor(array, context.get_name(parameter))
     array = chainer.cuda.to_cpu(array)
     return numpy_helper.from_array(array, context.get_name(parameter))
 
@@ -107,9 +133,11 @@ class ONNXExport(chainer.FunctionHook):
 
     def __init__(
             self, context, converters, opset_version, is_output_renamed,
-            network_outputs):
+            network_outputs, checker_context=None):
         self.context = context
         self.converters = converters
+        # Nodes created by built-in converters are checked if set
+        self.checker_context = checker_context
 
         self.graph = []
         # Converter nodes keyed by "number:func_name"
@@ -123,20 +151,44 @@ class ONNXExport(chainer.FunctionHook):
 
     def create_node(
             self, func_name, func, input_names, output_names, parameters):
-        onnx_helper.set_func_name(func_name)
+        name_generator = self.context.name_generator
+        name_generator.set_func_name(func_name)
         converter = self.converters.get(func_name, None)
         if converter is None:
             raise ValueError('{} is not supported'.format(func_name))
         params = FunctionConverterParams(
             func, self.specified_opset_version, input_names, output_names,
             self.context, parameters)
-        nodes = converter(params)
+        with onnx_helper.using_name_generator(name_generator),\
+                profiler.converter(func_name):
+            nodes = converter(params)
+        if self.checker_context is not None and\
+                converter is mapping.converters.get(func_name, None):
+            validation.check_nodes(nodes, self.checker_context, func_name)
         nodes = list(reversed(nodes))
         assert len(nodes[0].output) == len(output_names)
         nodes[0].output[:] = output_names
         return nodes
 
     def backward_postprocess(self, function, in_data, out_grad):
+        self.convert_function(function)
+
+    def trace(self, outputs):
+        """Convert functions by walking the graph from outputs.
+
+        Unlike the hook path, this method does not run any backward
+        computation. Functions are converted in the same order as the
+        backward computation would visit them, and ``deleted`` is called at
+        the end to rename nodes.
+
+        Args:
+            outputs (list): Output ``Variable`` objects of the network.
+        """
+        for function in _iter_function_nodes(outputs):
+            self.convert_function(function)
+        self.deleted()
+
+    def convert_function(self, function):
         if isinstance(function, chainer.function.FunctionAdapter):
             function = function.function
         func_name = function.__class__.__name__
@@ -159,13 +211,19 @@ class ONNXExport(chainer.FunctionHook):
         # Variable of the network
         output_names = []
         for o in function.outputs:
-            var = o().get_variable_or_none()
+            output_node = o()
+            if output_node is None:
+                # The output is not referred from anywhere, so use the weak
+                # reference held by the function as is
+                output_names.append(self.context.get_name(o))
+                continue
+            var = output_node.get_variable_or_none()
             if var is not None:  # If the output is kept
                 output_name = self.context.get_name(var)
                 if output_name in self.inputs:
                     del self.inputs[output_name]
             else:
-                output_name = self.context.get_name(o())
+                output_name = self.context.get_name(output_node)
             output_names.append(output_name)
 
         nodes = self.create_node(
@@ -219,11 +277,120 @@ class ONNXExport(chainer.FunctionHook):
                 self.graph.append(node)
 
 
+def _iter_function_nodes(outputs):
+    """Yields function nodes reachable from the outputs.
+
+    Function nodes are yielded in descending order of their ranks, that is
+    the same order as the backward computation of Chainer visits them.
+
+    Args:
+        outputs (list): Output ``Variable`` objects of the network.
+    """
+    cand_funcs = []
+    seen_set = set()
+
+    def add_cand(cand):
+        if cand not in seen_set:
+            # Negate since heapq is min-heap
+            heapq.heappush(cand_funcs, (-cand.rank, len(seen_set), cand))
+            seen_set.add(cand)
+
+    for y in outputs:
+        creator = y.creator_node
+        if creator is not None:
+            add_cand(creator)
+
+    while cand_funcs:
+        _, _, func = heapq.heappop(cand_funcs)
+        yield func
+        for x in func.inputs:
+            creator = x.creator_node
+            if creator is not None:
+                add_cand(creator)
+
+
+def _normalize_dynamic_axes(dynamic_axes):
+    """Returns names of symbolic dimensions keyed by axes and value names."""
+    if not dynamic_axes:
+        return {}
+    normalized = {}
+    for name, axes in dynamic_axes.items():
+        if isinstance(axes, dict):
+            normalized[name] = dict(axes)
+        else:
+            normalized[name] = {
+                axis: '{}_dim{}'.format(name, axis) for axis in axes}
+    return normalized
+
+
+def _get_symbolic_shape(name, shape, dynamic_axes):
+    axes = dynamic_axes.get(name, None)
+    if not axes:
+        return shape
+    shape = list(shape)
+    for axis, dim_param in axes.items():
+        if not -len(shape) <= axis < len(shape):
+            raise ValueError(
+                'Axis {} of dynamic_axes is out of the range of {} whose '
+                'shape is {}'.format(axis, name, tuple(shape)))
+        shape[axis] = dim_param
+    return shape
+
+
+def _find_duplicated_constants(constants):
+    """Finds constants which have the same contents as preceding ones.
+
+    Constants are indexed by their dtypes, shapes and digests of their
+    contents, and compared byte by byte only when the keys are the same.
+
+    Args:
+        constants (list): Pairs of names and values, which are
+            ``chainer.Variable`` or arrays.
+
+    Returns:
+        dict: Names of the first constants keyed by names of duplicated ones.
+    """
+    index = collections.defaultdict(list)
+    duplicates = {}
+    for name, value in constants:
+        if isinstance(value, chainer.Variable):
+            value = value.array
+        array = chainer.cuda.to_cpu(value)
+        if array.dtype.kind == 'O':
+            continue
+        buf = serialization.as_buffer(array)
+        key = (array.dtype.str, array.shape, hashlib.sha1(buf).hexdigest())
+        for other_name, other_buf in index[key]:
+            if other_buf == buf:
+                if other_name != name:
+                    duplicates[name] = other_name
+                break
+        else:
+            index[key].append((name, buf))
+    return duplicates
+
+
+def _rename_node_inputs(nodes, new_names):
+    """Replaces input names of the nodes.
+
+    Args:
+        nodes (list): ``onnx.NodeProto`` objects, updated in place.
+        new_names (dict): New names keyed by old names.
+    """
+    for node in nodes:
+        for i, name in enumerate(node.input):
+            if name in new_names:
+                node.input[i] = new_names[name]
+
+
 def export(model, args, filename=None, export_params=True,
            graph_name='Graph', save_text=False, opset_version=None,
            input_names=None, output_names=None, train=False,
            return_named_inout=False, external_converters=None,
-           external_opset_imports=None):
+           external_opset_imports=None, trace_mode='forward',
+           cache_dir=None, external_data=False, external_data_threshold=1024,
+           external_data_max_file_size=None, optimize=False,
+           dynamic_axes=None, check='full', dtype=None, fp32_ops=None):
     """Export function for chainer.Chain in ONNX format.
 
     This function performs a forward computation of the given
@@ -261,7 +428,9 @@ def export(model, args, filename=None, export_params=True,
         args (list or dict): The arguments which are given to the model
             directly.
         filename (str or file-like object): The filename used for saving the
-            resulting ONNX model. If None, nothing is saved to the disk.
+            resulting ONNX model. If None, nothing is saved to the disk. The
+            model is streamed field by field, so a file-like object like a
+            compressed stream can be given as well.
         export_params (bool): If True, this function exports all the parameters
             included in the given model at the same time. If False, the
             exported ONNX model doesn't include any parameter values.
@@ -287,6 +456,69 @@ def export(model, args, filename=None, export_params=True,
             keyed by ~chainer.FunctionNode name.
         external_opset_imports (dict): Import external opset. opset version
             number keyed by domain name.
+        trace_mode (str): How to collect functions to be converted. On
+            ``'forward'``, the computational graph is walked from the outputs
+            and no gradient is computed. On ``'backward'``, functions are
+            collected by a function hook while running backward computation
+            as older versions did.
+        cache_dir (str): If set, the converted graph is cached in this
+            directory keyed by the traced functions, the input signature, the
+            opset version and converters. When the same graph is exported
+            again, conversion is skipped and only initializers of
+            ``model.namedparams()`` are refreshed. Note that other constants,
+            for example statistics computed by ``BatchNormalization`` on
+            train mode, are taken from the cached graph. Graphs in which
+            parameters are repacked, e.g. by N-step RNN functions, and
+            graphs of functions having attributes which cannot be
+            fingerprinted are not cached.
+        external_data (bool): If True, payloads of initializers are written
+            to data files next to ``filename`` as soon as they are converted
+            and the ONNX model refers them by offsets, as the external data
+            format of ONNX. This is required to export models larger than
+            2GB. ``filename`` must be a path.
+        external_data_threshold (int): Initializers smaller than this byte
+            size are kept in the ONNX model on ``external_data`` mode.
+        external_data_max_file_size (int): If set, payloads are split into
+            multiple data files of this byte size at most on
+            ``external_data`` mode.
+        optimize (bool, list or ~onnx_chainer.optimizer.PassManager): If
+            True, the converted graph is optimized by
+            :data:`~onnx_chainer.optimizer.DEFAULT_PASSES`, for example
+            ``Identity`` nodes and unused constants are removed and
+            ``BatchNormalization`` is folded into ``Conv``. Passes which
+            assume test mode are skipped when ``train`` is True. A list of
+            pass names or functions selects passes to be run, e.g.
+            ``'fuse_layer_norm'`` and ``'fuse_attention'`` which emit fused
+            operators and are not run by default. They emit operators in the
+            custom domain of ``external_opset_imports``. Pairs of passes and
+            dicts of their options can be listed too. A
+            :class:`~onnx_chainer.optimizer.PassManager` can be given to get
+            statistics of passes.
+        dynamic_axes (dict): Axes of inputs and outputs which are symbolic
+            dimensions in the graph, keyed by input and output names. Each
+            value is either a list of axes or a dict of names of dimensions
+            keyed by axes, e.g. ``{'Input_0': {0: 'batch'}}``. Axes given by
+            a list are named ``<name>_dim<axis>``. If set, converters avoid
+            embedding shapes of the traced values where possible, so the
+            model can be run with other sizes of the symbolic dimensions.
+        check (str): How the exported model is validated by the checker of
+            ONNX. On ``'full'``, the whole model is checked. On
+            ``'structure-only'``, payloads of initializers are not checked,
+            which saves serializing them once more. On ``'off'``, nothing is
+            checked. Unless ``'off'``, nodes created by built-in converters
+            are also checked one by one while converting, so that an error
+            tells the Chainer function of the invalid node.
+        dtype (str or numpy.dtype): The float type of the exported model,
+            either ``float32`` or ``float16``. On ``float16``, float
+            initializers, constants, inputs and outputs of the graph are
+            converted to ``float16`` after optimization passes, while
+            operators in ``fp32_ops`` are computed in ``float32`` behind
+            inserted ``Cast`` nodes. If ``None``, types of the model are
+            kept as they are.
+        fp32_ops (list): Types of operators computed in ``float32`` on
+            ``float16`` export. If ``None``,
+            :data:`~onnx_chainer.float16.DEFAULT_FP32_OPS`, i.e. softmax,
+            ``LRN`` and reductions, are used.
 
     Returns:
         ~onnx.ModelProto or tuple:
@@ -298,18 +530,134 @@ def export(model, args, filename=None, export_params=True,
 
     _check_available()
 
+    if trace_mode not in ('forward', 'backward'):
+        raise ValueError(
+            'trace_mode must be either \'forward\' or \'backward\', but '
+            '\'{}\' was given.'.format(trace_mode))
+    if external_data and not isinstance(filename, str):
+        raise ValueError(
+            'external_data requires a path as filename to locate data files')
+    pass_manager = _get_pass_manager(optimize, train)
+    check = validation.validate_check_mode(check)
+    fp32_ops = _get_fp32_ops(dtype, fp32_ops)
+
     with chainer.using_config('train', train),\
             chainer.using_config('in_recomputing', True),\
             chainer.using_config('enable_backprop', True):
         return _export(
             model, args, filename, export_params, graph_name, save_text,
             opset_version, input_names, output_names, return_named_inout,
-            external_converters, external_opset_imports)
+            external_converters, external_opset_imports, trace_mode,
+            cache_dir, external_data, external_data_threshold,
+            external_data_max_file_size, pass_manager, dynamic_axes, check,
+            fp32_ops)
+
+
+# Passes which assume the graph is run on test mode
+_TEST_MODE_PASSES = ('eliminate_dropout', 'fuse_bn_into_conv')
+
+
+def _get_pass_manager(optimize, train):
+    if optimize is None or optimize is False:
+        return None
+    # The optimizer is imported only when it is used, since it imports
+    # shape inference of ONNX, as well as other optional features below
+    from onnx_chainer import optimizer
+    if isinstance(optimize, optimizer.PassManager):
+        return optimize
+    if optimize is True:
+        return optimizer.PassManager(
+            [p for p in optimizer.DEFAULT_PASSES
+             if not (train and p in _TEST_MODE_PASSES)])
+    return optimizer.PassManager(optimize)
+
+
+def _get_fp32_ops(dtype, fp32_ops):
+    # ``None`` is returned unless the model is exported in float16
+    if dtype is None:
+        return None
+    from onnx_chainer import float16
+    if not float16.validate_dtype(dtype):
+        return None
+    if fp32_ops is None:
+        return float16.DEFAULT_FP32_OPS
+    return fp32_ops
+
+
+def _has_n_step_rnn(model):
+    if not isinstance(model, chainer.Link):
+        return False
+    import chainer.links as L
+    n_step_rnn_links = (
+        L.NStepLSTM, L.NStepBiLSTM, L.NStepGRU, L.NStepBiGRU,
+        L.NStepRNNTanh, L.NStepBiRNNTanh, L.NStepRNNReLU, L.NStepBiRNNReLU)
+    return any(isinstance(link, n_step_rnn_links) for link in model.links())
+
+
+def _forward(model, args):
+    """Runs the forward computation of the model to be exported.
+
+    Arrays in ``args`` are replaced by variables. If the model has N-step
+    RNN links, N-step RNN functions are traced as fused layers.
+
+    Returns:
+        tuple: ``args`` whose arrays are replaced, the list of input
+        variables and outputs of the model.
+    """
+    if isinstance(args, tuple):
+        args = list(args)
+    if isinstance(args, list):
+        for i, arg in enumerate(args):
+            if isinstance(arg, chainer.get_array_types()):
+                args[i] = chainer.Variable(arg)
+        flat_args = args
+    elif isinstance(args, dict):
+        for key, arg in args.items():
+            if isinstance(arg, chainer.get_array_types()):
+                args[key] = chainer.Variable(arg)
+        flat_args = list(args.values())
+    else:
+        if isinstance(args, chainer.get_array_types()):
+            args = chainer.Variable(args)
+        if not isinstance(args, chainer.Variable):
+            raise ValueError(
+                'The \'args\' argument should be a list, tuple, dict, '
+                'numpy array, or Chainer Variable. But a {} object was '
+                'given.'.format(type(args)))
+        flat_args = [args]
+
+    def call():
+        if isinstance(args, list):
+            return model(*args)
+        if isinstance(args, dict):
+            return model(**args)
+        return model(args)
+
+    if not _has_n_step_rnn(model):
+        return args, flat_args, call()
+    # Functions of Chainer are replaced only for models using them
+    from onnx_chainer import fused_rnn
+    with fused_rnn.fused_n_step_rnn(flat_args):
+        return args, flat_args, call()
+
+
+def _flatten_outputs(outputs):
+    if isinstance(outputs, (list, tuple)):
+        return list(outputs)
+    elif isinstance(outputs, dict):
+        return list(outputs.values())
+    elif isinstance(outputs, chainer.Variable):
+        return [outputs]
+    raise RuntimeError(
+        'Unexpected output type from the model: {}'.format(type(outputs)))
 
 
 def _export(model, args, filename, export_params, graph_name, save_text,
             opset_version, input_names, output_names, return_named_inout,
-            external_converters, external_opset_imports):
+            external_converters, external_opset_imports, trace_mode,
+            cache_dir, external_data, external_data_threshold,
+            external_data_max_file_size, pass_manager, dynamic_axes, check,
+            fp32_ops):
     if opset_version is None:
         opset_version = int(onnx.defs.onnx_opset_version())
     elif opset_version < MINIMUM_OPSET_VERSION:
@@ -324,102 +672,158 @@ def _export(model, args, filename, export_params, graph_name, save_text,
         )
 
     # Forward computation
-    context = Context(model)
+    context = Context(model, dynamic_shape=bool(dynamic_axes))
+    with profiler.phase('forward'):
+        args, flat_args, outputs = _forward(model, args)
     network_inputs = {}
-    if isinstance(args, tuple):
-        args = list(args)
-    if isinstance(args, list):
-        for i, arg in enumerate(args):
-            if isinstance(arg, chainer.get_array_types()):
-                args[i] = chainer.Variable(arg)
-            network_inputs[context.get_name(args[i])] = args[i]
-        flat_args = args
-        outputs = model(*args)
-    elif isinstance(args, dict):
-        for key, arg in args.items():
-            if isinstance(arg, chainer.get_array_types()):
-                args[key] = chainer.Variable(arg)
-            network_inputs[context.get_name(args[key])] = args[key]
-        flat_args = list(args.values())
-        outputs = model(**args)
-    elif isinstance(args, chainer.get_array_types()):
-        args = chainer.Variable(args)
-        network_inputs[context.get_name(args)] = args
-        flat_args = [args]
-        outputs = model(args)
-    elif isinstance(args, chainer.Variable):
-        network_inputs[context.get_name(args)] = args
-        flat_args = [args]
-        outputs = model(args)
-    else:
-        raise ValueError(
-            'The \'args\' argument should be a list, tuple, dict, '
-            'numpy array, or Chainer Variable. But a {} object was '
-            'given.'.format(type(args)))
+    for arg in flat_args:
+        network_inputs[context.get_name(arg)] = arg
     rename_variable_name(context, args, network_inputs, input_names)
 
-    initializers = []
-    input_tensors = []
-    param_names = set()
-    for param in model.params():
-        name = context.get_name(param)
-        param_names.add(name)
-        tensor = convert_parameter(param, context)
-        initializers.append(tensor)
-        input_tensors.append(helper.make_tensor_value_info(
-            name, tensor.data_type, tensor.dims))
-
-    for name, var in network_inputs.items():
-        input_tensors.append(helper.make_tensor_value_info(
-            name, NP_TYPE_TO_TENSOR_TYPE[var.dtype], var.shape))
-
     if external_converters:
         chainer.utils.experimental('external_converters')
-        converters = dict(mapping.converters, **external_converters)
+        # Converters are looked up lazily, so the built-in ones are not
+        # copied into a dict, which would import all of them
+        converters = collections.ChainMap(
+            external_converters, mapping.converters)
     else:
         converters = mapping.converters
 
-    if isinstance(outputs, (list, tuple)):
-        flat_outputs = outputs
-    elif isinstance(outputs, dict):
-        flat_outputs = list(outputs.values())
-    elif isinstance(outputs, chainer.Variable):
-        flat_outputs = [outputs]
-    else:
-        raise RuntimeError(
-            'Unexpected output type from the model: {}'.format(type(outputs)))
+    flat_outputs = _flatten_outputs(outputs)
     if not all([isinstance(o, chainer.Variable) for o in flat_outputs]):
         raise ValueError('The all \'outputs\' must be Chainer Variable')
     network_outputs = {context.get_name(var): var for var in flat_outputs}
     if output_names:
         rename_variable_name(context, outputs, network_outputs, output_names)
-    # Backward computation to construct graph
-    with ONNXExport(
-            context, converters, opset_version, (output_names is not None),
-            network_outputs) as o:
-        chainer.grad(flat_outputs, list(model.params()) + flat_args)
-
-    implicit_input_names = set(o.inputs.keys()) - param_names -\
-        set(network_inputs.keys())
-    for name in implicit_input_names:
-        tensor = convert_parameter(o.inputs[name], context)
-        initializers.append(tensor)
-        input_tensors.append(helper.make_tensor_value_info(
-            name, tensor.data_type, tensor.dims))
-
-    # If additional parameters are created during conversion
-    if o.additional_parameters:
-        for param in o.additional_parameters:
-            tensor = convert_parameter(param, context)
+
+    data_writer = None
+    if external_data and export_params:
+        data_writer = ExternalDataWriter(
+            filename, size_threshold=external_data_threshold,
+            max_file_size=external_data_max_file_size)
+
+    cache_key = None
+    if cache_dir is not None:
+        cache_key = export_cache.compute_cache_key(
+            _iter_function_nodes(flat_outputs), network_inputs,
+            opset_version, converters, external_converters,
+            network_outputs=flat_outputs,
+            params=[(onnx_helper.cleanse_param_name(name), param)
+                    for name, param in model.namedparams()],
+            export_params=export_params, graph_name=graph_name,
+            output_names=output_names,
+            external_opset_imports=external_opset_imports,
+            dynamic_axes=dynamic_axes)
+        cached = None
+        if cache_key is not None:
+            with profiler.phase('cache'):
+                cached = export_cache.load_cached_model(cache_dir, cache_key)
+                if cached is not None and export_params:
+                    update_initializers(cached[0], model)
+        if cached is not None:
+            onnx_model, cached_output_names = cached
+            _finalize_model(
+                onnx_model, pass_manager, data_writer, external_converters,
+                check, fp32_ops)
+            network_outputs = OrderedDict(
+                zip(cached_output_names, flat_outputs))
+            _save_model(onnx_model, filename, save_text)
+            if return_named_inout:
+                chainer.utils.experimental('return_named_inout')
+                return onnx_model, network_inputs, network_outputs
+            return onnx_model
+
+    # Optimization passes and float16 conversion need payloads of
+    # initializers, so they are moved to data files after them
+    param_writer = data_writer\
+        if pass_manager is None and fp32_ops is None else None
+
+    dynamic_axes = _normalize_dynamic_axes(dynamic_axes)
+    network_input_tensors = []
+    for name, var in network_inputs.items():
+        network_input_tensors.append(helper.make_tensor_value_info(
+            name, NP_TYPE_TO_TENSOR_TYPE[var.dtype],
+            _get_symbolic_shape(name, var.shape, dynamic_axes)))
+
+    checker_context = None
+    if check != 'off':
+        checker_context = validation.make_checker_context(opset_version)
+    o = ONNXExport(
+        context, converters, opset_version, (output_names is not None),
+        network_outputs, checker_context)
+    with profiler.phase('trace'):
+        if trace_mode == 'forward':
+            # Walk the computational graph to construct graph
+            o.trace(flat_outputs)
+        else:
+            # Backward computation to construct graph
+            with o:
+                chainer.grad(flat_outputs, list(model.params()) + flat_args)
+
+    # Parameters which converters consumed to make new constants, e.g.
+    # weights repacked for fused RNN operators, are not exported
+    used_names = set(name for node in o.graph for name in node.input)
+    consumed_names = set(o.inputs.keys()) - used_names
+
+    initializers = []
+    input_tensors = []
+    param_names = set()
+    # Initializers of parameters and constants are recorded as one phase
+    with profiler.phase('initializers'):
+        for param in model.params():
+            name = context.get_name(param)
+            if name in param_names:
+                # Aliased parameters are converted only once
+                continue
+            param_names.add(name)
+            if name in consumed_names:
+                continue
+            tensor = convert_parameter(param, context, param_writer)
             initializers.append(tensor)
             input_tensors.append(helper.make_tensor_value_info(
-                context.get_name(param), tensor.data_type, tensor.dims))
+                name, tensor.data_type, tensor.dims))
+        input_tensors.extend(network_input_tensors)
+
+        implicit_input_names = set(o.inputs.keys()) - param_names -\
+            set(network_inputs.keys())
+        constants = [(name, o.inputs[name])
+                     for name in sorted(implicit_input_names)]
+        # If additional parameters are created during conversion
+        constants += [(context.get_name(param), param)
+                      for param in o.additional_parameters]
+
+        # Converters create the same constants for each call, e.g. shapes of
+        # Reshape, so only one of them is kept
+        duplicates = _find_duplicated_constants(constants)
+        if duplicates:
+            _rename_node_inputs(o.graph, duplicates)
+        converted_names = set()
+        for name, value in constants:
+            if name in duplicates or name in converted_names:
+                continue
+            converted_names.add(name)
+            tensor = convert_parameter(value, context, param_writer)
+            initializers.append(tensor)
+            input_tensors.append(helper.make_tensor_value_info(
+                name, tensor.data_type, tensor.dims))
+        if param_writer is not None:
+            param_writer.close()
 
     # Convert output tensors
     output_tensors = []
     for name, var in network_outputs.items():
         output_tensors.append(helper.make_tensor_value_info(
-            name, NP_TYPE_TO_TENSOR_TYPE[var.dtype], var.shape))
+            name, NP_TYPE_TO_TENSOR_TYPE[var.dtype],
+            _get_symbolic_shape(name, var.shape, dynamic_axes)))
+    unknown_names = set(dynamic_axes.keys()) - set(network_inputs.keys()) -\
+        set(network_outputs.keys())
+    if unknown_names:
+        raise ValueError(
+            'dynamic_axes has unknown names: {}. Inputs are {} and outputs '
+            'are {}'.format(
+                ', '.join(sorted(unknown_names)),
+                ', '.join(network_inputs.keys()),
+                ', '.join(network_outputs.keys())))
 
     if not export_params:
         initializers = []
@@ -433,37 +837,74 @@ def _export(model, args, filename, export_params, graph_name, save_text,
         chainer.utils.experimental('external_opset_imports')
         for domain, version in external_opset_imports.items():
             opset_imports.append(helper.make_operatorsetid(domain, version))
-    model = helper.make_model(
+    onnx_model = helper.make_model(
         onnx_graph,
         producer_name='Chainer',
         producer_version=chainer.__version__,
         opset_imports=opset_imports
     )
 
-    model.ir_version = onnx.IR_VERSION
-
-    try:
-        checker.check_model(model)
-    except onnx.checker.ValidationError as e:
-        if external_converters is None:
-            raise e
-        else:
-            warnings.warn(
-                'Unregistered operator error is occurred but ignored because '
-                'exporting with `external_converters`, please take care about '
-                'ONNX format check is insufficient. Error message:\n{}'.format(
-                    str(e)))
+    onnx_model.ir_version = onnx.IR_VERSION
+
+    # Constants made from consumed parameters cannot be refreshed on
+    # loading, so such graphs are not cached
+    if cache_key is not None and not (consumed_names & param_names):
+        # The graph is cached before optimization, since passes can compute
+        # new initializers from parameters which are refreshed on loading
+        output_name_by_id = {id(var): name
+                             for name, var in network_outputs.items()}
+        base_dir = None
+        if param_writer is not None:
+            base_dir = param_writer.base_dir
+        with profiler.phase('cache'):
+            export_cache.save_cached_model(
+                cache_dir, cache_key, onnx_model, model,
+                [output_name_by_id[id(var)] for var in flat_outputs],
+                base_dir=base_dir)
+
+    _finalize_model(
+        onnx_model, pass_manager, data_writer, external_converters, check,
+        fp32_ops)
+
+    _save_model(onnx_model, filename, save_text)
 
+    if return_named_inout:
+        chainer.utils.experimental('return_named_inout')
+        return onnx_model, network_inputs, network_outputs
+    return onnx_model
+
+
+def _finalize_model(onnx_model, pass_manager, data_writer,
+                    external_converters, check, fp32_ops):
+    if pass_manager is not None:
+        with profiler.phase('optimize'):
+            pass_manager.run(onnx_model)
+    if fp32_ops is not None:
+        from onnx_chainer import float16
+        with profiler.phase('float16'):
+            float16.convert_float16(onnx_model, fp32_ops)
+    # Payloads computed by passes are checked before they are moved to
+    # data files
+    with profiler.phase('check'):
+        validation.check_model(onnx_model, check, external_converters)
+    if data_writer is not None:
+        with profiler.phase('external_data'):
+            for tensor in onnx_model.graph.initializer:
+                data_writer.externalize(tensor)
+            data_writer.close()
+
+
+def _save_model(onnx_model, filename, save_text):
+    with profiler.phase('save'):
+        _write_model(onnx_model, filename, save_text)
+
+
+def _write_model(onnx_model, filename, save_text):
     if filename is not None and isinstance(filename, str):
         with open(filename, 'wb') as fp:
-            fp.write(model.SerializeToString())
+            serialization.write_model(fp, onnx_model)
         if save_text:
             with open(filename + '.txt', 'w') as fp:
-                print(model, file=fp)
+                print(onnx_model, file=fp)
     elif hasattr(filename, 'write'):
-        filename.write(model.SerializeToString())
-
-    if return_named_inout:
-        chainer.utils.experimental('return_named_inout')
-        return model, network_inputs, network_outputs
-    return model
+        serialization.write_model(filename, onnx_model)
@@ -0,0 +1,271 @@
+import hashlib
+import json
+import numbers
+import os
+import tempfile
+
+import chainer
+import numpy as np
+import onnx
+from onnx import numpy_helper
+
+from onnx_chainer.external_data import read_external_tensor
+from onnx_chainer import onnx_helper
+
+
+# Bump this version when the layout of cached files or the conversion result
+# of the same graph is changed.
+CACHE_FORMAT_VERSION = 2
+
+
+# Attributes of function nodes which Chainer sets for bookkeeping of the
+# computational graph
+_IGNORED_ATTRIBUTES = (
+    'chainerx_device', 'inputs', 'lazy_grad_sum', 'outputs', 'rank', 'stack')
+
+
+def _describe_array(array):
+    array = np.ascontiguousarray(chainer.cuda.to_cpu(array))
+    return 'array({!r}, {!r}, {})'.format(
+        array.dtype.str, array.shape,
+        hashlib.sha256(array.tobytes()).hexdigest())
+
+
+def _describe(value):
+    """Returns a stable string of an attribute value, or ``None``.
+
+    ``None`` is returned if the value cannot be described, that is the
+    graph cannot be identified by the key.
+    """
+    if isinstance(value, np.generic):
+        return '{}({!r})'.format(value.dtype.str, value.item())
+    if value is None or value is Ellipsis or\
+            isinstance(value, (bool, str, numbers.Number)):
+        return repr(value)
+    if isinstance(value, np.dtype):
+        return 'dtype({!r})'.format(value.str)
+    if isinstance(value, type) and issubclass(value, np.generic):
+        return 'dtype({!r})'.format(np.dtype(value).str)
+    if isinstance(value, chainer.get_array_types()):
+        return _describe_array(value)
+    if isinstance(value, chainer.Variable):
+        return _describe_array(value.array)
+    if isinstance(value, slice):
+        items = [_describe(v) for v in (value.start, value.stop, value.step)]
+        if any(item is None for item in items):
+            return None
+        return 'slice({})'.format(', '.join(items))
+    if isinstance(value, (list, tuple)):
+        items = [_describe(v) for v in value]
+        if any(item is None for item in items):
+            return None
+        return '({})'.format(', '.join(items))
+    if isinstance(value, dict):
+        items = [(_describe(k), _describe(v)) for k, v in value.items()]
+        if any(k is None or v is None for k, v in items):
+            return None
+        return '{{{}}}'.format(', '.join(
+            '{}: {}'.format(k, v) for k, v in sorted(items)))
+    return None
+
+
+def _describe_function(function):
+    """Returns a tuple describing the function, or ``None``."""
+    if isinstance(function, chainer.function.FunctionAdapter):
+        function = function.function
+    attributes = []
+    for key in sorted(vars(function)):
+        if key.startswith('_') or key in _IGNORED_ATTRIBUTES:
+            continue
+        value = _describe(getattr(function, key))
+        if value is None:
+            return None
+        attributes.append((key, value))
+    inputs = [(tuple(i.shape), str(i.dtype)) for i in function.inputs]
+    outputs = []
+    for o in function.outputs:
+        node = o()
+        outputs.append(
+            None if node is None else (tuple(node.shape), str(node.dtype)))
+    return function.__class__.__name__, inputs, outputs, attributes
+
+
+class _SourceDescriber(object):
+
+    """Describes where values given to functions come from.
+
+    A value is either an output of a function, identified by the index of
+    the function and the output, an input of the network or a parameter,
+    identified by its name, or a constant, identified by its value.
+    """
+
+    def __init__(self, functions, network_inputs, params):
+        self.function_indexes = {
+            id(function): i for i, function in enumerate(functions)}
+        self.input_names = {
+            id(var): name for name, var in network_inputs.items()}
+        self.param_names = {}
+        for name, param in params:
+            # Aliased parameters are exported by the first name
+            self.param_names.setdefault(id(param), name)
+
+    def __call__(self, node):
+        creator = node.creator_node
+        if creator is not None:
+            index = self.function_indexes.get(id(creator), None)
+            position = next(i for i, o in enumerate(creator.outputs)
+                            if o() is node)
+            return 'function', index, position
+        var = node.get_variable_or_none()
+        if var is None:
+            # Arrays no longer referred to are not exported
+            return 'unreferred',
+        if id(var) in self.input_names:
+            return 'input', self.input_names[id(var)]
+        if id(var) in self.param_names:
+            return 'param', self.param_names[id(var)]
+        return 'constant', _describe_array(var.array)
+
+
+def _describe_converter(converter):
+    return '{}.{}'.format(
+        getattr(converter, '__module__', ''),
+        getattr(converter, '__qualname__', type(converter).__name__))
+
+
+def compute_cache_key(functions, network_inputs, opset_version, converters,
+                      external_converters=None, network_outputs=(),
+                      params=(), **options):
+    """Computes a fingerprint of the graph to be exported.
+
+    The fingerprint covers functions, their attributes and which values they
+    take, as well as names and shapes of parameters, so that initializers
+    of a cached model are refreshed by the parameters of the same names.
+
+    Args:
+        functions (iterable): Function nodes of the traced graph.
+        network_inputs (dict): Input variables of the network keyed by their
+            ONNX names.
+        opset_version (int): The target opset version.
+        converters (dict): Converters used for the export keyed by function
+            name.
+        external_converters (dict): Add-on converters keyed by function name.
+        network_outputs (list): Output variables of the network.
+        params (list): Pairs of ONNX names of parameters and parameters.
+        **options (dict): Other export options which affect the output.
+
+    Returns:
+        str: A hex digest which identifies the exported graph. ``None`` if
+        attributes of a function cannot be described, e.g. arbitrary
+        objects, since the graph cannot be cached safely.
+    """
+    h = hashlib.sha256()
+
+    def update(*values):
+        h.update(repr(values).encode('utf-8'))
+
+    update(CACHE_FORMAT_VERSION, chainer.__version__, onnx.__version__,
+           bool(chainer.config.train), opset_version)
+    for name, var in network_inputs.items():
+        update(name, tuple(var.shape), str(var.dtype))
+    for name, param in params:
+        array = param.array
+        update(name, None if array is None else
+               (tuple(array.shape), str(array.dtype)))
+    functions = list(functions)
+    describe_source = _SourceDescriber(functions, network_inputs, params)
+    for function in functions:
+        description = _describe_function(function)
+        if description is None:
+            return None
+        update(*description)
+        update(*[describe_source(x) for x in function.inputs])
+    update(*[describe_source(var.node) for var in network_outputs])
+    update(*sorted(converters.keys()))
+    if external_converters:
+        update(*sorted((k, _describe_converter(v))
+                       for k, v in external_converters.items()))
+    update(*sorted((k, repr(v)) for k, v in options.items()))
+    return h.hexdigest()
+
+
+def _cache_paths(cache_dir, key):
+    base = os.path.join(cache_dir, key)
+    return base + '.onnx', base + '.json'
+
+
+def _atomic_write(path, data, mode):
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(path), prefix='.tmp_', suffix='.part')
+    try:
+        with os.fdopen(fd, mode) as fp:
+            fp.write(data)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def load_cached_model(cache_dir, key):
+    """Loads the cached ONNX model.
+
+    Args:
+        cache_dir (str): The cache directory.
+        key (str): The cache key computed by :func:`compute_cache_key`.
+
+    Returns:
+        tuple: Pair of the ONNX model whose parameters are not filled and
+            the list of output names ordered as outputs of the model. When
+            the cache is not found, returns ``None``.
+    """
+    model_path, meta_path = _cache_paths(cache_dir, key)
+    if not (os.path.isfile(model_path) and os.path.isfile(meta_path)):
+        return None
+    with open(meta_path) as fp:
+        meta = json.load(fp)
+    if meta.get('version') != CACHE_FORMAT_VERSION:
+        return None
+    with open(model_path, 'rb') as fp:
+        onnx_model = onnx.load_model(fp)
+    return onnx_model, meta['output_names']
+
+
+def save_cached_model(cache_dir, key, onnx_model, model, output_names,
+                      base_dir=None):
+    """Saves the ONNX model to the cache directory.
+
+    Payloads of initializers which are parameters of ``model`` are not
+    stored because they are refreshed on loading.
+
+    Args:
+        cache_dir (str): The cache directory.
+        key (str): The cache key computed by :func:`compute_cache_key`.
+        onnx_model (~onnx.ModelProto): The exported ONNX model.
+        model (~chainer.Chain): The exported model.
+        output_names (list): Output names ordered as outputs of the model.
+        base_dir (str): The directory of data files when the ONNX model has
+            external data. Other external payloads than parameters are
+            stored inline.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    param_names = {onnx_helper.cleanse_param_name(name)
+                   for name, _ in model.namedparams()}
+    stripped = onnx.ModelProto()
+    stripped.CopyFrom(onnx_model)
+    for tensor in stripped.graph.initializer:
+        if tensor.name in param_names:
+            name, data_type = tensor.name, tensor.data_type
+            dims = list(tensor.dims)
+            tensor.Clear()
+            tensor.name = name
+            tensor.data_type = data_type
+            tensor.dims.extend(dims)
+        elif tensor.data_location == onnx.TensorProto.EXTERNAL:
+            array = read_external_tensor(tensor, base_dir)
+            tensor.CopyFrom(numpy_helper.from_array(array, tensor.name))
+
+    model_path, meta_path = _cache_paths(cache_dir, key)
+    _atomic_write(model_path, stripped.SerializeToString(), 'wb')
+    meta = {'version': CACHE_FORMAT_VERSION, 'output_names': output_names}
+    _atomic_write(meta_path, json.dumps(meta), 'w')
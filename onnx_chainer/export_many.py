@@ -0,0 +1,92 @@
+import collections
+import concurrent.futures
+import time
+import traceback
+
+from onnx_chainer.export import export
+
+
+class ExportJob(collections.namedtuple(
+        'ExportJob',
+        ('model_factory', 'args', 'filename', 'opset_version', 'kwargs'))):
+
+    """A job of :func:`export_many`.
+
+    Attributes:
+        model_factory (callable): A function which returns the model to be
+            exported. It is called in a worker process, so it must be
+            picklable, e.g. a function or a class defined at module level.
+        args (list or dict): The arguments given to the model.
+        filename (str): The filename to save the ONNX model.
+        opset_version (int): The operator set version of ONNX.
+        kwargs (dict): Other keyword arguments for
+            :func:`~onnx_chainer.export`.
+    """
+
+    __slots__ = ()
+
+    def __new__(cls, model_factory, args, filename, opset_version=None,
+                kwargs=None):
+        return super(ExportJob, cls).__new__(
+            cls, model_factory, args, filename, opset_version, kwargs)
+
+
+ExportResult = collections.namedtuple(
+    'ExportResult', ('job', 'elapsed', 'error'))
+ExportResult.__doc__ = """A result of a job of :func:`export_many`.
+
+Attributes:
+    job (ExportJob): The job.
+    elapsed (float): The elapsed time of the job in seconds, including
+        construction of the model.
+    error (str): The traceback when the job failed, otherwise ``None``.
+"""
+
+
+def _run_job(job):
+    start = time.time()
+    try:
+        model = job.model_factory()
+        kwargs = dict(job.kwargs or {})
+        kwargs['opset_version'] = job.opset_version
+        export(model, job.args, filename=job.filename, **kwargs)
+        error = None
+    except Exception:
+        error = traceback.format_exc()
+    return time.time() - start, error
+
+
+def export_many(jobs, max_workers=None):
+    """Exports models in parallel processes.
+
+    Each job is run by :func:`~onnx_chainer.export` in a process of a
+    process pool, independently of other jobs. Failure of a job does not stop
+    others, its error is returned in the result instead.
+
+    >>> jobs = [ExportJob(MyModel, x, 'model_{}.onnx'.format(opset), opset)
+    >>>         for opset in range(7, 10)]
+    >>> for result in onnx_chainer.export_many(jobs, max_workers=4):
+    >>>     print(result.job.filename, result.elapsed, result.error)
+
+    Args:
+        jobs (list): :class:`ExportJob` objects or tuples of their
+            attributes.
+        max_workers (int): The number of worker processes. If ``None``, the
+            number of processors is used.
+
+    Returns:
+        list: :class:`ExportResult` objects in the order of ``jobs``.
+    """
+    jobs = [job if isinstance(job, ExportJob) else ExportJob(*job)
+            for job in jobs]
+    for job in jobs:
+        if not isinstance(job.filename, str):
+            raise ValueError(
+                'filename of each job must be a path, but {} was '
+                'given'.format(type(job.filename)))
+
+    with concurrent.futures.ProcessPoolExecutor(
+            max_workers=max_workers) as executor:
+        outcomes = list(executor.map(_run_job, jobs))
+    return [ExportResult(job, elapsed, error)
+            for job, (elapsed, error) in zip(jobs, outcomes)]
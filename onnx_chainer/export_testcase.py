@@ -1,6 +1,7 @@
 import os
 
 import chainer
+from onnx.mapping import TENSOR_TYPE_TO_NP_TYPE
 
 from onnx_chainer.export import export
 from onnx_chainer.onnx_helper import cleanse_param_name
@@ -32,17 +33,27 @@ def export_testcase(model, args, out_dir, output_grad=False, **kwargs):
         model, args, filename=os.path.join(out_dir, 'model.onnx'),
         return_named_inout=True, **kwargs)
 
+    # Tensors are written in types of the graph, which differ from the
+    # Chainer model on float16 export
+    elem_types = {v.name: v.type.tensor_type.elem_type for v in
+                  list(onnx_model.graph.input) + list(onnx_model.graph.output)}
+
+    def to_graph_array(name, var):
+        array = chainer.cuda.to_cpu(var.array)
+        if name in elem_types:
+            array = array.astype(TENSOR_TYPE_TO_NP_TYPE[elem_types[name]],
+                                 copy=False)
+        return array
+
     test_data_dir = os.path.join(out_dir, 'test_data_set_0')
     os.makedirs(test_data_dir, exist_ok=True)
     for i, (name, var) in enumerate(inputs.items()):
         pb_name = os.path.join(test_data_dir, 'input_{}.pb'.format(i))
-        array = chainer.cuda.to_cpu(var.array)
-        write_tensor_pb(pb_name, name, array)
+        write_tensor_pb(pb_name, name, to_graph_array(name, var))
 
     for i, (name, var) in enumerate(outputs.items()):
         pb_name = os.path.join(test_data_dir, 'output_{}.pb'.format(i))
-        array = chainer.cuda.to_cpu(var.array)
-        write_tensor_pb(pb_name, name, array)
+        write_tensor_pb(pb_name, name, to_graph_array(name, var))
 
     if output_grad:
         # Perform backward computation
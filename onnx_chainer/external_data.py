@@ -0,0 +1,128 @@
+import os
+
+import chainer
+import numpy as np
+import onnx
+from onnx import numpy_helper
+from onnx.mapping import TENSOR_TYPE_TO_NP_TYPE
+
+from onnx_chainer import serialization
+
+
+class ExternalDataWriter(object):
+    """Writes payloads of tensors into files next to the ONNX model.
+
+    Each tensor larger than ``size_threshold`` is written to the current data
+    file as soon as it is converted, and the returned ``TensorProto`` holds
+    only its location, offset and length. So the ONNX model never has these
+    payloads in memory. Buffers of C-contiguous arrays are written directly
+    without intermediate copies.
+
+    Args:
+        model_path (str): The filename of the ONNX model. Data files are
+            created in the same directory.
+        size_threshold (int): Tensors whose byte size is smaller than this
+            value are kept in the ONNX model.
+        max_file_size (int): If set, payloads are split into multiple data
+            files so that each file does not exceed this byte size, except a
+            single tensor larger than it.
+    """
+
+    def __init__(self, model_path, size_threshold=1024, max_file_size=None):
+        self.base_dir = os.path.dirname(os.path.abspath(model_path))
+        self.base_location = os.path.basename(model_path) + '.data'
+        self.size_threshold = size_threshold
+        self.max_file_size = max_file_size
+        self.locations = []
+
+        self._fp = None
+        self._offset = 0
+
+    def _open_next(self):
+        self.close()
+        location = self.base_location
+        if self.locations:
+            location = '{}.{}'.format(location, len(self.locations))
+        self._fp = open(os.path.join(self.base_dir, location), 'wb')
+        self._offset = 0
+        self.locations.append(location)
+
+    def _write(self, array):
+        buf = serialization.as_buffer(array)
+        nbytes = len(buf)
+        if self._fp is None or (
+                self.max_file_size is not None and self._offset > 0 and
+                self._offset + nbytes > self.max_file_size):
+            self._open_next()
+        offset = self._offset
+        self._fp.write(buf)
+        self._offset += nbytes
+        return self.locations[-1], offset, nbytes
+
+    def make_tensor(self, array, name):
+        """Converts an array to a ``TensorProto``.
+
+        Args:
+            array (numpy.ndarray or cupy.ndarray): The tensor value.
+            name (str): The name of the tensor.
+
+        Returns:
+            ~onnx.TensorProto: The tensor whose payload is stored in the
+                data file, or stored inline when the array is small.
+        """
+        if array.dtype.kind == 'O' or array.nbytes < self.size_threshold:
+            return numpy_helper.from_array(chainer.cuda.to_cpu(array), name)
+
+        tensor = serialization.make_tensor_header(array, name)
+        location, offset, length = self._write(array)
+        tensor.data_location = onnx.TensorProto.EXTERNAL
+        for key, value in (('location', location), ('offset', offset),
+                           ('length', length)):
+            entry = tensor.external_data.add()
+            entry.key = key
+            entry.value = str(value)
+        return tensor
+
+    def externalize(self, tensor):
+        """Moves the payload of an inline ``TensorProto`` to the data file.
+
+        Args:
+            tensor (~onnx.TensorProto): The tensor, updated in place.
+        """
+        if tensor.data_location == onnx.TensorProto.EXTERNAL:
+            return
+        array = numpy_helper.to_array(tensor)
+        tensor.CopyFrom(self.make_tensor(array, tensor.name))
+
+    def close(self):
+        if self._fp is not None:
+            self._fp.close()
+            self._fp = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def read_external_tensor(tensor, base_dir):
+    """Reads the payload of a tensor stored in a data file.
+
+    Args:
+        tensor (~onnx.TensorProto): The tensor whose payload is external.
+        base_dir (str): The directory where the ONNX model is located.
+
+    Returns:
+        numpy.ndarray: The tensor value.
+    """
+    info = {entry.key: entry.value for entry in tensor.external_data}
+    dtype = TENSOR_TYPE_TO_NP_TYPE[tensor.data_type]
+    with open(os.path.join(base_dir, info['location']), 'rb') as fp:
+        fp.seek(int(info.get('offset', 0)))
+        if 'length' in info:
+            count = int(info['length']) // dtype.itemsize
+        else:
+            count = -1
+        array = np.fromfile(fp, dtype=dtype, count=count)
+    return array.reshape(tuple(tensor.dims))
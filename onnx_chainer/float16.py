@@ -0,0 +1,182 @@
+import warnings
+
+import numpy as np
+import onnx
+from onnx import helper
+from onnx import numpy_helper
+from onnx import TensorProto
+
+from onnx_chainer.optimizer import graph_utils
+
+
+# Operators computed in float32 on float16 export unless ``fp32_ops`` is
+# given, since they accumulate values over many elements or exponentiate
+DEFAULT_FP32_OPS = (
+    'LogSoftmax', 'LRN', 'ReduceL1', 'ReduceL2', 'ReduceLogSum',
+    'ReduceLogSumExp', 'ReduceMean', 'ReduceProd', 'ReduceSum',
+    'ReduceSumSquare', 'Softmax',
+)
+
+
+def validate_dtype(dtype):
+    """Returns True if the dtype requests float16 export."""
+    if dtype is None:
+        return False
+    try:
+        dtype = np.dtype(dtype)
+    except TypeError:
+        dtype = None
+    if dtype == np.float16:
+        return True
+    if dtype == np.float32:
+        return False
+    raise ValueError(
+        'dtype must be either \'float32\' or \'float16\', but \'{}\' was '
+        'given.'.format(dtype))
+
+
+def _cast_tensor(tensor):
+    if tensor.data_location == TensorProto.EXTERNAL:
+        raise ValueError(
+            'Tensor {} cannot be cast to float16 since its payload is in an '
+            'external file'.format(tensor.name))
+    array = numpy_helper.to_array(tensor).astype(np.float16)
+    tensor.CopyFrom(numpy_helper.from_array(array, tensor.name))
+
+
+def _convert_attributes(node):
+    for attr in node.attribute:
+        if attr.type == onnx.AttributeProto.TENSOR and\
+                attr.t.data_type == TensorProto.FLOAT:
+            _cast_tensor(attr.t)
+    if node.op_type == 'Cast' and\
+            graph_utils.get_attribute(node, 'to') == TensorProto.FLOAT:
+        graph_utils.set_attribute(node, 'to', TensorProto.FLOAT16)
+
+
+def _set_float16(value_infos, excluded=()):
+    for value_info in value_infos:
+        tensor_type = value_info.type.tensor_type
+        if tensor_type.elem_type == TensorProto.FLOAT and\
+                value_info.name not in excluded:
+            tensor_type.elem_type = TensorProto.FLOAT16
+
+
+def convert_float16(onnx_model, fp32_ops=None):
+    """Converts float tensors of the ONNX model to float16 in place.
+
+    Float initializers, constants and types of graph inputs, outputs and
+    intermediate values are converted to float16. Operators in ``fp32_ops``
+    are computed in float32, that is their float inputs and outputs are cast
+    by ``Cast`` nodes inserted around them. Consecutive float32 operators
+    share casted values, and initializers used only by them are kept in
+    float32.
+
+    Types of values are taken from shape inference of ONNX and types
+    declared in the graph. The first inputs of operators in ``fp32_ops``
+    and their outputs whose types are unknown, e.g. after operators of
+    custom domains, are regarded as float.
+
+    Args:
+        onnx_model (~onnx.ModelProto): The model, whose initializers must
+            have payloads in the model.
+        fp32_ops (list): Types of operators computed in float32. If
+            ``None``, :data:`DEFAULT_FP32_OPS` are used.
+
+    Returns:
+        ~onnx.ModelProto: The given model.
+    """
+    if fp32_ops is None:
+        fp32_ops = DEFAULT_FP32_OPS
+    fp32_ops = set(fp32_ops)
+    graph = onnx_model.graph
+    # Types are collected before the graph is rewritten
+    value_infos = graph_utils.infer_value_infos(onnx_model)
+    if not value_infos:
+        warnings.warn(
+            'Shape inference of ONNX failed on float16 conversion, so only '
+            'types declared in the graph are known. Data of float32 '
+            'operators of unknown types are regarded as float.')
+    elem_types = {}
+    for value_info in list(graph.input) + list(graph.value_info) +\
+            list(graph.output) + list(value_infos.values()):
+        elem_type = value_info.type.tensor_type.elem_type
+        if elem_type != TensorProto.UNDEFINED:
+            elem_types[value_info.name] = elem_type
+    initializers = graph_utils.get_initializers(graph)
+    for name, tensor in initializers.items():
+        elem_types[name] = tensor.data_type
+    for node in graph.node:
+        value = graph_utils.get_attribute(node, 'value')
+        if node.op_type == 'Constant' and value is not None:
+            elem_types[node.output[0]] = value.data_type
+    consumers = graph_utils.get_consumers(graph)
+    graph_outputs = graph_utils.get_graph_output_names(graph)
+
+    def is_float(name, default=False):
+        elem_type = elem_types.get(
+            name, TensorProto.FLOAT if default else TensorProto.UNDEFINED)
+        return elem_type == TensorProto.FLOAT
+
+    def is_used_in_fp16(name):
+        return name in graph_outputs or any(
+            node.op_type not in fp32_ops for node in consumers.get(name, []))
+
+    # Float32 versions of values keyed by their names
+    fp32_names = {}
+    for name, tensor in initializers.items():
+        if tensor.data_type != TensorProto.FLOAT:
+            continue
+        if name in consumers and not is_used_in_fp16(name):
+            fp32_names[name] = name
+        else:
+            _cast_tensor(tensor)
+    _set_float16(graph.input, excluded=fp32_names)
+    _set_float16(graph.output)
+    _set_float16(graph.value_info)
+
+    used_names = set(elem_types) | set(value_infos)
+    for node in graph.node:
+        used_names.update(node.output)
+
+    def make_fp32_name(name):
+        fp32_name = name + '_fp32'
+        i = 1
+        while fp32_name in used_names:
+            fp32_name = '{}_fp32_{}'.format(name, i)
+            i += 1
+        used_names.add(fp32_name)
+        return fp32_name
+
+    nodes = []
+    for node in graph.node:
+        if node.op_type not in fp32_ops:
+            _convert_attributes(node)
+            nodes.append(node)
+            continue
+        # Float32 operators take float data as the first input, while others
+        # are e.g. axes of reductions. Outputs are of the type of the data
+        is_float_data = bool(node.input) and is_float(node.input[0], True)
+        for i, name in enumerate(node.input):
+            if not name or not is_float(name, i == 0):
+                continue
+            if name not in fp32_names:
+                fp32_names[name] = make_fp32_name(name)
+                nodes.append(helper.make_node(
+                    'Cast', [name], [fp32_names[name]],
+                    to=TensorProto.FLOAT))
+            node.input[i] = fp32_names[name]
+        casts = []
+        for i, name in enumerate(node.output):
+            if not name or not is_float(name, is_float_data):
+                continue
+            fp32_names[name] = make_fp32_name(name)
+            node.output[i] = fp32_names[name]
+            if is_used_in_fp16(name):
+                casts.append(helper.make_node(
+                    'Cast', [fp32_names[name]], [name],
+                    to=TensorProto.FLOAT16))
+        nodes.append(node)
+        nodes.extend(casts)
+    graph_utils.set_nodes(graph, nodes)
+    return onnx_model
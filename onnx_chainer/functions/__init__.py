@@ -1,75 +1,86 @@
-from onnx_chainer.functions.activation import convert_ClippedReLU  # NOQA
-from onnx_chainer.functions.activation import convert_ELU  # NOQA
-from onnx_chainer.functions.activation import convert_HardSigmoid  # NOQA
-from onnx_chainer.functions.activation import convert_LeakyReLU  # NOQA
-from onnx_chainer.functions.activation import convert_LogSoftmax  # NOQA
-from onnx_chainer.functions.activation import convert_PReLUFunction  # NOQA
-from onnx_chainer.functions.activation import convert_ReLU  # NOQA
-from onnx_chainer.functions.activation import convert_Sigmoid  # NOQA
-from onnx_chainer.functions.activation import convert_Softmax  # NOQA
-from onnx_chainer.functions.activation import convert_Softplus  # NOQA
-from onnx_chainer.functions.activation import convert_Tanh  # NOQA
+import importlib
+import sys
+import types
 
-from onnx_chainer.functions.array import convert_Cast  # NOQA
-from onnx_chainer.functions.array import convert_Concat  # NOQA
-from onnx_chainer.functions.array import convert_Copy  # NOQA
-from onnx_chainer.functions.array import convert_Depth2Space  # NOQA
-from onnx_chainer.functions.array import convert_ExpandDims  # NOQA
-from onnx_chainer.functions.array import convert_GetItem  # NOQA
-from onnx_chainer.functions.array import convert_Pad  # NOQA
-from onnx_chainer.functions.array import convert_Reshape  # NOQA
-from onnx_chainer.functions.array import convert_Space2Depth  # NOQA
-from onnx_chainer.functions.array import convert_SplitAxis  # NOQA
-from onnx_chainer.functions.array import convert_Squeeze  # NOQA
-from onnx_chainer.functions.array import convert_Tile  # NOQA
-from onnx_chainer.functions.array import convert_Transpose  # NOQA
-from onnx_chainer.functions.array import convert_Where  # NOQA
 
-from onnx_chainer.functions.connection import convert_Convolution2DFunction  # NOQA
-from onnx_chainer.functions.connection import convert_ConvolutionND  # NOQA
-from onnx_chainer.functions.connection import convert_Deconvolution2DFunction  # NOQA
-from onnx_chainer.functions.connection import convert_DeconvolutionND  # NOQA
-from onnx_chainer.functions.connection import convert_EmbedIDFunction  # NOQA
-from onnx_chainer.functions.connection import convert_LinearFunction  # NOQA
+# Names of Chainer functions keyed by modules defining their converters
+_converter_names = {
+    'activation': (
+        'ClippedReLU', 'ELU', 'HardSigmoid', 'LeakyReLU', 'LogSoftmax',
+        'PReLUFunction', 'ReLU', 'Sigmoid', 'Softmax', 'Softplus', 'Tanh',
+    ),
+    'array': (
+        'Cast', 'Concat', 'Copy', 'Depth2Space', 'ExpandDims', 'GetItem',
+        'Pad', 'Permutate', 'Reshape', 'Space2Depth', 'SplitAxis', 'Squeeze',
+        'Tile', 'Transpose', 'TransposeSequence', 'Where',
+    ),
+    'connection': (
+        'Convolution2DFunction', 'ConvolutionND', 'Deconvolution2DFunction',
+        'DeconvolutionND', 'EmbedIDFunction', 'LinearFunction',
+    ),
+    'loss': (
+        'SoftmaxCrossEntropy',
+    ),
+    'math': (
+        'Absolute', 'Add', 'AddConstant', 'BroadcastTo', 'Clip', 'Div', 'Exp',
+        'Identity', 'LinearInterpolate', 'LogSumExp', 'MatMul', 'Max',
+        'Maximum', 'Mean', 'Min', 'Minimum', 'Mul', 'MulConstant', 'Neg',
+        'PowVarConst', 'Prod', 'Sqrt', 'Square', 'Sub', 'Sum',
+    ),
+    'noise': (
+        'Dropout',
+    ),
+    'normalization': (
+        'BatchNormalization', 'FixedBatchNormalization',
+        'LocalResponseNormalization', 'NormalizeL2',
+    ),
+    'pooling': (
+        'AveragePooling2D', 'AveragePoolingND', 'MaxPooling2D',
+        'MaxPoolingND', 'ROIPooling2D', 'Unpooling2D',
+    ),
+    'rnn': (
+        'NStepBiGRU', 'NStepBiLSTM', 'NStepBiRNNReLU', 'NStepBiRNNTanh',
+        'NStepGRU', 'NStepLSTM', 'NStepRNNReLU', 'NStepRNNTanh',
+    ),
+}
 
-from onnx_chainer.functions.loss import convert_SoftmaxCrossEntropy  # NOQA
+_converter_modules = {name: module
+                      for module, names in _converter_names.items()
+                      for name in names}
 
-from onnx_chainer.functions.math import convert_Absolute  # NOQA
-from onnx_chainer.functions.math import convert_Add  # NOQA
-from onnx_chainer.functions.math import convert_AddConstant  # NOQA
-from onnx_chainer.functions.math import convert_BroadcastTo  # NOQA
-from onnx_chainer.functions.math import convert_Clip  # NOQA
-from onnx_chainer.functions.math import convert_Div  # NOQA
-from onnx_chainer.functions.math import convert_Exp  # NOQA
-from onnx_chainer.functions.math import convert_Identity  # NOQA
-from onnx_chainer.functions.math import convert_LinearInterpolate  # NOQA
-from onnx_chainer.functions.math import convert_LogSumExp  # NOQA
-from onnx_chainer.functions.math import convert_MatMul  # NOQA
-from onnx_chainer.functions.math import convert_Max  # NOQA
-from onnx_chainer.functions.math import convert_Maximum  # NOQA
-from onnx_chainer.functions.math import convert_Mean  # NOQA
-from onnx_chainer.functions.math import convert_Min  # NOQA
-from onnx_chainer.functions.math import convert_Minimum  # NOQA
-from onnx_chainer.functions.math import convert_Mul  # NOQA
-from onnx_chainer.functions.math import convert_MulConstant  # NOQA
-from onnx_chainer.functions.math import convert_Neg  # NOQA
-from onnx_chainer.functions.math import convert_PowVarConst  # NOQA
-from onnx_chainer.functions.math import convert_Prod  # NOQA
-from onnx_chainer.functions.math import convert_Sqrt  # NOQA
-from onnx_chainer.functions.math import convert_Square  # NOQA
-from onnx_chainer.functions.math import convert_Sub  # NOQA
-from onnx_chainer.functions.math import convert_Sum  # NOQA
 
-from onnx_chainer.functions.noise import convert_Dropout  # NOQA
+def _import_converter(name):
+    """Imports the module defining the converter of the function name.
 
-from onnx_chainer.functions.normalization import convert_BatchNormalization  # NOQA
-from onnx_chainer.functions.normalization import convert_FixedBatchNormalization  # NOQA
-from onnx_chainer.functions.normalization import convert_LocalResponseNormalization  # NOQA
-from onnx_chainer.functions.normalization import convert_NormalizeL2  # NOQA
+    The converter is also set to this module as ``convert_<name>``.
+    """
+    module = importlib.import_module(
+        'onnx_chainer.functions.' + _converter_modules[name])
+    converter = getattr(module, 'convert_' + name)
+    globals()['convert_' + name] = converter
+    return converter
 
-from onnx_chainer.functions.pooling import convert_AveragePooling2D  # NOQA
-from onnx_chainer.functions.pooling import convert_AveragePoolingND  # NOQA
-from onnx_chainer.functions.pooling import convert_MaxPooling2D  # NOQA
-from onnx_chainer.functions.pooling import convert_MaxPoolingND  # NOQA
-from onnx_chainer.functions.pooling import convert_ROIPooling2D  # NOQA
-from onnx_chainer.functions.pooling import convert_Unpooling2D  # NOQA
+
+class _ConverterModule(types.ModuleType):
+
+    """This module, whose converters are imported on the first lookup.
+
+    Modules of converters are imported by lookups of ``convert_<name>``
+    attributes, e.g. by ``mapping.converters``. The class of the module is
+    replaced instead of defining ``__getattr__`` of the module, which
+    requires Python 3.7.
+    """
+
+    def __getattr__(self, name):
+        if name.startswith('convert_') and\
+                name[len('convert_'):] in _converter_modules:
+            return _import_converter(name[len('convert_'):])
+        raise AttributeError(
+            'module {!r} has no attribute {!r}'.format(__name__, name))
+
+    def __dir__(self):
+        return sorted(set(super(_ConverterModule, self).__dir__()) |
+                      {'convert_' + name for name in _converter_modules})
+
+
+sys.modules[__name__].__class__ = _ConverterModule
@@ -72,6 +72,10 @@ def convert_Depth2Space(func, opset_version, input_names,
     ),
 
 
+# Slice clamps indices, so this is the end of any axis of unknown length
+_INT64_MAX = np.iinfo(np.int64).max
+
+
 def convert_GetItem(func, opset_version, input_names,
                     num_outputs, context, parameters):
     x = func.inputs[0]
@@ -89,7 +93,12 @@ def convert_GetItem(func, opset_version, input_names,
                     'Slice operator'.format(idx.step))
             axes.append(axis)
             starts.append(0 if idx.start is None else idx.start)
-            ends.append(x.shape[axis] if idx.stop is None else idx.stop)
+            if idx.stop is not None:
+                ends.append(idx.stop)
+            elif context.dynamic_shape:
+                ends.append(_INT64_MAX)
+            else:
+                ends.append(x.shape[axis])
         elif isinstance(idx, int):
             axes.append(axis)
             starts.append(idx)
@@ -116,7 +125,7 @@ def convert_GetItem(func, opset_version, input_names,
                 'GetItem with type {} cannot handle in ONNX Slice, so that '
                 'ONNX-Chainer does not accept the type'.format(type(idx)))
 
-    gb = onnx_helper.GraphBuilder()
+    gb = onnx_helper.GraphBuilder(context.name_generator)
     output = gb.op('Slice', input_names,
                    axes=axes, starts=starts, ends=ends)
 
@@ -190,16 +199,38 @@ def convert_Pad(func, opset_version, input_names, num_outputs,
     return node,
 
 
+def _get_dynamic_reshape_shape(in_shape, shape):
+    """Returns the shape of Reshape which does not depend on the batch size.
+
+    Leading dimensions which are the same as the input are replaced by 0,
+    which copies the dimension of the input. Otherwise the first dimension
+    is inferred from the others.
+    """
+    shape = list(shape)
+    n_copied = 0
+    while n_copied < min(len(in_shape), len(shape)) and\
+            shape[n_copied] == in_shape[n_copied]:
+        shape[n_copied] = 0
+        n_copied += 1
+    if n_copied == 0 and shape and -1 not in shape:
+        shape[0] = -1
+    return shape
+
+
 @support((1, 5))
 def convert_Reshape(func, opset_version, input_names,
                     num_outputs, context, parameters):
+    shape = list(func.shape)
+    if context.dynamic_shape:
+        shape = _get_dynamic_reshape_shape(func.inputs[0].shape, shape)
+
     if opset_version == 1:
         return onnx_helper.make_node(
             'Reshape', input_names, num_outputs,
-            shape=func.shape
+            shape=shape
         ),
     elif opset_version == 5:
-        shape = np.asarray(list(func.shape), dtype=np.int64)
+        shape = np.asarray(shape, dtype=np.int64)
         shape_param = chainer.Parameter(shape)
         parameters.append(shape_param)
         input_names.append(context.get_name(shape_param))
@@ -301,6 +332,44 @@ def convert_Transpose(func, opset_version, input_names,
     return node,
 
 
+def convert_TransposeSequence(func, opset_version, input_names,
+                              num_outputs, context, parameters):
+    # Rows of inputs are concatenated, gathered in the transposed order and
+    # split into outputs, as the CUDA kernel of Chainer does
+    sizes = [x.shape[0] for x in func.inputs]
+    offsets = np.cumsum([0] + sizes[:-1])
+    indices = []
+    split = []
+    for j in range(num_outputs):
+        rows = [offset + j for size, offset in zip(sizes, offsets)
+                if size > j]
+        indices.extend(rows)
+        split.append(len(rows))
+    indices_param = chainer.Parameter(np.array(indices, dtype=np.int64))
+    parameters.append(indices_param)
+
+    gb = onnx_helper.GraphBuilder(context.name_generator)
+    x = gb.op('Concat', input_names, axis=0)
+    x = gb.op('Gather', [x, context.get_name(indices_param)], axis=0)
+    gb.op('Split', [x], num_outputs, axis=0, split=split)
+    return gb.nodes()
+
+
+def convert_Permutate(func, opset_version, input_names, num_outputs,
+                      context, parameters):
+    indices = chainer.cuda.to_cpu(func.indices)
+    if func.inv:
+        indices = np.argsort(indices)
+    axis = func.axis
+    if axis < 0:
+        axis += len(func.inputs[0].shape)
+    indices_param = chainer.Parameter(indices.astype(np.int64))
+    parameters.append(indices_param)
+    return onnx_helper.make_node(
+        'Gather', [input_names[0], context.get_name(indices_param)],
+        num_outputs, axis=axis),
+
+
 def convert_ExpandDims(func, opset_version, input_names,
                        num_outputs, context, parameters):
     axis = func.axis
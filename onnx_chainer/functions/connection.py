@@ -53,13 +53,26 @@ def convert_ConvolutionND(func, opset_version, input_names,
 def convert_Deconvolution2DFunction(func, opset_version,
                                     input_names, num_outputs, context,
                                     parameters):
+    kwargs = {}
+    if context.dynamic_shape:
+        # The output size is given by the padding to the minimum size,
+        # which does not depend on the input size
+        in_h, in_w = func.inputs[0].shape[2:]
+        kh, kw = func.inputs[1].shape[2:]
+        kh = getattr(func, 'dy', 1) * (kh - 1) + 1
+        kw = getattr(func, 'dx', 1) * (kw - 1) + 1
+        kwargs['output_padding'] = (
+            func.outh - (func.sy * (in_h - 1) + kh - 2 * func.ph),
+            func.outw - (func.sx * (in_w - 1) + kw - 2 * func.pw))
+    else:
+        kwargs['output_shape'] = (func.outh, func.outw)
     return onnx_helper.make_node(
         'ConvTranspose', input_names, num_outputs,
         kernel_shape=func.inputs[1].shape[2:],
-        output_shape=(func.outh, func.outw),
         # pads: [x1_begin, x2_begin...x1_end, x2_end,...]
         pads=(func.ph, func.pw, func.ph, func.pw),
         strides=(func.sy, func.sx),
+        **kwargs
     ),
 
 
@@ -96,11 +109,18 @@ def convert_EmbedIDFunction(func, opset_version, input_names,
         'Gather', input_names, num_outputs, axis=0),
 
 
-@support((1, 6, 7))
+@support((1, 6, 7, 11))
 def convert_LinearFunction(func, opset_version, input_names,
                            num_outputs, context, parameters):
-    # When the func has bias
+    # When the func has no bias
     if len(func.inputs) == 2:
+        if opset_version >= 11:
+            # The input C of Gemm is optional since opset version 11
+            return onnx_helper.make_node(
+                'Gemm', input_names, num_outputs,
+                alpha=1.0, beta=1.0, transA=0, transB=1),
+        # A Transpose of the weight would not be connected from inputs, so
+        # Gemm takes a zero bias
         bias_dim = func.inputs[1].shape[0]
         bias = np.zeros((bias_dim,), dtype=func.inputs[0].dtype)
         bias_param = chainer.Parameter(bias)
@@ -111,7 +131,7 @@ def convert_LinearFunction(func, opset_version, input_names,
         return onnx_helper.make_node(
             'Gemm', input_names, num_outputs,
             alpha=1.0, beta=1.0, broadcast=1, transA=0, transB=1),
-    elif opset_version == 7:
+    elif opset_version == 7 or opset_version == 11:
         return onnx_helper.make_node(
             'Gemm', input_names, num_outputs,
             alpha=1.0, beta=1.0, transA=0, transB=1),
@@ -30,10 +30,14 @@ def convert_SoftmaxCrossEntropy(
             'argument parameters are default setting.')
 
     # create intermediate values
-    gb = onnx_helper.GraphBuilder()
+    gb = onnx_helper.GraphBuilder(context.name_generator)
     x, t = input_names
     y_log = gb.op('LogSoftmax', [x])
-    depth = gb.const(np.array([x_var.shape[1]], dtype=np.int32))
+    if context.dynamic_shape:
+        depth = gb.op('Gather', [gb.op('Shape', [x]),
+                                 gb.const(np.array([1], dtype=np.int64))])
+    else:
+        depth = gb.const(np.array([x_var.shape[1]], dtype=np.int32))
     zeroone = gb.const(np.array([0, 1], dtype=x_var.dtype))
     th = gb.op('OneHot', [t, depth, zeroone])
     s0 = gb.op('Mul', [y_log, th])
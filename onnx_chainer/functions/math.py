@@ -140,23 +140,24 @@ def convert_Identity(func, opset_version, input_names,
     return onnx_helper.make_node('Identity', input_names, num_outputs),
 
 
-@support((1, 6, 7))
+def _transpose_last_two_axes(gb, name, ndim):
+    perm = list(range(ndim - 2)) + [ndim - 1, ndim - 2]
+    return gb.op('Transpose', [name], perm=perm)
+
+
 def convert_MatMul(func, opset_version, input_names,
                    num_outputs, context, parameters):
-    bias_shape = (
-        func.inputs[0].shape[-1] if func.transa else func.inputs[0].shape[-2],
-        func.inputs[1].shape[-2] if func.transb else func.inputs[1].shape[-1]
-    )
-    bias_tensor = np.zeros(bias_shape, dtype=func.inputs[0].dtype)
-    bias_param = chainer.Parameter(bias_tensor)
-    parameters.append(bias_param)
-    input_names.append(context.get_name(bias_param))
-
-    return onnx_helper.make_node(
-        'Gemm', input_names, num_outputs,
-        transA=func.transa,
-        transB=func.transb
-    ),
+    gb = onnx_helper.GraphBuilder(context.name_generator)
+    a, b = input_names
+    ndim_a = len(func.inputs[0].shape)
+    ndim_b = len(func.inputs[1].shape)
+    # Only matrices are transposed, vectors are used as they are
+    if func.transa and ndim_a >= 2:
+        a = _transpose_last_two_axes(gb, a, ndim_a)
+    if func.transb and ndim_b >= 2:
+        b = _transpose_last_two_axes(gb, b, ndim_b)
+    gb.op('MatMul', [a, b], num_outputs)
+    return gb.nodes()
 
 
 @support((1, 6, 8))
@@ -259,7 +260,7 @@ def convert_LinearInterpolate(func, opset_version, input_names,
     kwargs = {'consumed_inputs': [1, 1]} if opset_version == 1 else {}
     kwargs2 = {} if opset_version >= 7 else {'broadcast': 1}
 
-    gb = onnx_helper.GraphBuilder()
+    gb = onnx_helper.GraphBuilder(context.name_generator)
     p, x, y = input_names
     n1 = gb.op('Sub', [context.get_name(one), p], **kwargs, **kwargs2)
     n2 = gb.op('Mul', [p, x], **kwargs)
@@ -1,3 +1,7 @@
+import bisect
+import functools
+
+
 def support(opset_versions):
     """Detect lowest supported version of the target converter
 
@@ -20,26 +24,45 @@ def support(opset_versions):
     >>> own_converter(None, 5)
     RuntimeError: ONNX-Chainer cannot convert ...(snip)
 
+    The version used for a requested opset version is resolved once and
+    cached, since all nodes of an export request the same one. The wrapped
+    function has ``opset_versions``, the sorted tuple of the versions, and
+    ``resolve_opset_version``, which returns the version used for the
+    requested one or ``None`` if it is not supported.
+
     Arguments:
         opset_versions (tuple): Tuple of opset versions.
 
     """
 
     def _wrapper(func):
+        versions = None
+        if opset_versions is not None:
+            versions = tuple(sorted(opset_versions))
+        resolved = {}
+
+        def resolve_opset_version(opset_version):
+            if versions is None:
+                return opset_version
+            if opset_version not in resolved:
+                i = bisect.bisect_right(versions, opset_version)
+                resolved[opset_version] = versions[i - 1] if i else None
+            return resolved[opset_version]
+
+        @functools.wraps(func)
         def _func_with_lower_opset_version(*args, **kwargs):
-            if opset_versions is None:
+            if versions is None:
                 return func(*args, **kwargs)
-            opset_version = args[1]
-            for opver in sorted(opset_versions, reverse=True):
-                if opver <= opset_version:
-                    break
-            if opver > opset_version:
+            opset_version = resolve_opset_version(args[1])
+            if opset_version is None:
                 func_name = args[0].__class__.__name__
                 raise RuntimeError(
                     'ONNX-Chainer cannot convert `{}` of Chainer with ONNX '
                     'opset_version {}'.format(
-                        func_name, opset_version))
-            opset_version = opver
+                        func_name, args[1]))
             return func(args[0], opset_version, *args[2:], **kwargs)
+        _func_with_lower_opset_version.opset_versions = versions
+        _func_with_lower_opset_version.resolve_opset_version =\
+            resolve_opset_version
         return _func_with_lower_opset_version
     return _wrapper
@@ -0,0 +1,105 @@
+import chainer
+import numpy as np
+
+from onnx_chainer.functions.opset_version import support
+from onnx_chainer import onnx_helper
+
+
+# Orders of weights of Chainer in gates of ONNX, for input and recurrent
+# connections
+_gate_orders = {
+    # Chainer: i, f, a, o; ONNX: i, o, f, c
+    'lstm': ([0, 3, 1, 2], [4, 7, 5, 6]),
+    # Chainer: r, z, h; ONNX: z, r, h
+    'gru': ([1, 0, 2], [4, 3, 5]),
+    'rnn': ([0], [1]),
+}
+
+
+def _get_array(node):
+    var = node.get_variable_or_none()
+    if var is None or var.array is None:
+        raise ValueError(
+            'Weights of N-step RNN functions must be parameters or arrays '
+            'given to the function')
+    return chainer.cuda.to_cpu(var.array)
+
+
+def _pack(ws, order):
+    """Concatenates weights in the gate order and stacks directions."""
+    return np.stack([np.concatenate([_get_array(ws_d[i]) for i in order])
+                     for ws_d in ws])
+
+
+def _add_parameter(context, parameters, array):
+    param = chainer.Parameter(array)
+    parameters.append(param)
+    return context.get_name(param)
+
+
+def _pad_sequence(gb, func, names):
+    """Makes the padded input of ``(T, B, I)`` shape from time steps."""
+    batch_size = func.batch_sizes[0]
+    padded = []
+    for name, size in zip(names, func.batch_sizes):
+        if size < batch_size:
+            name = gb.op('Pad', [name], mode='constant',
+                         pads=[0, 0, batch_size - size, 0], value=0.)
+        padded.append(gb.op('Unsqueeze', [name], axes=[0]))
+    if len(padded) == 1:
+        return padded[0]
+    return gb.op('Concat', padded, axis=0)
+
+
+@support((7,))
+def convert_NStepRNN(func, opset_version, input_names, num_outputs,
+                     context, parameters):
+    gb = onnx_helper.GraphBuilder(context.name_generator)
+    h, c, _, _, xs = func.unpack_inputs(input_names)
+    _, _, ws, bs, _ = func.unpack_inputs(func.inputs)
+    n_hidden = ws[0][0].shape[0]
+
+    x = xs[0] if func.padded else _pad_sequence(gb, func, xs)
+    # Weights are packed into new constants, and original parameters are
+    # not exported since no node refers them
+    w_order, r_order = _gate_orders[func.rnn_mode]
+    w = _add_parameter(context, parameters, _pack(ws, w_order))
+    r = _add_parameter(context, parameters, _pack(ws, r_order))
+    b = _add_parameter(context, parameters, _pack(bs, w_order + r_order))
+
+    sequence_lens = ''
+    lengths = func.lengths
+    if any(length != lengths[0] for length in lengths):
+        sequence_lens = _add_parameter(
+            context, parameters, np.array(lengths, dtype=np.int32))
+
+    inputs = [x, w, r, b, sequence_lens, h or '']
+    kwargs = {'hidden_size': n_hidden}
+    if func.use_bi_direction:
+        kwargs['direction'] = 'bidirectional'
+    if func.rnn_mode == 'lstm':
+        op_type = 'LSTM'
+        inputs.append(c or '')
+    elif func.rnn_mode == 'gru':
+        op_type = 'GRU'
+        # The reset gate is applied after multiplying the recurrent weight
+        kwargs['linear_before_reset'] = 1
+    else:
+        op_type = 'RNN'
+        activation = {'tanh': 'Tanh', 'relu': 'Relu'}[func.activation]
+        kwargs['activations'] = [activation] * func.n_directions
+    # Omitted optional inputs at the end are removed
+    while not inputs[-1]:
+        inputs.pop()
+    gb.op(op_type, inputs, num_outputs, **kwargs)
+    return gb.nodes()
+
+
+convert_NStepLSTM = convert_NStepRNN
+convert_NStepBiLSTM = convert_NStepRNN
+convert_NStepGRU = convert_NStepRNN
+convert_NStepBiGRU = convert_NStepRNN
+convert_NStepRNNTanh = convert_NStepRNN
+convert_NStepBiRNNTanh = convert_NStepRNN
+convert_NStepRNNReLU = convert_NStepRNN
+convert_NStepBiRNNReLU = convert_NStepRNN
@@ -0,0 +1,395 @@
+import contextlib
+import sys
+import threading
+
+import chainer
+from chainer import backend
+import chainer.functions as F
+
+
+class _NStepRNNLayer(chainer.FunctionNode):
+
+    """A layer of N-step RNN functions traced as a single function.
+
+    Inputs are the initial hidden state, the initial cell state of LSTM,
+    weights and biases of all directions flattened, and the input. The input
+    is either a list of arrays of time steps as N-step functions of Chainer
+    take, or a padded array of ``(T, B, I)`` shape. Outputs are the same as
+    ONNX ``LSTM``, ``GRU`` and ``RNN`` operators, that is the padded output
+    of ``(T, D, B, H)`` shape, the last hidden state of ``(D, B, H)`` shape
+    and the last cell state of LSTM, where ``D`` is the number of
+    directions.
+
+    The computation is delegated to the original N-step function of Chainer,
+    without dropout since ONNX operators do not have it.
+    """
+
+    rnn_mode = None
+    use_bi_direction = False
+    activation = None
+
+    def __init__(self, batch_sizes, padded, has_h, has_c, n_weights):
+        self.batch_sizes = tuple(batch_sizes)
+        self.padded = padded
+        self.has_h = has_h
+        self.has_c = has_c
+        self.n_weights = n_weights
+
+    @property
+    def n_directions(self):
+        return 2 if self.use_bi_direction else 1
+
+    @property
+    def lengths(self):
+        """Lengths of sequences in the batch."""
+        return [sum(1 for size in self.batch_sizes if size > i)
+                for i in range(self.batch_sizes[0])]
+
+    def unpack_inputs(self, inputs):
+        """Splits inputs into states, weights, biases and the input."""
+        inputs = list(inputs)
+        h = inputs.pop(0) if self.has_h else None
+        c = inputs.pop(0) if self.has_c else None
+        n = self.n_weights * self.n_directions
+        ws = [inputs[i * self.n_weights:(i + 1) * self.n_weights]
+              for i in range(self.n_directions)]
+        bs = [inputs[n + i * self.n_weights:n + (i + 1) * self.n_weights]
+              for i in range(self.n_directions)]
+        return h, c, ws, bs, inputs[2 * n:]
+
+    def forward(self, inputs):
+        xp = backend.get_array_module(*inputs)
+        self._input_specs = [(x.shape, x.dtype) for x in inputs]
+        h, c, ws, bs, xs = self.unpack_inputs(inputs)
+        if self.padded:
+            xs = [xs[0][t, :size] for t, size in enumerate(self.batch_sizes)]
+        n_hidden = ws[0][0].shape[0]
+        shape = (self.n_directions, self.batch_sizes[0], n_hidden)
+        dtype = xs[0].dtype
+        if h is None:
+            h = xp.zeros(shape, dtype=dtype)
+        if c is None and self.rnn_mode == 'lstm':
+            c = xp.zeros(shape, dtype=dtype)
+
+        with chainer.no_backprop_mode(), _original_functions():
+            if self.rnn_mode == 'lstm':
+                fn = F.n_step_bilstm if self.use_bi_direction\
+                    else F.n_step_lstm
+                hy, cy, ys = fn(1, 0., h, c, ws, bs, xs)
+            elif self.rnn_mode == 'gru':
+                fn = F.n_step_bigru if self.use_bi_direction\
+                    else F.n_step_gru
+                hy, ys = fn(1, 0., h, ws, bs, xs)
+            else:
+                fn = F.n_step_birnn if self.use_bi_direction\
+                    else F.n_step_rnn
+                hy, ys = fn(1, 0., h, ws, bs, xs, activation=self.activation)
+
+        # Outputs of directions are concatenated by Chainer
+        y = xp.zeros((len(ys),) + shape, dtype=dtype)
+        for t, y_t in enumerate(ys):
+            size = len(y_t)
+            y[t, :, :size] = y_t.array.reshape(
+                size, self.n_directions, n_hidden).transpose(1, 0, 2)
+        if self.rnn_mode == 'lstm':
+            return y, hy.array, cy.array
+        return y, hy.array
+
+    def backward(self, indexes, grad_outputs):
+        # Gradients are not computed, but zeros are returned so that the
+        # backward computation reaches functions before this one
+        xp = backend.get_array_module(*[g for g in grad_outputs
+                                        if g is not None])
+        return tuple(
+            chainer.Variable(xp.zeros(*self._input_specs[i]))
+            for i in indexes)
+
+
+class NStepLSTM(_NStepRNNLayer):
+    rnn_mode = 'lstm'
+
+
+class NStepBiLSTM(_NStepRNNLayer):
+    rnn_mode = 'lstm'
+    use_bi_direction = True
+
+
+class NStepGRU(_NStepRNNLayer):
+    rnn_mode = 'gru'
+
+
+class NStepBiGRU(_NStepRNNLayer):
+    rnn_mode = 'gru'
+    use_bi_direction = True
+
+
+class NStepRNNTanh(_NStepRNNLayer):
+    rnn_mode = 'rnn'
+    activation = 'tanh'
+
+
+class NStepBiRNNTanh(_NStepRNNLayer):
+    rnn_mode = 'rnn'
+    use_bi_direction = True
+    activation = 'tanh'
+
+
+class NStepRNNReLU(_NStepRNNLayer):
+    rnn_mode = 'rnn'
+    activation = 'relu'
+
+
+class NStepBiRNNReLU(_NStepRNNLayer):
+    rnn_mode = 'rnn'
+    use_bi_direction = True
+    activation = 'relu'
+
+
+_layer_classes = {
+    ('lstm', False, None): NStepLSTM,
+    ('lstm', True, None): NStepBiLSTM,
+    ('gru', False, None): NStepGRU,
+    ('gru', True, None): NStepBiGRU,
+    ('rnn', False, 'tanh'): NStepRNNTanh,
+    ('rnn', True, 'tanh'): NStepBiRNNTanh,
+    ('rnn', False, 'relu'): NStepRNNReLU,
+    ('rnn', True, 'relu'): NStepBiRNNReLU,
+}
+
+
+def _get_leaves(node):
+    """Returns variable nodes of leaves the variable node is computed from."""
+    leaves = []
+    nodes = [node]
+    seen = set()
+    while nodes:
+        node = nodes.pop()
+        if id(node) in seen:
+            continue
+        seen.add(id(node))
+        if node.creator_node is None:
+            leaves.append(node)
+        else:
+            nodes.extend(node.creator_node.inputs)
+    return leaves
+
+
+def _prepare_state(state):
+    """Returns the initial state to be given to fused layers and its leaves.
+
+    ONNX operators start from zeros if the initial state is omitted, so a
+    state of zeros is dropped unless it is computed from inputs of the
+    network or parameters, e.g. zeros made by N-step links. Leaves of other
+    states are returned to be kept alive, since arrays given to the
+    functions are exported as constants only while they are referred.
+    """
+    if state is None:
+        return None, []
+    state = chainer.as_variable(state)
+    leaves = _get_leaves(state.node)
+    input_ids = getattr(_thread_local, 'input_ids', ())
+    if not state.array.any() and not any(
+            id(leaf) in input_ids or
+            isinstance(leaf.get_variable_or_none(), chainer.Parameter)
+            for leaf in leaves):
+        return None, []
+    variables = [leaf.get_variable_or_none() for leaf in leaves]
+    return state, [v for v in variables if v is not None]
+
+
+def _n_step_rnn(rnn_mode, use_bi_direction, n_layers, hx, cx, ws, bs, xs,
+                activation=None):
+    layer_class = _layer_classes[(rnn_mode, use_bi_direction, activation)]
+    hx, h_leaves = _prepare_state(hx)
+    cx, c_leaves = _prepare_state(cx)
+    n_directions = 2 if use_bi_direction else 1
+    batch_sizes = [len(x) for x in xs]
+    inputs = list(xs)
+    padded = False
+    hys = []
+    cys = []
+    for layer in range(n_layers):
+        states = []
+        for state in (hx, cx):
+            if state is None:
+                continue
+            if n_layers > 1:
+                state = state[layer * n_directions:(layer + 1) * n_directions]
+            states.append(state)
+        begin = layer * n_directions
+        layer_ws = [w for ws_i in ws[begin:begin + n_directions]
+                    for w in ws_i]
+        layer_bs = [b for bs_i in bs[begin:begin + n_directions]
+                    for b in bs_i]
+        node = layer_class(batch_sizes, padded, hx is not None,
+                           cx is not None, len(ws[0]))
+        node._leaves = h_leaves + c_leaves
+        outputs = node.apply(states + layer_ws + layer_bs + inputs)
+        hys.append(outputs[1])
+        if rnn_mode == 'lstm':
+            cys.append(outputs[2])
+        # (T, D, B, H) -> (T, B, D * H)
+        y = outputs[0]
+        length, _, batch_size, n_hidden = y.shape
+        y = F.reshape(F.transpose(y, (0, 2, 1, 3)),
+                      (length, batch_size, n_directions * n_hidden))
+        inputs = [y]
+        padded = True
+
+    hy = hys[0] if n_layers == 1 else F.concat(hys, axis=0)
+    ys = [y[t, :size] for t, size in enumerate(batch_sizes)]
+    if rnn_mode == 'lstm':
+        cy = cys[0] if n_layers == 1 else F.concat(cys, axis=0)
+        return hy, cy, ys
+    return hy, ys
+
+
+_thread_local = threading.local()
+_patch_lock = threading.Lock()
+_originals = {}
+_replaced = {}
+_n_contexts = 0
+
+
+def _is_active():
+    return getattr(_thread_local, 'active', False)
+
+
+def _is_fused(dropout_ratio, kwargs):
+    # Calls with arguments the fused layers do not know are left to the
+    # original functions, which reject them
+    if kwargs or not _is_active():
+        return False
+    if chainer.config.train and dropout_ratio > 0:
+        raise ValueError(
+            'N-step RNN functions with dropout cannot be exported on train '
+            'mode, since ONNX RNN operators do not have dropout. Set '
+            'dropout_ratio to 0 or export on test mode.')
+    return True
+
+
+@contextlib.contextmanager
+def _set_active(active):
+    previous = _is_active()
+    _thread_local.active = active
+    try:
+        yield
+    finally:
+        _thread_local.active = previous
+
+
+def _original_functions():
+    return _set_active(False)
+
+
+def _make_lstm(name, use_bi_direction):
+    def fn(n_layers, dropout_ratio, hx, cx, ws, bs, xs, **kwargs):
+        if not _is_fused(dropout_ratio, kwargs):
+            return _originals[name](
+                n_layers, dropout_ratio, hx, cx, ws, bs, xs, **kwargs)
+        return _n_step_rnn('lstm', use_bi_direction, n_layers, hx, cx, ws,
+                           bs, xs)
+    return fn
+
+
+def _make_gru(name, use_bi_direction):
+    def fn(n_layers, dropout_ratio, hx, ws, bs, xs, **kwargs):
+        if not _is_fused(dropout_ratio, kwargs):
+            return _originals[name](
+                n_layers, dropout_ratio, hx, ws, bs, xs, **kwargs)
+        return _n_step_rnn('gru', use_bi_direction, n_layers, hx, None, ws,
+                           bs, xs)
+    return fn
+
+
+def _make_rnn(name, use_bi_direction):
+    def fn(n_layers, dropout_ratio, hx, ws, bs, xs, activation='tanh',
+           **kwargs):
+        if not _is_fused(dropout_ratio, kwargs):
+            return _originals[name](
+                n_layers, dropout_ratio, hx, ws, bs, xs,
+                activation=activation, **kwargs)
+        return _n_step_rnn('rnn', use_bi_direction, n_layers, hx, None, ws,
+                           bs, xs, activation=activation)
+    return fn
+
+
+# Makers of replacements of N-step functions keyed by function names
+_replacements = {
+    'n_step_lstm': (_make_lstm, False),
+    'n_step_bilstm': (_make_lstm, True),
+    'n_step_gru': (_make_gru, False),
+    'n_step_bigru': (_make_gru, True),
+    'n_step_rnn': (_make_rnn, False),
+    'n_step_birnn': (_make_rnn, True),
+}
+
+
+def _get_module(function):
+    # Links call the functions through the modules defining them, which
+    # differ among versions of Chainer
+    return sys.modules[function.__module__]
+
+
+def _install():
+    global _n_contexts
+    with _patch_lock:
+        _n_contexts += 1
+        if _n_contexts > 1:
+            return
+        for name, (make, use_bi_direction) in _replacements.items():
+            original = getattr(F, name)
+            _originals[name] = original
+            replacement = make(name, use_bi_direction)
+            _replaced[name] = replacement
+            setattr(_get_module(original), name, replacement)
+            setattr(F, name, replacement)
+
+
+def _uninstall():
+    global _n_contexts
+    with _patch_lock:
+        _n_contexts -= 1
+        if _n_contexts > 0:
+            return
+        for name in _replacements:
+            original = _originals[name]
+            replacement = _replaced.pop(name)
+            module = _get_module(original)
+            if getattr(module, name, None) is replacement:
+                setattr(module, name, original)
+            if getattr(F, name, None) is replacement:
+                setattr(F, name, original)
+
+
+@contextlib.contextmanager
+def fused_n_step_rnn(inputs=()):
+    """Traces N-step RNN functions as fused layers in the current thread.
+
+    In the context, ``F.n_step_lstm``, ``F.n_step_gru``, ``F.n_step_rnn``,
+    their bidirectional variants and links using them like ``L.NStepLSTM``
+    create a function node for each layer, which is converted to a single
+    ONNX ``LSTM``, ``GRU`` or ``RNN`` node, instead of unrolled primitive
+    functions. Gradients are not propagated through the nodes. Since ONNX
+    operators do not have dropout, calls with dropout on train mode raise
+    :class:`ValueError`.
+
+    The functions of Chainer are replaced while any thread is in the
+    context, and the replacements call the original ones in other threads.
+    They are restored when the last context exits.
+
+    Args:
+        inputs (list): Input variables of the network. Initial states
+            computed from them are given to the fused layers even if they
+            are zeros.
+    """
+    previous_ids = getattr(_thread_local, 'input_ids', ())
+    _thread_local.input_ids = {
+        id(x.node) for x in inputs if isinstance(x, chainer.Variable)}
+    _install()
+    try:
+        with _set_active(True):
+            yield
+    finally:
+        _uninstall()
+        _thread_local.input_ids = previous_ids
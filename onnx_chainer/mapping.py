@@ -1,92 +1,57 @@
+from collections import OrderedDict
+try:
+    from collections.abc import MutableMapping
+except ImportError:
+    from collections import MutableMapping
+
+import onnx
+
 from onnx_chainer import functions
 from onnx_chainer.functions.converter import FunctionConverter
 
 
-_supported_function_node_set = {
-    # Activation
-    'ClippedReLU',
-    'ELU',
-    'HardSigmoid',
-    'LeakyReLU',
-    'LogSoftmax',
-    'PReLUFunction',
-    'ReLU',
-    'Sigmoid',
-    'Softmax',
-    'Softplus',
-    'Tanh',
-
-    # Array
-    'Cast',
-    'Concat',
-    'Copy',
-    'Depth2Space',
-    'ExpandDims',
-    'GetItem',
-    'Pad',
-    'Reshape',
-    'Space2Depth',
-    'SplitAxis',
-    'Squeeze',
-    'Tile',
-    'Transpose',
-    'Where',
-
-    # Connection
-    'Convolution2DFunction',
-    'ConvolutionND',
-    'Deconvolution2DFunction',
-    'DeconvolutionND',
-    'EmbedIDFunction',
-    'LinearFunction',
-
-    # Math
-    'Add',
-    'AddConstant',
-    'Absolute',
-    'BroadcastTo',
-    'Div',
-    'Mul',
-    'MulConstant',
-    'Neg',
-    'PowVarConst',
-    'Sub',
-    'Clip',
-    'Exp',
-    'Identity',
-    'MatMul',
-    'Maximum',
-    'Minimum',
-    'Sqrt',
-    'LinearInterpolate',
-    'LogSumExp',
-    'Max',
-    'Mean',
-    'Min',
-    'Prod',
-    'Sum',
-    'Square',
-
-    # Noise
-    'Dropout',
-
-    # Pooling
-    'AveragePooling2D',
-    'AveragePoolingND',
-    'MaxPooling2D',
-    'MaxPoolingND',
-    'ROIPooling2D',
-    'Unpooling2D',
-
-    # Normalization
-    'BatchNormalization',
-    'FixedBatchNormalization',
-    'LocalResponseNormalization',
-    'NormalizeL2',
-
-    # Loss
-    'SoftmaxCrossEntropy',
-}
+_supported_function_node_set = set(functions._converter_modules)
+
+
+class _ConverterMapping(MutableMapping):
+
+    """Converters keyed by names of Chainer functions.
+
+    The module defining a converter is imported on the first lookup of the
+    function name, so that importing ONNX-Chainer does not import all
+    converters. Names can be checked by ``in`` without importing them.
+    """
+
+    def __init__(self, names):
+        self._names = set(names)
+        self._converters = {}
+
+    def __getitem__(self, name):
+        converter = self._converters.get(name, None)
+        if converter is None:
+            if name not in self._names:
+                raise KeyError(name)
+            converter = FunctionConverter(functions._import_converter(name))
+            self._converters[name] = converter
+        return converter
+
+    def __setitem__(self, name, converter):
+        self._names.add(name)
+        self._converters[name] = converter
+
+    def __delitem__(self, name):
+        self._names.remove(name)
+        self._converters.pop(name, None)
+
+    def __contains__(self, name):
+        return name in self._names
+
+    def __iter__(self):
+        return iter(self._names)
+
+    def __len__(self):
+        return len(self._names)
+
 
 _converters = None
 
@@ -97,10 +62,43 @@ def _get_converters():
     if _converters is not None:
         return _converters
 
-    _converters = {
-        name: FunctionConverter(getattr(functions, 'convert_'+name, None))
-        for name in _supported_function_node_set}
+    _converters = _ConverterMapping(_supported_function_node_set)
     return _converters
 
 
 converters = _get_converters()
+
+
+def supported_ops(opset_version=None):
+    """Returns functions which built-in converters support.
+
+    This is useful to check functions of a model before exporting it, e.g.
+    names of ``FunctionNode`` objects in the computational graph.
+
+    >>> ops = onnx_chainer.supported_ops(8)
+    >>> ops['Reshape']
+    5
+
+    Args:
+        opset_version (int): The opset version of ONNX. If ``None``, the
+            latest opset version of the onnx module is used.
+
+    Returns:
+        dict: Opset versions of ONNX operators used by converters keyed by
+        names of Chainer functions which can be converted with the opset
+        version, sorted by names. Converters which do not declare versions
+        are regarded as supporting any version.
+    """
+    if opset_version is None:
+        opset_version = int(onnx.defs.onnx_opset_version())
+    ops = OrderedDict()
+    for name in sorted(_supported_function_node_set):
+        converter = functions._import_converter(name)
+        resolve = getattr(converter, 'resolve_opset_version', None)
+        if resolve is None:
+            ops[name] = opset_version
+            continue
+        resolved = resolve(opset_version)
+        if resolved is not None:
+            ops[name] = resolved
+    return ops
@@ -1,9 +1,91 @@
 import collections
+import contextlib
+import threading
+
+import numpy
 import onnx
 
+from onnx_chainer import serialization
+
+
+class NameGenerator(object):
+    """Generator of unique names of values created by converters.
+
+    Each export owns a generator, so that exports in different threads do
+    not share counters and names do not depend on exports run before.
+
+    Attributes:
+      func_name (str): The name of Chainer function being converted.
+    """
+
+    def __init__(self):
+        self.func_name = None
+        self._func_to_id = collections.defaultdict(int)
+
+    def set_func_name(self, func_name):
+        """Set the name of Chainer function being converted.
+
+        Args:
+          func_name (str): The name of Chainer function.
+        """
+        self.func_name = func_name
+
+    def gensym(self):
+        """Returns a unique symbol.
+
+        Returns:
+          A unique string symbol.
+        """
+        assert self.func_name is not None
+        self._func_to_id[self.func_name] += 1
+        return 'tmp{}_{}'.format(
+            self.func_name, self._func_to_id[self.func_name])
+
+    def make_node(self, op_name, input_names, num_outputs, **kwargs):
+        """Same as :func:`make_node` but names outputs by this generator."""
+        output_names = [self.gensym() for i in range(num_outputs)]
+        return onnx.helper.make_node(
+            op_name, input_names, output_names, **kwargs)
+
+
+_thread_local = threading.local()
+
+
+def _get_name_generator_stack():
+    stack = getattr(_thread_local, 'name_generators', None)
+    if stack is None:
+        # The bottom one is used when no export is running in the thread
+        stack = [NameGenerator()]
+        _thread_local.name_generators = stack
+    return stack
+
+
+def get_name_generator():
+    """Returns the name generator active in the current thread.
 
-__func_name = None
-__func_to_id = collections.defaultdict(int)
+    Returns:
+      A :class:`NameGenerator` object.
+    """
+    return _get_name_generator_stack()[-1]
+
+
+@contextlib.contextmanager
+def using_name_generator(name_generator):
+    """Activates the name generator in the current thread.
+
+    Module level functions like :func:`make_node` use the active generator,
+    so converters which do not take a generator explicitly still produce
+    names unique in the export.
+
+    Args:
+      name_generator (NameGenerator): The generator to be activated.
+    """
+    stack = _get_name_generator_stack()
+    stack.append(name_generator)
+    try:
+        yield name_generator
+    finally:
+        stack.pop()
 
 
 def set_func_name(func_name):
@@ -12,8 +94,7 @@ def set_func_name(func_name):
     Args:
       func_name (str): The name of Chainer function.
     """
-    global __func_name
-    __func_name = func_name
+    get_name_generator().set_func_name(func_name)
 
 
 def gensym():
@@ -22,9 +103,7 @@ def gensym():
     Returns:
       A unique string symbol.
     """
-    assert __func_name is not None
-    __func_to_id[__func_name] += 1
-    return 'tmp{}_{}'.format(__func_name, __func_to_id[__func_name])
+    return get_name_generator().gensym()
 
 
 def make_node(op_name, input_names, num_outputs, **kwargs):
@@ -32,7 +111,7 @@ def make_node(op_name, input_names, num_outputs, **kwargs):
 
     Unlike `onnx.helper.make_node`, this function takes the number of
     output values instead of the names of them. Unique names will be
-    assigned automatically.
+    assigned automatically by the active :class:`NameGenerator`.
 
     Args:
       op_name (str): The name of an ONNX op.
@@ -43,14 +122,23 @@ def make_node(op_name, input_names, num_outputs, **kwargs):
     Returns:
       An `onnx.NodeProto` object.
     """
-    output_names = [gensym() for i in range(num_outputs)]
-    return onnx.helper.make_node(op_name, input_names, output_names, **kwargs)
+    return get_name_generator().make_node(
+        op_name, input_names, num_outputs, **kwargs)
 
 
 class GraphBuilder(object):
-    """A helper class to build consecutive ONNX nodes."""
+    """A helper class to build consecutive ONNX nodes.
 
-    def __init__(self):
+    Args:
+      name_generator (NameGenerator): The generator naming outputs of nodes.
+        If ``None``, the generator active when the builder is created is
+        used.
+    """
+
+    def __init__(self, name_generator=None):
+        if name_generator is None:
+            name_generator = get_name_generator()
+        self._name_generator = name_generator
         self._nodes = []
 
     def op(self, op_name, input_names, num_outputs=1, **kwargs):
@@ -69,7 +157,8 @@ class GraphBuilder(object):
         # Prevent a common mistake. `input_names="input"` creates a
         # node with 5 inputs.
         assert not isinstance(input_names, str)
-        node = make_node(op_name, input_names, num_outputs, **kwargs)
+        node = self._name_generator.make_node(
+            op_name, input_names, num_outputs, **kwargs)
         self._nodes.append(node)
         if num_outputs == 1:
             return node.output[0]
@@ -100,8 +189,11 @@ class GraphBuilder(object):
 
 def write_tensor_pb(filename, name, value):
     with open(filename, 'wb') as f:
-        t = onnx.numpy_helper.from_array(value, name)
-        f.write(t.SerializeToString())
+        if value.dtype.kind == 'O':
+            t = onnx.numpy_helper.from_array(value, name)
+            f.write(t.SerializeToString())
+        else:
+            serialization.write_tensor(f, value, name)
 
 
 def cleanse_param_name(name):
@@ -116,3 +208,41 @@ def cleanse_param_name(name):
       A valid ONNX name (e.g., param_l_W).
     """
     return 'param' + name.replace('/', '_')
+
+
+def _get_array_location(array):
+    if isinstance(array, numpy.ndarray):
+        ptr = array.__array_interface__['data'][0]
+        return (None, ptr, array.shape, array.strides, array.dtype.str)
+    if hasattr(array, 'data') and hasattr(array.data, 'ptr'):
+        # cupy.ndarray
+        return (array.device.id, array.data.ptr, array.shape, array.strides,
+                array.dtype.str)
+    return (None, id(array))
+
+
+def find_aliased_params(model):
+    """Finds parameters sharing the same array with other parameters.
+
+    Parameters are aliased when they are the same object, hold the same
+    array, or hold views of the same memory with the same shape, strides and
+    dtype, e.g. tied weights of embeddings and output layers.
+
+    Args:
+      model (~chainer.Link): The model.
+
+    Returns:
+      A dict of ONNX names of the first parameters keyed by ONNX names of
+      their aliases.
+    """
+    first_names = {}
+    aliases = {}
+    for name, param in model.namedparams():
+        if param.array is None:
+            continue
+        onnx_name = cleanse_param_name(name)
+        location = _get_array_location(param.array)
+        first_name = first_names.setdefault(location, onnx_name)
+        if first_name != onnx_name:
+            aliases[onnx_name] = first_name
+    return aliases
@@ -0,0 +1,35 @@
+from onnx_chainer.optimizer.pass_manager import DEFAULT_PASSES  # NOQA
+from onnx_chainer.optimizer.pass_manager import get_pass  # NOQA
+from onnx_chainer.optimizer.pass_manager import PassManager  # NOQA
+from onnx_chainer.optimizer.pass_manager import PassStats  # NOQA
+from onnx_chainer.optimizer.pass_manager import register_pass  # NOQA
+from onnx_chainer.optimizer.pass_manager import registered_passes  # NOQA
+
+# Modules are imported to register passes
+from onnx_chainer.optimizer.cancellation import cancel_reshape  # NOQA
+from onnx_chainer.optimizer.cancellation import cancel_transpose  # NOQA
+from onnx_chainer.optimizer.constant_folding import fold_constants  # NOQA
+from onnx_chainer.optimizer.elimination import eliminate_dead_nodes  # NOQA
+from onnx_chainer.optimizer.elimination import eliminate_dropout  # NOQA
+from onnx_chainer.optimizer.elimination import eliminate_identity  # NOQA
+from onnx_chainer.optimizer.fusion import fuse_bn_into_conv  # NOQA
+from onnx_chainer.optimizer.pattern_fusion import fuse_attention  # NOQA
+from onnx_chainer.optimizer.pattern_fusion import fuse_layer_norm  # NOQA
+from onnx_chainer.optimizer.pattern_fusion import FUSED_OPS_DOMAIN  # NOQA
+
+
+def optimize(onnx_model, passes=None):
+    """Optimizes the graph of the ONNX model in place.
+
+    Args:
+        onnx_model (~onnx.ModelProto): The model.
+        passes (list or PassManager): Passes to be run, see
+            :class:`PassManager`. If ``None``, :data:`DEFAULT_PASSES` are
+            used.
+
+    Returns:
+        ~onnx.ModelProto: The given model.
+    """
+    if not isinstance(passes, PassManager):
+        passes = PassManager(passes)
+    return passes.run(onnx_model)
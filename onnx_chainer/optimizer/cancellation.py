@@ -0,0 +1,69 @@
+from onnx_chainer.optimizer.elimination import bypass_node
+from onnx_chainer.optimizer import graph_utils
+from onnx_chainer.optimizer.pass_manager import register_pass
+
+
+@register_pass('cancel_transpose')
+def cancel_transpose(onnx_model):
+    """Merges consecutive ``Transpose`` nodes.
+
+    ``Transpose`` of ``Transpose`` is replaced by a single ``Transpose``
+    composing both permutations, and removed when the composed permutation is
+    identity. The former ``Transpose`` is left to be removed by
+    ``eliminate_dead_nodes`` when no other node uses it.
+    """
+    graph = onnx_model.graph
+    graph_outputs = graph_utils.get_graph_output_names(graph)
+    producers = graph_utils.get_producers(graph)
+    removed = []
+    for i, node in enumerate(graph.node):
+        if node.op_type != 'Transpose':
+            continue
+        prev = producers.get(node.input[0], None)
+        if prev is None or prev.op_type != 'Transpose':
+            continue
+        perm1 = graph_utils.get_attribute(prev, 'perm')
+        perm2 = graph_utils.get_attribute(node, 'perm')
+        if perm1 is None or perm2 is None:
+            # Reversing axes, which depends on the rank of the input
+            continue
+        perm = [perm1[p] for p in perm2]
+        node.input[0] = prev.input[0]
+        graph_utils.set_attribute(node, 'perm', perm)
+        if perm == list(range(len(perm))) and\
+                bypass_node(graph, node, graph_outputs):
+            removed.append(i)
+            producers = graph_utils.get_producers(graph)
+    graph_utils.remove_nodes(graph, removed)
+
+
+def _get_reshape_shape(node, initializers, producers, graph):
+    if len(node.input) > 1:
+        return graph_utils.get_constant_value(
+            graph, node.input[1], initializers, producers)
+    # ``shape`` attribute before opset version 5
+    return graph_utils.get_attribute(node, 'shape')
+
+
+@register_pass('cancel_reshape')
+def cancel_reshape(onnx_model):
+    """Skips ``Reshape`` whose output is reshaped again.
+
+    The input of ``Reshape`` of ``Reshape`` is connected to the input of the
+    former ``Reshape`` directly, unless the latter shape has ``0`` which
+    copies a dimension of its input. The former ``Reshape`` is left to be
+    removed by ``eliminate_dead_nodes`` when no other node uses it.
+    """
+    graph = onnx_model.graph
+    producers = graph_utils.get_producers(graph)
+    initializers = graph_utils.get_initializers(graph)
+    for node in graph.node:
+        if node.op_type != 'Reshape':
+            continue
+        prev = producers.get(node.input[0], None)
+        if prev is None or prev.op_type != 'Reshape':
+            continue
+        shape = _get_reshape_shape(node, initializers, producers, graph)
+        if shape is None or 0 in list(shape):
+            continue
+        node.input[0] = prev.input[0]
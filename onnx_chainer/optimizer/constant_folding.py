@@ -0,0 +1,317 @@
+import numpy as np
+import onnx
+from onnx.mapping import TENSOR_TYPE_TO_NP_TYPE
+from onnx import numpy_helper
+
+from onnx_chainer.optimizer import graph_utils
+from onnx_chainer.optimizer.pass_manager import register_pass
+
+
+# Results larger than this byte size are not folded unless they are smaller
+# than inputs, to avoid bloating the model by e.g. ``Expand`` of a scalar
+MAX_EXPANDED_BYTES = 1 << 20
+
+
+class _NotFoldable(Exception):
+    pass
+
+
+_constant_ops = {}
+
+
+def _register(*op_types):
+    def wrapper(fn):
+        for op_type in op_types:
+            _constant_ops[op_type] = fn
+        return fn
+    return wrapper
+
+
+def _attr(node, name, default=None):
+    return graph_utils.get_attribute(node, name, default)
+
+
+def _unary(fn):
+    def impl(node, inputs, opset_version):
+        x, = inputs
+        return fn(x).astype(x.dtype, copy=False),
+    return impl
+
+
+for _op_type, _fn in (
+        ('Abs', np.abs),
+        ('Ceil', np.ceil),
+        ('Exp', np.exp),
+        ('Floor', np.floor),
+        ('Identity', lambda x: x),
+        ('Log', np.log),
+        ('Neg', np.negative),
+        ('Reciprocal', np.reciprocal),
+        ('Relu', lambda x: np.maximum(x, 0)),
+        ('Sigmoid', lambda x: 1 / (1 + np.exp(-x))),
+        ('Sqrt', np.sqrt),
+        ('Tanh', np.tanh)):
+    _constant_ops[_op_type] = _unary(_fn)
+
+
+def _divide(a, b):
+    if np.issubdtype(a.dtype, np.integer):
+        # Integer division of ONNX truncates toward zero
+        return np.trunc(np.true_divide(a, b))
+    return np.true_divide(a, b)
+
+
+def _binary(fn):
+    def impl(node, inputs, opset_version):
+        if _attr(node, 'axis') is not None:
+            # Legacy broadcasting along the axis before opset version 7
+            raise _NotFoldable()
+        a, b = inputs
+        if _attr(node, 'broadcast', 1) == 0 and a.shape != b.shape:
+            raise _NotFoldable()
+        return fn(a, b).astype(a.dtype, copy=False),
+    return impl
+
+
+for _op_type, _fn in (
+        ('Add', np.add),
+        ('Div', _divide),
+        ('Mul', np.multiply),
+        ('Pow', np.power),
+        ('Sub', np.subtract)):
+    _constant_ops[_op_type] = _binary(_fn)
+
+
+def _variadic(fn):
+    def impl(node, inputs, opset_version):
+        y = inputs[0]
+        for x in inputs[1:]:
+            y = fn(y, x)
+        return y.astype(inputs[0].dtype, copy=False),
+    return impl
+
+
+for _op_type, _fn in (
+        ('Max', np.maximum),
+        ('Min', np.minimum),
+        ('Sum', np.add)):
+    _constant_ops[_op_type] = _variadic(_fn)
+
+
+@_register('Cast')
+def _cast(node, inputs, opset_version):
+    to = _attr(node, 'to')
+    if not isinstance(to, int) or to not in TENSOR_TYPE_TO_NP_TYPE or\
+            to == onnx.TensorProto.STRING:
+        raise _NotFoldable()
+    return inputs[0].astype(TENSOR_TYPE_TO_NP_TYPE[to]),
+
+
+@_register('Concat')
+def _concat(node, inputs, opset_version):
+    return np.concatenate(inputs, axis=_attr(node, 'axis', 1)),
+
+
+@_register('ConstantOfShape')
+def _constant_of_shape(node, inputs, opset_version):
+    value = _attr(node, 'value')
+    if value is None:
+        value = np.zeros(1, dtype=np.float32)
+    else:
+        value = numpy_helper.to_array(value)
+    return np.full(tuple(inputs[0]), value.reshape(-1)[0], dtype=value.dtype),
+
+
+@_register('Expand')
+def _expand(node, inputs, opset_version):
+    x, shape = inputs
+    return x * np.ones(tuple(shape), dtype=x.dtype),
+
+
+@_register('Gather')
+def _gather(node, inputs, opset_version):
+    x, indices = inputs
+    return np.take(x, indices, axis=_attr(node, 'axis', 0)),
+
+
+@_register('Gemm')
+def _gemm(node, inputs, opset_version):
+    a, b = inputs[:2]
+    if _attr(node, 'transA', 0):
+        a = a.T
+    if _attr(node, 'transB', 0):
+        b = b.T
+    y = _attr(node, 'alpha', 1.0) * np.dot(a, b)
+    if len(inputs) > 2 and inputs[2] is not None:
+        y = y + _attr(node, 'beta', 1.0) * inputs[2]
+    return y.astype(inputs[0].dtype, copy=False),
+
+
+@_register('MatMul')
+def _matmul(node, inputs, opset_version):
+    return np.matmul(*inputs),
+
+
+@_register('Reshape')
+def _reshape(node, inputs, opset_version):
+    x = inputs[0]
+    if len(inputs) > 1:
+        shape = [int(d) for d in inputs[1]]
+    else:
+        shape = list(_attr(node, 'shape'))
+    # 0 copies the dimension of the input
+    shape = [x.shape[i] if d == 0 else d for i, d in enumerate(shape)]
+    return x.reshape(shape),
+
+
+@_register('Shape')
+def _shape(node, inputs, opset_version):
+    return np.array(inputs[0].shape, dtype=np.int64),
+
+
+@_register('Slice')
+def _slice(node, inputs, opset_version):
+    x = inputs[0]
+    if opset_version < 10:
+        starts, ends = _attr(node, 'starts'), _attr(node, 'ends')
+        axes = _attr(node, 'axes', list(range(len(starts))))
+        steps = [1] * len(starts)
+    else:
+        starts, ends = inputs[1], inputs[2]
+        axes = inputs[3] if len(inputs) > 3 and inputs[3] is not None\
+            else list(range(len(starts)))
+        steps = inputs[4] if len(inputs) > 4 and inputs[4] is not None\
+            else [1] * len(starts)
+    slices = [slice(None)] * x.ndim
+    for start, end, axis, step in zip(starts, ends, axes, steps):
+        slices[int(axis)] = slice(int(start), int(end), int(step))
+    return x[tuple(slices)],
+
+
+@_register('Split')
+def _split(node, inputs, opset_version):
+    x = inputs[0]
+    axis = _attr(node, 'axis', 0)
+    split = _attr(node, 'split')
+    if split is None:
+        return np.split(x, len(node.output), axis=axis)
+    return np.split(x, np.cumsum(split)[:-1], axis=axis)
+
+
+@_register('Squeeze')
+def _squeeze(node, inputs, opset_version):
+    axes = _attr(node, 'axes')
+    if axes is None:
+        return np.squeeze(inputs[0]),
+    return np.squeeze(inputs[0], axis=tuple(axes)),
+
+
+@_register('Tile')
+def _tile(node, inputs, opset_version):
+    if len(inputs) < 2:
+        # ``tiles`` and ``axis`` inputs before opset version 6
+        raise _NotFoldable()
+    return np.tile(inputs[0], tuple(inputs[1])),
+
+
+@_register('Transpose')
+def _transpose(node, inputs, opset_version):
+    return np.transpose(inputs[0], _attr(node, 'perm')),
+
+
+@_register('Unsqueeze')
+def _unsqueeze(node, inputs, opset_version):
+    y = inputs[0]
+    for axis in sorted(_attr(node, 'axes')):
+        y = np.expand_dims(y, axis)
+    return y,
+
+
+class _Constants(object):
+
+    """Values of constants, which are converted from initializers on use.
+
+    Initializers are converted only when all inputs of a node are constants,
+    so that payloads of large weights are not copied to arrays.
+    """
+
+    def __init__(self, graph):
+        self.initializers = {
+            t.name: t for t in graph.initializer
+            if t.data_location != onnx.TensorProto.EXTERNAL}
+        self.arrays = {}
+
+    def __contains__(self, name):
+        return name in self.arrays or name in self.initializers
+
+    def __getitem__(self, name):
+        if name not in self.arrays:
+            self.arrays[name] = numpy_helper.to_array(self.initializers[name])
+        return self.arrays[name]
+
+    def __setitem__(self, name, array):
+        self.arrays[name] = array
+
+
+def _evaluate(node, constants, opset_version):
+    if node.op_type == 'Constant':
+        value = _attr(node, 'value')
+        if value is None:
+            raise _NotFoldable()
+        return [numpy_helper.to_array(value)]
+    impl = _constant_ops.get(node.op_type, None)
+    if impl is None:
+        raise _NotFoldable()
+    if not all(name in constants for name in node.input if name):
+        raise _NotFoldable()
+    # Omitted optional inputs are None
+    inputs = [constants[name] if name else None for name in node.input]
+    outputs = [np.asarray(y) for y in impl(node, inputs, opset_version)]
+    in_bytes = sum(x.nbytes for x in inputs if x is not None)
+    out_bytes = sum(y.nbytes for y in outputs)
+    if out_bytes > max(in_bytes, MAX_EXPANDED_BYTES):
+        raise _NotFoldable()
+    return outputs
+
+
+@register_pass('fold_constants')
+def fold_constants(onnx_model):
+    """Evaluates nodes whose inputs are all constants.
+
+    Nodes of the default domain whose inputs are initializers or outputs of
+    other constant nodes are evaluated by numpy, then replaced by initializers
+    of the same names. ``Constant`` nodes are replaced by initializers as
+    well. Nodes producing graph outputs are kept. Results used only by other
+    folded nodes are not added, and initializers only used by the folded
+    nodes are left to be removed by ``eliminate_dead_nodes``.
+    """
+    graph = onnx_model.graph
+    opset_version = graph_utils.get_opset_version(onnx_model)
+    graph_outputs = graph_utils.get_graph_output_names(graph)
+    constants = _Constants(graph)
+
+    removed = []
+    folded = []
+    for i, node in enumerate(graph.node):
+        if node.domain not in ('', 'ai.onnx'):
+            continue
+        if any(name in graph_outputs for name in node.output):
+            continue
+        try:
+            outputs = _evaluate(node, constants, opset_version)
+        except _NotFoldable:
+            continue
+        except (ValueError, IndexError, TypeError):
+            # Leave the node to runtimes when numpy does not accept it
+            continue
+        removed.append(i)
+        for name, array in zip(node.output, outputs):
+            if name:
+                constants[name] = array
+                folded.append((name, array))
+
+    graph_utils.remove_nodes(graph, removed)
+    used_names = set(name for node in graph.node for name in node.input)
+    for name, array in folded:
+        if name in used_names:
+            graph_utils.add_initializer(graph, array, name)
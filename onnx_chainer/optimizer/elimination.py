@@ -0,0 +1,89 @@
+from onnx_chainer.optimizer import graph_utils
+from onnx_chainer.optimizer.pass_manager import register_pass
+
+
+def bypass_node(graph, node, graph_outputs):
+    """Connects the first input of the node to consumers of its first output.
+
+    The node itself is not removed by this function, the caller has to remove
+    it when it returns True. When the output of the node is an output of the
+    graph, the value is renamed to keep the name of the graph output.
+
+    Args:
+        graph (~onnx.GraphProto): The graph.
+        node (~onnx.NodeProto): The node to be bypassed.
+        graph_outputs (set): Names of graph outputs.
+
+    Returns:
+        bool: True if the node is bypassed.
+    """
+    src, dst = node.input[0], node.output[0]
+    if dst not in graph_outputs:
+        graph_utils.replace_input_name(graph, dst, src)
+        return True
+    if src in graph_outputs or src not in graph_utils.get_producers(graph):
+        # Graph inputs, initializers and other graph outputs cannot be
+        # renamed
+        return False
+    graph_utils.rename_value(graph, src, dst)
+    return True
+
+
+def _eliminate_nodes(graph, predicate):
+    graph_outputs = graph_utils.get_graph_output_names(graph)
+    removed = []
+    for i, node in enumerate(graph.node):
+        if predicate(node) and bypass_node(graph, node, graph_outputs):
+            removed.append(i)
+    graph_utils.remove_nodes(graph, removed)
+
+
+@register_pass('eliminate_identity')
+def eliminate_identity(onnx_model):
+    """Removes ``Identity`` nodes."""
+    _eliminate_nodes(
+        onnx_model.graph, lambda node: node.op_type == 'Identity')
+
+
+@register_pass('eliminate_dropout')
+def eliminate_dropout(onnx_model):
+    """Removes ``Dropout`` nodes which work as identity.
+
+    ``Dropout`` is removed when it is in test mode and its mask output is not
+    used. Note that ``Dropout`` of opset version 7 or later has no way to
+    specify train mode, so the pass must not be run on a graph exported with
+    ``train=True``.
+    """
+    graph = onnx_model.graph
+    used = set(graph_utils.get_consumers(graph).keys()) |\
+        graph_utils.get_graph_output_names(graph)
+
+    def is_removable(node):
+        if node.op_type != 'Dropout':
+            return False
+        if graph_utils.get_attribute(node, 'is_test', 1) == 0:
+            return False
+        if len(node.input) > 2 and node.input[2]:
+            # ``training_mode`` input is given
+            return False
+        return len(node.output) < 2 or node.output[1] not in used
+
+    _eliminate_nodes(graph, is_removable)
+
+
+@register_pass('eliminate_dead_nodes')
+def eliminate_dead_nodes(onnx_model):
+    """Removes nodes and initializers which no graph output depends on."""
+    graph = onnx_model.graph
+    live = graph_utils.get_graph_output_names(graph)
+    dead = []
+    # Nodes are topologically sorted, visit consumers first
+    for i in reversed(range(len(graph.node))):
+        node = graph.node[i]
+        if any(name in live for name in node.output):
+            live.update(node.input)
+        else:
+            dead.append(i)
+    graph_utils.remove_nodes(graph, dead)
+    graph_utils.remove_initializers(
+        graph, [t.name for t in graph.initializer if t.name not in live])
@@ -0,0 +1,163 @@
+import numpy as np
+
+from onnx_chainer.optimizer import graph_utils
+from onnx_chainer.optimizer.pass_manager import register_pass
+
+
+def _get_bn_scale_and_shift(bn, graph, initializers, producers):
+    """Returns per-channel scale and shift which BatchNormalization applies.
+
+    Returns:
+        tuple: Arrays of scale and shift, or ``None`` if any of statistics or
+        parameters is not a constant.
+    """
+    values = [graph_utils.get_constant_value(
+        graph, name, initializers, producers) for name in bn.input[1:5]]
+    if len(values) != 4 or any(v is None for v in values):
+        return None
+    gamma, beta, mean, var = [v.astype(np.float64) for v in values]
+    eps = graph_utils.get_attribute(bn, 'epsilon', 1e-5)
+    scale = gamma / np.sqrt(var + eps)
+    return scale, beta - mean * scale
+
+
+def _is_foldable_bn(node, used):
+    if node.op_type != 'BatchNormalization':
+        return False
+    if graph_utils.get_attribute(node, 'is_test', 1) == 0:
+        return False
+    if graph_utils.get_attribute(node, 'spatial', 1) == 0:
+        return False
+    # Running statistics and saved statistics are not used on test mode
+    return all(name not in used for name in node.output[1:])
+
+
+def _fold_into_conv(conv, scale, shift, graph, initializers, producers):
+    w = graph_utils.get_constant_value(
+        graph, conv.input[1], initializers, producers)
+    if w is None or w.shape[0] != len(scale):
+        return None
+    if len(conv.input) > 2 and conv.input[2]:
+        b = graph_utils.get_constant_value(
+            graph, conv.input[2], initializers, producers)
+        if b is None:
+            return None
+    else:
+        b = np.zeros(w.shape[0], dtype=w.dtype)
+    # Output channels are on the first axis of W
+    new_w = w * scale.reshape((-1,) + (1,) * (w.ndim - 1))
+    new_b = b * scale + shift
+    return new_w.astype(w.dtype), new_b.astype(w.dtype)
+
+
+def _get_ranks(onnx_model):
+    ranks = {}
+    for name, value_info in graph_utils.infer_value_infos(onnx_model).items():
+        shape = graph_utils.get_shape(value_info)
+        if shape is not None:
+            ranks[name] = len(shape)
+    return ranks
+
+
+def _fold_into_gemm(gemm, scale, shift, graph, initializers, producers):
+    w = graph_utils.get_constant_value(
+        graph, gemm.input[1], initializers, producers)
+    trans_b = graph_utils.get_attribute(gemm, 'transB', 0)
+    if w is None or w.ndim != 2:
+        return None
+    if w.shape[0 if trans_b else 1] != len(scale):
+        return None
+    if len(gemm.input) > 2 and gemm.input[2]:
+        c = graph_utils.get_constant_value(
+            graph, gemm.input[2], initializers, producers)
+        if c is None:
+            return None
+        c = c * graph_utils.get_attribute(gemm, 'beta', 1.0)
+    else:
+        c = np.zeros((), dtype=w.dtype)
+    # Output channels are on the first axis of B when it is transposed
+    if trans_b:
+        new_w = w * scale[:, None]
+    else:
+        new_w = w * scale[None, :]
+    new_c = c * scale + shift
+    return new_w.astype(w.dtype), new_c.astype(w.dtype)
+
+
+@register_pass('fuse_bn_into_conv')
+def fuse_bn_into_conv(onnx_model):
+    """Folds ``BatchNormalization`` into the preceding ``Conv`` or ``Gemm``.
+
+    ``BatchNormalization`` in test mode is an affine transformation per
+    channel, so it is merged into weights and biases of ``Conv`` or ``Gemm``
+    whose output is used only by it. ``MatMul`` of a matrix and a constant
+    matrix is rewritten to ``Gemm`` as well. The weights and the biases are
+    replaced by new initializers, and the old ones are left to be removed by
+    ``eliminate_dead_nodes`` when no other node uses them. The pass must not
+    be run on a graph exported with ``train=True``.
+    """
+    graph = onnx_model.graph
+    initializers = graph_utils.get_initializers(graph)
+    producers = graph_utils.get_producers(graph)
+    consumers = graph_utils.get_consumers(graph)
+    graph_outputs = graph_utils.get_graph_output_names(graph)
+    used = set(consumers.keys()) | graph_outputs
+    opset_version = graph_utils.get_opset_version(onnx_model)
+    ranks = None
+
+    removed = []
+    for i, bn in enumerate(graph.node):
+        if not _is_foldable_bn(bn, used):
+            continue
+        node = producers.get(bn.input[0], None)
+        if node is None or node.op_type not in ('Conv', 'Gemm', 'MatMul'):
+            continue
+        if len(consumers[bn.input[0]]) != 1 or bn.input[0] in graph_outputs:
+            continue
+        scale_shift = _get_bn_scale_and_shift(
+            bn, graph, initializers, producers)
+        if scale_shift is None:
+            continue
+        if node.op_type == 'MatMul':
+            if ranks is None:
+                # Shape inference is run only when it is needed
+                ranks = _get_ranks(onnx_model)
+            if ranks.get(node.input[0], None) != 2:
+                continue
+        if node.op_type == 'Conv':
+            folded = _fold_into_conv(
+                node, scale_shift[0], scale_shift[1], graph, initializers,
+                producers)
+        else:
+            folded = _fold_into_gemm(
+                node, scale_shift[0], scale_shift[1], graph, initializers,
+                producers)
+        if folded is None:
+            continue
+
+        new_w, new_b = folded
+        w_name = graph_utils.make_unique_name(
+            graph, '{}_fused'.format(node.input[1]))
+        graph_utils.add_initializer(graph, new_w, w_name)
+        b_name = graph_utils.make_unique_name(
+            graph, '{}_fused_bias'.format(bn.name or bn.output[0]))
+        graph_utils.add_initializer(graph, new_b, b_name)
+        initializers = graph_utils.get_initializers(graph)
+
+        node.input[1] = w_name
+        if len(node.input) > 2:
+            node.input[2] = b_name
+        else:
+            node.input.extend([b_name])
+        if node.op_type == 'MatMul':
+            node.op_type = 'Gemm'
+            if opset_version < 7:
+                graph_utils.set_attribute(node, 'broadcast', 1)
+        elif node.op_type == 'Gemm':
+            graph_utils.set_attribute(node, 'beta', 1.0)
+            if graph_utils.get_attribute(node, 'broadcast') is not None:
+                graph_utils.set_attribute(node, 'broadcast', 1)
+        node.output[0] = bn.output[0]
+        producers[bn.output[0]] = node
+        removed.append(i)
+    graph_utils.remove_nodes(graph, removed)
@@ -0,0 +1,217 @@
+import collections
+
+import onnx
+from onnx import helper
+from onnx import numpy_helper
+from onnx import shape_inference
+
+
+def get_opset_version(onnx_model, domain=''):
+    """Returns the opset version of the domain imported by the model."""
+    for opset in onnx_model.opset_import:
+        if opset.domain == domain:
+            return opset.version
+    return None
+
+
+def add_opset_import(onnx_model, domain, version):
+    """Imports the opset of the domain unless the model imports it.
+
+    Returns:
+        int: The version of the opset imported by the model.
+    """
+    imported = get_opset_version(onnx_model, domain)
+    if imported is not None:
+        return imported
+    onnx_model.opset_import.extend(
+        [helper.make_operatorsetid(domain, version)])
+    return version
+
+
+def get_attribute(node, name, default=None):
+    """Returns the value of the attribute of the node.
+
+    Args:
+        node (~onnx.NodeProto): The node.
+        name (str): The name of the attribute.
+        default: The value returned when the node does not have it.
+    """
+    for attr in node.attribute:
+        if attr.name == name:
+            return helper.get_attribute_value(attr)
+    return default
+
+
+def set_attribute(node, name, value):
+    """Sets the attribute of the node, replacing the existing one."""
+    for i, attr in enumerate(node.attribute):
+        if attr.name == name:
+            del node.attribute[i]
+            break
+    node.attribute.extend([helper.make_attribute(name, value)])
+
+
+def get_consumers(graph):
+    """Returns nodes consuming each value.
+
+    Returns:
+        dict: Lists of nodes keyed by value names.
+    """
+    consumers = collections.defaultdict(list)
+    for node in graph.node:
+        for name in node.input:
+            if name:
+                consumers[name].append(node)
+    return consumers
+
+
+def get_producers(graph):
+    """Returns the node producing each value.
+
+    Returns:
+        dict: Nodes keyed by value names.
+    """
+    return {name: node for node in graph.node for name in node.output}
+
+
+def get_graph_output_names(graph):
+    return {o.name for o in graph.output}
+
+
+def get_initializers(graph):
+    """Returns initializers keyed by their names."""
+    return {t.name: t for t in graph.initializer}
+
+
+def infer_value_infos(onnx_model):
+    """Returns types of values inferred by ONNX shape inference.
+
+    Returns:
+        dict: ``ValueInfoProto`` of graph inputs, outputs and intermediate
+        values keyed by their names. Values whose types are not inferred are
+        not included, and it is empty when the inference fails.
+    """
+    try:
+        inferred = shape_inference.infer_shapes(onnx_model)
+    except Exception:
+        return {}
+    graph = inferred.graph
+    return {v.name: v for v in
+            list(graph.input) + list(graph.value_info) + list(graph.output)}
+
+
+def get_shape(value_info):
+    """Returns the shape of the value.
+
+    Returns:
+        tuple: Dimensions, which are ``None`` when they are unknown, or
+        ``None`` if the rank is unknown.
+    """
+    tensor_type = value_info.type.tensor_type
+    if not tensor_type.HasField('shape'):
+        return None
+    return tuple(d.dim_value if d.HasField('dim_value') else None
+                 for d in tensor_type.shape.dim)
+
+
+def get_constant_value(graph, name, initializers=None, producers=None):
+    """Returns the value as a numpy array if it is a constant.
+
+    A value is a constant when it is an initializer or an output of a
+    ``Constant`` node.
+
+    Returns:
+        numpy.ndarray: The value, or ``None`` if it is not a constant.
+    """
+    if initializers is None:
+        initializers = get_initializers(graph)
+    if name in initializers:
+        tensor = initializers[name]
+        if tensor.data_location == onnx.TensorProto.EXTERNAL:
+            return None
+        return numpy_helper.to_array(tensor)
+    if producers is None:
+        producers = get_producers(graph)
+    node = producers.get(name, None)
+    if node is not None and node.op_type == 'Constant':
+        return numpy_helper.to_array(get_attribute(node, 'value'))
+    return None
+
+
+def replace_input_name(graph, old_name, new_name):
+    """Replaces references to the value from inputs of all nodes."""
+    for node in graph.node:
+        for i, name in enumerate(node.input):
+            if name == old_name:
+                node.input[i] = new_name
+
+
+def rename_value(graph, old_name, new_name):
+    """Renames the value, both its producer and consumers."""
+    for node in graph.node:
+        for i, name in enumerate(node.output):
+            if name == old_name:
+                node.output[i] = new_name
+    replace_input_name(graph, old_name, new_name)
+    for value_info in graph.value_info:
+        if value_info.name == old_name:
+            value_info.name = new_name
+
+
+def set_nodes(graph, nodes):
+    """Replaces all nodes of the graph by ``nodes``."""
+    copied = []
+    for node in nodes:
+        new_node = onnx.NodeProto()
+        new_node.CopyFrom(node)
+        copied.append(new_node)
+    del graph.node[:]
+    graph.node.extend(copied)
+
+
+def remove_nodes(graph, indices):
+    """Removes nodes at the indices from the graph."""
+    indices = set(indices)
+    if not indices:
+        return
+    # The list is rebuilt at once, since deleting each element of a
+    # repeated field moves all the following ones
+    kept = [node for i, node in enumerate(graph.node) if i not in indices]
+    del graph.node[:]
+    graph.node.extend(kept)
+
+
+def add_initializer(graph, array, name):
+    """Adds an initializer and corresponding graph input.
+
+    Args:
+        graph (~onnx.GraphProto): The graph.
+        array (numpy.ndarray): The value.
+        name (str): The name of the initializer.
+    """
+    tensor = numpy_helper.from_array(array, name)
+    graph.initializer.extend([tensor])
+    graph.input.extend([helper.make_tensor_value_info(
+        name, tensor.data_type, tensor.dims)])
+
+
+def remove_initializers(graph, names):
+    """Removes initializers and corresponding graph inputs."""
+    names = set(names)
+    for field in (graph.initializer, graph.input):
+        indices = [i for i, v in enumerate(field) if v.name in names]
+        for i in reversed(indices):
+            del field[i]
+
+
+def make_unique_name(graph, base):
+    """Returns a value name which is not used in the graph."""
+    used = {v.name for v in graph.input} | {t.name for t in graph.initializer}
+    for node in graph.node:
+        used.update(node.output)
+    if base not in used:
+        return base
+    i = 1
+    while '{}_{}'.format(base, i) in used:
+        i += 1
+    return '{}_{}'.format(base, i)
@@ -0,0 +1,152 @@
+from collections import OrderedDict
+import functools
+import time
+
+
+_passes = OrderedDict()
+
+# Passes run by ``export(..., optimize=True)`` in this order
+DEFAULT_PASSES = (
+    'eliminate_identity',
+    'eliminate_dropout',
+    'fold_constants',
+    'cancel_transpose',
+    'cancel_reshape',
+    'fuse_bn_into_conv',
+    'eliminate_dead_nodes',
+)
+
+
+def register_pass(name):
+    """Decorator to register an optimization pass.
+
+    A pass is a function which takes an ``onnx.ModelProto`` and rewrites its
+    graph in place. Options of the pass can be taken as keyword arguments.
+
+    >>> @register_pass('remove_foo')
+    >>> def remove_foo(onnx_model):
+    >>>     ...
+
+    Args:
+        name (str): The name of the pass, which can be given to
+            :class:`PassManager` and ``export(..., optimize=[...])``.
+    """
+    def wrapper(fn):
+        if name in _passes:
+            raise ValueError('Pass {} is already registered'.format(name))
+        _passes[name] = fn
+        return fn
+    return wrapper
+
+
+def get_pass(name):
+    """Returns the registered pass of the name."""
+    if name not in _passes:
+        raise ValueError(
+            'Unknown optimization pass: {}. Registered passes are {}'.format(
+                name, ', '.join(_passes.keys())))
+    return _passes[name]
+
+
+def registered_passes():
+    """Returns names of registered passes."""
+    return list(_passes.keys())
+
+
+class PassStats(object):
+
+    """Statistics of an optimization pass collected by :class:`PassManager`.
+
+    Attributes:
+        calls (int): The number of runs.
+        time (float): The total elapsed time in seconds.
+        removed_nodes (int): The total number of removed nodes, can be
+            negative when a pass adds nodes.
+        removed_initializers (int): The total number of removed initializers.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.time = 0.
+        self.removed_nodes = 0
+        self.removed_initializers = 0
+
+    def to_dict(self):
+        return {'calls': self.calls, 'time': self.time,
+                'removed_nodes': self.removed_nodes,
+                'removed_initializers': self.removed_initializers}
+
+    def __repr__(self):
+        return 'PassStats(calls={}, time={:.6f}, removed_nodes={}, '\
+            'removed_initializers={})'.format(
+                self.calls, self.time, self.removed_nodes,
+                self.removed_initializers)
+
+
+class PassManager(object):
+
+    """Runs optimization passes over an ONNX model.
+
+    >>> pm = PassManager(['eliminate_identity', 'eliminate_dead_nodes'])
+    >>> onnx_chainer.export(model, x, optimize=pm)
+    >>> pm.stats['eliminate_identity'].time
+
+    Args:
+        passes (list): Passes to be run in order, each of them is either a
+            name of a registered pass or a function. A pair of it and a dict
+            of options given to the pass as keyword arguments can be given
+            as well, e.g. ``('fuse_attention', {'domain': 'com.example'})``.
+            If ``None``, :data:`DEFAULT_PASSES` are used.
+
+    Attributes:
+        stats (~collections.OrderedDict): :class:`PassStats` keyed by pass
+            names, collected over all runs of the manager.
+    """
+
+    def __init__(self, passes=None):
+        if passes is None:
+            passes = DEFAULT_PASSES
+        self.passes = []
+        for p in passes:
+            options = None
+            if isinstance(p, tuple):
+                p, options = p
+            if callable(p):
+                name, fn = p.__name__, p
+            else:
+                name, fn = p, get_pass(p)
+            if options:
+                fn = functools.partial(fn, **options)
+            self.passes.append((name, fn))
+        self.stats = OrderedDict(
+            (name, PassStats()) for name, _ in self.passes)
+
+    @property
+    def pass_names(self):
+        return [name for name, _ in self.passes]
+
+    def run(self, onnx_model):
+        """Runs passes over the model.
+
+        Args:
+            onnx_model (~onnx.ModelProto): The model, rewritten in place.
+
+        Returns:
+            ~onnx.ModelProto: The given model.
+        """
+        graph = onnx_model.graph
+        for name, fn in self.passes:
+            n_nodes = len(graph.node)
+            n_initializers = len(graph.initializer)
+            start = time.time()
+            fn(onnx_model)
+            stats = self.stats[name]
+            stats.time += time.time() - start
+            stats.calls += 1
+            stats.removed_nodes += n_nodes - len(graph.node)
+            stats.removed_initializers += \
+                n_initializers - len(graph.initializer)
+        return onnx_model
+
+    def __call__(self, onnx_model):
+        return self.run(onnx_model)
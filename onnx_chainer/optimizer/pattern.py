@@ -0,0 +1,175 @@
+from onnx_chainer.optimizer import graph_utils
+
+
+class Var(object):
+
+    """A pattern matching any value.
+
+    Vars of the same name in a pattern must match the same value.
+
+    Args:
+        name (str): The name to which the value name is bound.
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+
+class Const(Var):
+
+    """A pattern matching a constant value.
+
+    The value is bound as a numpy array to the name with ``_value`` suffix,
+    in addition to its name.
+    """
+
+
+class Op(object):
+
+    """A pattern matching a value produced by a node.
+
+    ``Expand`` nodes in front of the value are looked through unless
+    ``op_type`` is ``Expand``, since arithmetic operators broadcast their
+    inputs anyway.
+
+    Args:
+        op_type (str): The type of the node.
+        inputs (list): Patterns of inputs of the node. If ``None``, inputs
+            are not checked.
+        name (str): If set, the node is bound to the name and its output to
+            the name with ``_output`` suffix.
+        commutative (bool): If True, two inputs are also matched in reverse.
+    """
+
+    def __init__(self, op_type, inputs=None, name=None, commutative=False):
+        self.op_type = op_type
+        self.inputs = inputs
+        self.name = name
+        self.commutative = commutative
+
+
+class OneOf(object):
+
+    """A pattern matching the first of patterns which matches the value."""
+
+    def __init__(self, *patterns):
+        self.patterns = patterns
+
+
+class Matcher(object):
+
+    """Matches patterns with subgraphs of the graph.
+
+    Args:
+        graph (~onnx.GraphProto): The graph, which must not be modified
+            while the matcher is used.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.producers = graph_utils.get_producers(graph)
+        self.consumers = graph_utils.get_consumers(graph)
+        self.initializers = graph_utils.get_initializers(graph)
+        self.graph_outputs = graph_utils.get_graph_output_names(graph)
+
+    def match(self, pattern, name):
+        """Matches the pattern with the subgraph computing the value.
+
+        Args:
+            pattern: The pattern.
+            name (str): The name of the value.
+
+        Returns:
+            dict: Bound names, values and nodes keyed by names in the
+            pattern. Matched nodes are listed under ``'nodes'``. ``None`` if
+            the pattern does not match.
+        """
+        return self._match(pattern, name, {'nodes': []})
+
+    def _match(self, pattern, name, bindings):
+        if isinstance(pattern, OneOf):
+            for p in pattern.patterns:
+                matched = self._match(p, name, bindings)
+                if matched is not None:
+                    return matched
+            return None
+        if isinstance(pattern, Var):
+            return self._bind_var(pattern, name, bindings)
+
+        node = self.producers.get(name, None)
+        expands = []
+        while node is not None and node.op_type == 'Expand' and\
+                pattern.op_type != 'Expand':
+            expands.append(node)
+            node = self.producers.get(node.input[0], None)
+        if node is None or node.op_type != pattern.op_type:
+            return None
+        bindings = dict(bindings)
+        bindings['nodes'] = bindings['nodes'] + expands + [node]
+        if pattern.name is not None:
+            bindings[pattern.name] = node
+            bindings = self._bind(
+                pattern.name + '_output', node.output[0], bindings)
+            if bindings is None:
+                return None
+        if pattern.inputs is None:
+            return bindings
+        if len(node.input) != len(pattern.inputs):
+            return None
+        orders = [list(node.input)]
+        if pattern.commutative and len(node.input) == 2:
+            orders.append(list(reversed(node.input)))
+        for inputs in orders:
+            matched = bindings
+            for p, input_name in zip(pattern.inputs, inputs):
+                matched = self._match(p, input_name, matched)
+                if matched is None:
+                    break
+            if matched is not None:
+                return matched
+        return None
+
+    def _bind(self, key, value, bindings):
+        if key in bindings:
+            return bindings if bindings[key] == value else None
+        bindings = dict(bindings)
+        bindings[key] = value
+        return bindings
+
+    def _bind_var(self, pattern, name, bindings):
+        if isinstance(pattern, Const):
+            value = graph_utils.get_constant_value(
+                self.graph, name, self.initializers, self.producers)
+            if value is None:
+                return None
+            bindings = self._bind(pattern.name, name, bindings)
+            if bindings is not None:
+                bindings[pattern.name + '_value'] = value
+            return bindings
+        return self._bind(pattern.name, name, bindings)
+
+    def is_internal(self, matched, root):
+        """Checks if matched nodes except the root are used only inside.
+
+        Args:
+            matched (dict): The result of :meth:`match`.
+            root (~onnx.NodeProto): The node whose outputs can be used
+                outside.
+
+        Returns:
+            bool: True if outputs of other nodes are neither graph outputs
+            nor used by nodes which are not matched.
+        """
+        # Nodes are identified by their first outputs, since protobuf can
+        # return different objects for the same node
+        keys = set(node.output[0] for node in matched['nodes'])
+        for node in matched['nodes']:
+            if node.output[0] == root.output[0]:
+                continue
+            for output in node.output:
+                if output in self.graph_outputs:
+                    return False
+                if any(n.output[0] not in keys
+                       for n in self.consumers.get(output, [])):
+                    return False
+        return True
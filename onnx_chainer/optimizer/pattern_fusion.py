@@ -0,0 +1,338 @@
+import numpy as np
+from onnx import helper
+
+from onnx_chainer.optimizer import graph_utils
+from onnx_chainer.optimizer.pass_manager import register_pass
+from onnx_chainer.optimizer.pattern import Const
+from onnx_chainer.optimizer.pattern import Matcher
+from onnx_chainer.optimizer.pattern import OneOf
+from onnx_chainer.optimizer.pattern import Op
+from onnx_chainer.optimizer.pattern import Var
+
+
+# Default domain of operators emitted by passes fusing subgraphs, used if
+# neither the option of the passes nor ``external_opset_imports`` of export
+# gives the domain where the runtime registers kernels of the operators
+FUSED_OPS_DOMAIN = 'org.chainer'
+FUSED_OPS_VERSION = 1
+
+# Domains of ONNX, which are not regarded as domains of fused operators
+_ONNX_DOMAINS = ('', 'ai.onnx', 'ai.onnx.ml')
+
+
+def _mean(x, name):
+    # ``F.mean`` of Chainer is the sum multiplied by a constant
+    return OneOf(
+        Op('ReduceMean', [x], name=name),
+        Op('Mul', [Op('ReduceSum', [x], name=name), Const(name + '_factor')],
+           commutative=True),
+    )
+
+
+_LAYER_NORM = Op('Div', [
+    Op('Sub', [Var('x'), _mean(Var('x'), 'mean')], name='centered'),
+    Op('Sqrt', [Op('Add', [
+        _mean(OneOf(
+            Op('Mul', [Var('centered_output'), Var('centered_output')]),
+            Op('Pow', [Var('centered_output'), Const('exponent')]),
+        ), 'variance'),
+        Const('eps'),
+    ], commutative=True)]),
+], name='normalized')
+
+_SCORES = Op('MatMul', [Var('q'), Op('Transpose', [Var('k')], name='k_t')])
+_SCALED_SCORES = OneOf(
+    Op('Mul', [_SCORES, Const('scale')], commutative=True),
+    Op('Div', [_SCORES, Const('divisor')]),
+    _SCORES,
+)
+_ATTENTION = Op('MatMul', [
+    Op('Softmax', [OneOf(
+        Op('Add', [_SCALED_SCORES, Var('mask')], commutative=True),
+        _SCALED_SCORES,
+    )], name='softmax'),
+    Var('v'),
+], name='output')
+
+
+def _get_domain(onnx_model, domain, version):
+    """Returns the domain and the version of fused operators."""
+    if domain is None:
+        domains = [o.domain for o in onnx_model.opset_import
+                   if o.domain not in _ONNX_DOMAINS]
+        if len(domains) > 1:
+            raise ValueError(
+                'The model imports multiple custom domains: {}. Give the '
+                'domain of fused operators by the domain option of the '
+                'pass.'.format(', '.join(domains)))
+        domain = domains[0] if domains else FUSED_OPS_DOMAIN
+    if version is None:
+        version = graph_utils.get_opset_version(onnx_model, domain)
+    if version is None:
+        version = FUSED_OPS_VERSION
+    return domain, version
+
+
+class _Fusion(object):
+
+    """Collects fused nodes replacing matched subgraphs of the graph."""
+
+    def __init__(self, onnx_model, domain, version):
+        self.onnx_model = onnx_model
+        self.domain, self.version = _get_domain(onnx_model, domain, version)
+        self.graph = onnx_model.graph
+        self.matcher = Matcher(self.graph)
+        self.value_infos = graph_utils.infer_value_infos(onnx_model)
+        # New nodes keyed by outputs of root nodes which they replace
+        self.replacements = {}
+        self.removed = set()
+
+    def get_shape(self, name):
+        value_info = self.value_infos.get(name, None)
+        if value_info is None:
+            return None
+        return graph_utils.get_shape(value_info)
+
+    def is_last_axis(self, axis, name):
+        if axis == -1:
+            return True
+        shape = self.get_shape(name)
+        return shape is not None and axis == len(shape) - 1
+
+    def get_constant(self, name):
+        # Constants broadcast by ``Expand`` are taken as they are
+        producer = self.matcher.producers.get(name, None)
+        while producer is not None and producer.op_type == 'Expand':
+            name = producer.input[0]
+            producer = self.matcher.producers.get(name, None)
+        return graph_utils.get_constant_value(
+            self.graph, name, self.matcher.initializers,
+            self.matcher.producers)
+
+    def get_single_consumer(self, name):
+        consumers = self.matcher.consumers.get(name, [])
+        if len(consumers) != 1 or name in self.matcher.graph_outputs:
+            return None
+        return consumers[0]
+
+    def add_constant(self, array, base):
+        name = graph_utils.make_unique_name(self.graph, base)
+        graph_utils.add_initializer(self.graph, array, name)
+        return name
+
+    def replace(self, nodes, root, new_nodes):
+        """Replaces nodes by new nodes producing the output of the root."""
+        keys = set(node.output[0] for node in nodes)
+        if keys & self.removed:
+            return False
+        self.removed |= keys
+        root = root.output[0]
+        self.replacements[root] = new_nodes
+        value_info = self.value_infos.get(root, None)
+        if value_info is not None and root not in self.matcher.graph_outputs:
+            self.graph.value_info.extend([value_info])
+        return True
+
+    def apply(self):
+        """Rewrites the graph, returning the number of fused subgraphs."""
+        if not self.replacements:
+            return 0
+        nodes = []
+        for node in self.graph.node:
+            key = node.output[0]
+            if key in self.replacements:
+                nodes.extend(self.replacements[key])
+            elif key not in self.removed:
+                nodes.append(node)
+        graph_utils.set_nodes(self.graph, nodes)
+        graph_utils.add_opset_import(
+            self.onnx_model, self.domain, self.version)
+        return len(self.replacements)
+
+
+def _get_axes(node):
+    axes = graph_utils.get_attribute(node, 'axes')
+    if isinstance(axes, int):
+        return [axes]
+    return None if axes is None else list(axes)
+
+
+def _to_channel_vector(value, n_channels):
+    """Returns the constant broadcast along the last axis as a vector."""
+    if value.size == 1:
+        if n_channels is None:
+            return None
+        return np.full(n_channels, value.reshape(()), dtype=value.dtype)
+    rows = value.reshape(-1, value.shape[-1])
+    if n_channels is not None and rows.shape[1] != n_channels:
+        return None
+    if not (rows == rows[0]).all():
+        return None
+    return rows[0]
+
+
+def _fuse_layer_norm(fusion, node):
+    matcher = fusion.matcher
+    matched = matcher.match(_LAYER_NORM, node.output[0])
+    if matched is None:
+        return False
+    axes = _get_axes(matched['mean'])
+    if axes is None or len(axes) != 1 or\
+            axes != _get_axes(matched['variance']):
+        return False
+    if any(graph_utils.get_attribute(n, 'keepdims', 1) != 1
+           for n in (matched['mean'], matched['variance'])):
+        return False
+    x = matched['x']
+    if not fusion.is_last_axis(axes[0], x):
+        return False
+    shape = fusion.get_shape(x)
+    n_channels = shape[-1] if shape else None
+    for name in ('mean', 'variance'):
+        factor = matched.get(name + '_factor_value', None)
+        if factor is None:
+            continue
+        if n_channels is None or factor.size != 1 or\
+                not np.isclose(float(factor.reshape(())) * n_channels, 1):
+            return False
+    exponent = matched.get('exponent_value', None)
+    if exponent is not None and\
+            (exponent.size != 1 or float(exponent.reshape(())) != 2):
+        return False
+    if matched['eps_value'].size != 1:
+        return False
+
+    # Scaling and shifting which follow the normalization are fused too
+    nodes = matched['nodes']
+    root = node
+    scale = shift = None
+    consumer = fusion.get_single_consumer(root.output[0])
+    if consumer is not None and consumer.op_type == 'Mul':
+        other = [n for n in consumer.input if n != root.output[0]]
+        if len(other) == 1:
+            scale = fusion.get_constant(other[0])
+        if scale is not None:
+            nodes = nodes + [consumer]
+            root = consumer
+            consumer = fusion.get_single_consumer(root.output[0])
+    if consumer is not None and consumer.op_type == 'Add':
+        other = [n for n in consumer.input if n != root.output[0]]
+        if len(other) == 1:
+            shift = fusion.get_constant(other[0])
+        if shift is not None:
+            nodes = nodes + [consumer]
+            root = consumer
+    if not matcher.is_internal({'nodes': nodes}, root):
+        return False
+
+    dtype = matched['eps_value'].dtype
+    if scale is None:
+        scale = np.ones((), dtype=dtype)
+    if shift is None:
+        shift = np.zeros((), dtype=dtype)
+    scale = _to_channel_vector(scale, n_channels)
+    shift = _to_channel_vector(shift, n_channels)
+    if scale is None or shift is None or scale.shape != shift.shape:
+        return False
+
+    base = root.name or root.output[0]
+    inputs = [x, fusion.add_constant(scale, base + '_scale'),
+              fusion.add_constant(shift, base + '_shift')]
+    fused = helper.make_node(
+        'LayerNormalization', inputs, [root.output[0]], name=root.name,
+        domain=fusion.domain, axis=-1,
+        epsilon=float(matched['eps_value'].reshape(())))
+    return fusion.replace(nodes, root, [fused])
+
+
+def _fuse_attention(fusion, node):
+    matcher = fusion.matcher
+    matched = matcher.match(_ATTENTION, node.output[0])
+    if matched is None or not matcher.is_internal(matched, node):
+        return False
+    softmax = matched['softmax']
+    axis = graph_utils.get_attribute(softmax, 'axis', 1)
+    if not fusion.is_last_axis(axis, softmax.input[0]):
+        return False
+    scale = 1.
+    if 'scale' in matched:
+        scale = matched['scale_value']
+    elif 'divisor' in matched:
+        scale = 1. / matched['divisor_value']
+    if np.size(scale) != 1:
+        return False
+
+    # Key is given to the fused operator before it is transposed
+    perm = graph_utils.get_attribute(matched['k_t'], 'perm')
+    if perm is None or len(perm) < 2:
+        return False
+    perm = list(perm)
+    perm[-2:] = perm[-1], perm[-2]
+    new_nodes = []
+    k = matched['k']
+    if perm != list(range(len(perm))):
+        k_t = matched['k_t']
+        k = graph_utils.make_unique_name(fusion.graph, k_t.output[0] + '_key')
+        new_nodes.append(helper.make_node(
+            'Transpose', [matched['k']], [k], name=k_t.name, perm=perm))
+
+    inputs = [matched['q'], k, matched['v']]
+    if 'mask' in matched:
+        inputs.append(matched['mask'])
+    new_nodes.append(helper.make_node(
+        'ScaledDotProductAttention', inputs, [node.output[0]],
+        name=node.name, domain=fusion.domain,
+        scale=float(np.reshape(scale, ()))))
+    return fusion.replace(matched['nodes'], node, new_nodes)
+
+
+def _fuse(onnx_model, root_op_type, fuse, domain, version):
+    fusion = _Fusion(onnx_model, domain, version)
+    for node in list(onnx_model.graph.node):
+        if node.op_type == root_op_type:
+            fuse(fusion, node)
+    return fusion.apply()
+
+
+@register_pass('fuse_layer_norm')
+def fuse_layer_norm(onnx_model, domain=None, version=None):
+    """Fuses layer normalization written with arithmetic operators.
+
+    The subgraph ``(x - mean(x)) / sqrt(mean((x - mean(x)) ** 2) + eps)``
+    reducing the last axis, optionally followed by multiplication and
+    addition of constants broadcast along the axis, is replaced by
+    ``LayerNormalization``. Its inputs are ``X``, ``Scale`` and ``B`` of the
+    shape of the last axis, and attributes are ``axis`` and ``epsilon``.
+
+    The pass is not run by default since runtimes have to implement the
+    operator. Replaced constants are left to be removed by
+    ``eliminate_dead_nodes``.
+
+    Args:
+        onnx_model (~onnx.ModelProto): The model.
+        domain (str): The domain of the fused operator, where the runtime
+            registers its kernel. If ``None``, the custom domain imported by
+            the model, e.g. by ``export(..., external_opset_imports=...)``,
+            is used, or :data:`FUSED_OPS_DOMAIN` if there is none.
+        version (int): The opset version of the domain imported unless the
+            model imports it. If ``None``, :data:`FUSED_OPS_VERSION` is
+            used.
+    """
+    _fuse(onnx_model, 'Div', _fuse_layer_norm, domain, version)
+
+
+@register_pass('fuse_attention')
+def fuse_attention(onnx_model, domain=None, version=None):
+    """Fuses scaled dot-product attention written with matrix products.
+
+    The subgraph ``matmul(softmax(matmul(q, transpose(k)) * scale + mask),
+    v)`` with the softmax along the last axis is replaced by
+    ``ScaledDotProductAttention``. Its inputs are ``Q``, ``K`` and ``V`` of
+    ``(..., L, D)`` shape and the optional additive ``mask``, and the
+    attribute is ``scale``, where ``K`` is not transposed. The scale may be
+    given by multiplication or division, and the mask may be omitted.
+
+    The pass is not run by default since runtimes have to implement the
+    operator. Options are the same as :func:`fuse_layer_norm`.
+    """
+    _fuse(onnx_model, 'MatMul', _fuse_attention, domain, version)
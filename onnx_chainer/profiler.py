@@ -0,0 +1,209 @@
+from collections import OrderedDict
+import contextlib
+import json
+import threading
+import time
+import tracemalloc
+
+
+class ProfileRecord(object):
+
+    """Statistics of a phase or a converter collected by :class:`Profiler`.
+
+    Attributes:
+        calls (int): The number of calls.
+        time (float): The total elapsed wall time in seconds.
+        allocated (int): The total difference of traced memory in bytes
+            before and after calls, can be negative when memory is released.
+            ``None`` if memory is not traced.
+        peak (int): The maximum peak of traced memory in bytes during calls
+            relative to the memory at the beginning of calls. ``None`` if
+            memory is not traced. Before Python 3.9, where the peak of
+            :mod:`tracemalloc` cannot be reset, this is the peak since
+            tracing started.
+    """
+
+    __slots__ = ('calls', 'time', 'allocated', 'peak')
+
+    def __init__(self, trace_memory):
+        self.calls = 0
+        self.time = 0.
+        self.allocated = 0 if trace_memory else None
+        self.peak = 0 if trace_memory else None
+
+    def to_dict(self):
+        return {'calls': self.calls, 'time': self.time,
+                'allocated': self.allocated, 'peak': self.peak}
+
+    def __repr__(self):
+        return 'ProfileRecord(calls={}, time={:.6f}, allocated={}, '\
+            'peak={})'.format(self.calls, self.time, self.allocated,
+                              self.peak)
+
+
+class Profiler(object):
+
+    """Collects time and memory usage of phases of export.
+
+    Phases are recorded by names, e.g. ``'forward'``, ``'trace'``,
+    ``'initializers'``, ``'optimize'``, ``'check'`` and ``'save'``, and calls
+    of converters by names of Chainer functions. Records of the same name are
+    accumulated, so a profiler can be used over multiple exports.
+
+    Args:
+        trace_memory (bool): If True, differences and peaks of memory traced
+            by :mod:`tracemalloc` are recorded as well. Tracing memory slows
+            down export considerably.
+
+    Attributes:
+        phases (dict): :class:`ProfileRecord` objects keyed by names of
+            phases.
+        converters (dict): :class:`ProfileRecord` objects keyed by names of
+            Chainer functions.
+    """
+
+    def __init__(self, trace_memory=True):
+        self.trace_memory = trace_memory
+        self.phases = OrderedDict()
+        self.converters = OrderedDict()
+        # Peaks of traced memory of records being recorded
+        self._peaks = []
+
+    @contextlib.contextmanager
+    def _record(self, records, name):
+        record = records.get(name, None)
+        if record is None:
+            record = ProfileRecord(self.trace_memory)
+            records[name] = record
+        trace_memory = self.trace_memory and tracemalloc.is_tracing()
+        if trace_memory:
+            start_memory = self._enter_memory()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            record.time += time.perf_counter() - start
+            record.calls += 1
+            if trace_memory:
+                memory, peak = self._exit_memory()
+                record.allocated += memory - start_memory
+                record.peak = max(record.peak, peak - start_memory)
+
+    def _enter_memory(self):
+        memory, peak = tracemalloc.get_traced_memory()
+        if self._peaks:
+            # The peak is reset for the inner record, so the peak so far is
+            # kept for the enclosing one
+            self._peaks[-1] = max(self._peaks[-1], peak)
+        self._peaks.append(memory)
+        if hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+        return memory
+
+    def _exit_memory(self):
+        memory, peak = tracemalloc.get_traced_memory()
+        peak = max(self._peaks.pop(), peak)
+        if self._peaks:
+            self._peaks[-1] = max(self._peaks[-1], peak)
+        return memory, peak
+
+    def phase(self, name):
+        """Returns a context manager recording a phase of the name."""
+        return self._record(self.phases, name)
+
+    def converter(self, func_name):
+        """Returns a context manager recording a converter of the name."""
+        return self._record(self.converters, func_name)
+
+    def report(self):
+        """Returns the collected statistics.
+
+        Returns:
+            dict: Dictionaries of records of phases and converters, which
+            can be serialized as JSON.
+        """
+        return {
+            'trace_memory': self.trace_memory,
+            'phases': OrderedDict(
+                (k, v.to_dict()) for k, v in self.phases.items()),
+            'converters': OrderedDict(
+                (k, v.to_dict()) for k, v in self.converters.items()),
+        }
+
+    def to_json(self, **kwargs):
+        """Returns :meth:`report` serialized as JSON.
+
+        Args:
+            **kwargs (dict): Arguments given to :func:`json.dumps`.
+        """
+        return json.dumps(self.report(), **kwargs)
+
+
+class _NullRecord(object):
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *args):
+        pass
+
+
+_null_record = _NullRecord()
+_thread_local = threading.local()
+
+
+def get_profiler():
+    """Returns the profiler active in the current thread or ``None``."""
+    return getattr(_thread_local, 'profiler', None)
+
+
+def phase(name):
+    """Records a phase by the active profiler if any."""
+    profiler = get_profiler()
+    if profiler is None:
+        return _null_record
+    return profiler.phase(name)
+
+
+def converter(func_name):
+    """Records a converter by the active profiler if any."""
+    profiler = get_profiler()
+    if profiler is None:
+        return _null_record
+    return profiler.converter(func_name)
+
+
+@contextlib.contextmanager
+def profile(profiler=None, trace_memory=True):
+    """Profiles exports run in the context in the current thread.
+
+    >>> with onnx_chainer.profile() as prof:
+    >>>     onnx_chainer.export(model, x)
+    >>> print(prof.to_json(indent=2))
+
+    :mod:`tracemalloc` is started if memory is traced and it is not tracing
+    yet, and stopped at the end of the context.
+
+    Args:
+        profiler (Profiler): The profiler to accumulate records. If ``None``,
+            a new one is created.
+        trace_memory (bool): Whether memory usage is traced, used when
+            ``profiler`` is ``None``.
+
+    Yields:
+        The :class:`Profiler` object.
+    """
+    if profiler is None:
+        profiler = Profiler(trace_memory=trace_memory)
+    started = False
+    if profiler.trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        started = True
+    previous = get_profiler()
+    _thread_local.profiler = profiler
+    try:
+        yield profiler
+    finally:
+        _thread_local.profiler = previous
+        if started:
+            tracemalloc.stop()
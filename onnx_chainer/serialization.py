@@ -0,0 +1,186 @@
+import chainer
+import numpy as np
+import onnx
+from onnx.mapping import NP_TYPE_TO_TENSOR_TYPE
+
+
+_WIRETYPE_LENGTH_DELIMITED = 2
+
+_RAW_DATA_FIELD = onnx.TensorProto.DESCRIPTOR.fields_by_name[
+    'raw_data'].number
+
+
+def encode_varint(value):
+    """Encodes a non-negative integer as a varint of protobuf.
+
+    Args:
+        value (int): The value to be encoded.
+
+    Returns:
+        bytes: The encoded value.
+    """
+    out = bytearray()
+    while True:
+        bits = value & 0x7f
+        value >>= 7
+        if value:
+            out.append(bits | 0x80)
+        else:
+            out.append(bits)
+            return bytes(out)
+
+
+def encode_length_delimited_key(field_number, length):
+    """Encodes the key and the length of a length-delimited field.
+
+    Args:
+        field_number (int): The field number.
+        length (int): The byte size of the field value.
+
+    Returns:
+        bytes: The encoded key and length, the value should follow.
+    """
+    key = (field_number << 3) | _WIRETYPE_LENGTH_DELIMITED
+    return encode_varint(key) + encode_varint(length)
+
+
+def as_buffer(array):
+    """Returns a byte buffer of the array in little endian.
+
+    No copy is made when the array is already a C-contiguous little endian
+    ``numpy.ndarray``.
+
+    Args:
+        array (numpy.ndarray or cupy.ndarray): The array.
+
+    Returns:
+        memoryview: Bytes of the array.
+    """
+    array = chainer.cuda.to_cpu(array)
+    if array.dtype.byteorder == '>':
+        array = array.astype(array.dtype.newbyteorder('<'))
+    array = np.ascontiguousarray(array)
+    # Reshaping a C-contiguous array makes a view, not a copy
+    return memoryview(array.reshape(-1).view(np.uint8))
+
+
+def make_tensor_header(array, name):
+    """Makes a ``TensorProto`` of the array without its payload.
+
+    Args:
+        array (numpy.ndarray or cupy.ndarray): The array.
+        name (str): The name of the tensor.
+
+    Returns:
+        ~onnx.TensorProto: The tensor which has no data.
+    """
+    tensor = onnx.TensorProto()
+    tensor.name = name
+    tensor.data_type = NP_TYPE_TO_TENSOR_TYPE[array.dtype]
+    tensor.dims.extend(array.shape)
+    return tensor
+
+
+def write_tensor(fp, array, name):
+    """Writes a serialized ``TensorProto`` of the array.
+
+    The payload is written from the buffer of the array directly, so
+    ``TensorProto.raw_data`` and the serialized bytes of the whole tensor are
+    never created in memory. The output can be read by
+    :func:`onnx.load_tensor`.
+
+    Args:
+        fp (file-like object): The output.
+        array (numpy.ndarray or cupy.ndarray): The array.
+        name (str): The name of the tensor.
+
+    Returns:
+        int: The number of written bytes.
+    """
+    buf = as_buffer(array)
+    header = make_tensor_header(array, name).SerializeToString()
+    key = encode_length_delimited_key(_RAW_DATA_FIELD, len(buf))
+    fp.write(header)
+    fp.write(key)
+    fp.write(buf)
+    return len(header) + len(key) + len(buf)
+
+
+def _serialize_fields(message, skip_fields):
+    """Serializes fields of the message except ``skip_fields``."""
+    out = type(message)()
+    for field, value in message.ListFields():
+        if field.name in skip_fields:
+            continue
+        if field.label == field.LABEL_REPEATED:
+            getattr(out, field.name).extend(value)
+        elif field.type == field.TYPE_MESSAGE:
+            getattr(out, field.name).CopyFrom(value)
+        else:
+            setattr(out, field.name, value)
+    return out.SerializeToString()
+
+
+def _field_number(message_type, name):
+    return message_type.DESCRIPTOR.fields_by_name[name].number
+
+
+def _write_tensor_proto(fp, tensor):
+    # ``raw_data`` is written by itself to avoid another copy of it in the
+    # serialized bytes of the whole tensor
+    header = _serialize_fields(tensor, ('raw_data',))
+    fp.write(header)
+    written = len(header)
+    # Each access to ``raw_data`` copies the bytes, so it is read only once
+    if tensor.HasField('raw_data'):
+        raw_data = tensor.raw_data
+        key = encode_length_delimited_key(_RAW_DATA_FIELD, len(raw_data))
+        fp.write(key)
+        fp.write(memoryview(raw_data))
+        written += len(key) + len(raw_data)
+    return written
+
+
+def write_model(fp, onnx_model):
+    """Writes a serialized ``ModelProto`` field by field.
+
+    Unlike ``fp.write(onnx_model.SerializeToString())``, the serialized bytes
+    of the whole model are never created. The model header and the graph
+    header are written first, then nodes and initializers are serialized and
+    written one at a time, so the peak memory is about the size of the
+    largest tensor. The output can be read by :func:`onnx.load_model`.
+
+    Args:
+        fp (file-like object): The output, only ``write`` method is used.
+        onnx_model (~onnx.ModelProto): The model to be written.
+
+    Returns:
+        int: The number of written bytes.
+    """
+    written = 0
+
+    def write(data):
+        fp.write(data)
+        return len(data)
+
+    written += write(_serialize_fields(onnx_model, ('graph',)))
+    if not onnx_model.HasField('graph'):
+        return written
+
+    graph = onnx_model.graph
+    written += write(encode_length_delimited_key(
+        _field_number(onnx.ModelProto, 'graph'), graph.ByteSize()))
+    written += write(_serialize_fields(graph, ('node', 'initializer')))
+
+    node_field = _field_number(onnx.GraphProto, 'node')
+    for node in graph.node:
+        written += write(encode_length_delimited_key(
+            node_field, node.ByteSize()))
+        written += write(node.SerializeToString())
+
+    initializer_field = _field_number(onnx.GraphProto, 'initializer')
+    for tensor in graph.initializer:
+        written += write(encode_length_delimited_key(
+            initializer_field, tensor.ByteSize()))
+        written += _write_tensor_proto(fp, tensor)
+    return written
@@ -0,0 +1,148 @@
+import os
+
+import chainer
+import onnx
+from onnx import numpy_helper
+from onnx.mapping import NP_TYPE_TO_TENSOR_TYPE
+
+from onnx_chainer.external_data import ExternalDataWriter
+from onnx_chainer.external_data import read_external_tensor
+from onnx_chainer import onnx_helper
+from onnx_chainer import serialization
+
+
+def update_initializers(onnx_model, model, strict=True, data_writer=None):
+    """Overwrites initializers of the ONNX model by parameters of the model.
+
+    Initializers are matched with parameters by the names which
+    :func:`~onnx_chainer.onnx_helper.cleanse_param_name` produces. Parameters
+    aliasing others are skipped since only the first one is exported.
+
+    Args:
+        onnx_model (~onnx.ModelProto): The target ONNX model, updated in
+            place.
+        model (~chainer.Chain): The model holding new parameters.
+        strict (bool): If True, raise an error when a parameter of the model
+            is not found in initializers.
+        data_writer (~onnx_chainer.external_data.ExternalDataWriter): If
+            set, payloads of initializers stored in data files are written
+            by it, and the others are kept inline.
+
+    Returns:
+        set: Names of updated initializers.
+    """
+    initializers = {t.name: t for t in onnx_model.graph.initializer}
+    aliases = onnx_helper.find_aliased_params(model)
+    missing = []
+    # Parameters are matched before any payload is written, so that data
+    # files are not rewritten on errors
+    matched = []
+    for name, param in model.namedparams():
+        onnx_name = onnx_helper.cleanse_param_name(name)
+        if onnx_name in aliases:
+            # Exported as the initializer of the first parameter
+            continue
+        tensor = initializers.get(onnx_name, None)
+        if tensor is None:
+            missing.append(name)
+            continue
+        if param.array is None:
+            raise ValueError(
+                'Parameter {} is not initialized'.format(name))
+        array = param.array
+        if tuple(tensor.dims) != array.shape or\
+                tensor.data_type != NP_TYPE_TO_TENSOR_TYPE[array.dtype]:
+            raise ValueError(
+                'Parameter {} does not match with the initializer {}: '
+                'expected shape {} and type {}, but shape {} and type {} '
+                'were given'.format(
+                    name, onnx_name, tuple(tensor.dims), tensor.data_type,
+                    array.shape, NP_TYPE_TO_TENSOR_TYPE[array.dtype]))
+        matched.append((tensor, onnx_name, array))
+    if strict and missing:
+        raise ValueError(
+            'Parameters are not found in initializers of the ONNX model: '
+            '{}'.format(', '.join(missing)))
+
+    updated = set()
+    for tensor, onnx_name, array in matched:
+        if data_writer is not None and\
+                tensor.data_location == onnx.TensorProto.EXTERNAL:
+            tensor.CopyFrom(data_writer.make_tensor(array, onnx_name))
+        else:
+            tensor.CopyFrom(numpy_helper.from_array(
+                chainer.cuda.to_cpu(array), onnx_name))
+        updated.add(onnx_name)
+    return updated
+
+
+def update_weights(model, onnx_path, out_path=None, strict=True):
+    """Rewrite weights of an exported ONNX model.
+
+    This function replaces only payloads of initializers by the parameters of
+    ``model``. Unlike :func:`~onnx_chainer.export`, neither forward
+    computation nor graph conversion nor format check is run, so the graph of
+    the ONNX model must be the same as ``model``'s.
+
+    Initializers stored in data files are kept in a data file next to
+    ``out_path``, and other initializers are kept inline.
+
+    >>> onnx_chainer.export(model, x, filename='model.onnx')
+    >>> # train the model
+    >>> onnx_chainer.update_weights(model, 'model.onnx')
+
+    Args:
+        model (~chainer.Chain): The model holding new parameters.
+        onnx_path (str): The filename of the ONNX model exported from
+            ``model``.
+        out_path (str): The filename to save the updated ONNX model. If
+            ``None``, ``onnx_path`` is overwritten.
+        strict (bool): If True, raise an error when a parameter of the model
+            is not found in initializers.
+
+    Returns:
+        ~onnx.ModelProto: The updated ONNX model.
+    """
+    with open(onnx_path, 'rb') as fp:
+        onnx_model = onnx.load_model(fp, load_external_data=False)
+    if out_path is None:
+        out_path = onnx_path
+
+    external = [t for t in onnx_model.graph.initializer
+                if t.data_location == onnx.TensorProto.EXTERNAL]
+    if not external:
+        update_initializers(onnx_model, model, strict=strict)
+        with open(out_path, 'wb') as fp:
+            serialization.write_model(fp, onnx_model)
+        return onnx_model
+
+    # Payloads which are not parameters are read before data files are
+    # rewritten, which can be the same files when ``out_path`` is not given
+    base_dir = os.path.dirname(os.path.abspath(onnx_path))
+    old_locations = set()
+    for tensor in external:
+        old_locations.update(
+            e.value for e in tensor.external_data if e.key == 'location')
+    param_names = {onnx_helper.cleanse_param_name(name)
+                   for name, _ in model.namedparams()}
+    constants = [t for t in external if t.name not in param_names]
+    for tensor in constants:
+        array = read_external_tensor(tensor, base_dir)
+        tensor.CopyFrom(numpy_helper.from_array(array, tensor.name))
+
+    with ExternalDataWriter(out_path, size_threshold=0) as data_writer:
+        update_initializers(
+            onnx_model, model, strict=strict, data_writer=data_writer)
+        for tensor in constants:
+            data_writer.externalize(tensor)
+    with open(out_path, 'wb') as fp:
+        serialization.write_model(fp, onnx_model)
+
+    # Data files of the overwritten model which are not referred any more
+    # are removed
+    if os.path.abspath(out_path) == os.path.abspath(onnx_path):
+        for location in old_locations - set(data_writer.locations):
+            path = os.path.join(base_dir, location)
+            if os.path.isfile(path):
+                os.remove(path)
+    return onnx_model
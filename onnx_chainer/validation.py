@@ -0,0 +1,152 @@
+import warnings
+
+import onnx
+from onnx import checker
+
+
+# Modes of ``export(..., check=...)``
+CHECK_MODES = ('full', 'structure-only', 'off')
+
+
+def validate_check_mode(check):
+    if check is True:
+        return 'full'
+    if check is False or check is None:
+        return 'off'
+    if check not in CHECK_MODES:
+        raise ValueError(
+            'check must be one of {}, but \'{}\' was given.'.format(
+                ', '.join('\'{}\''.format(m) for m in CHECK_MODES), check))
+    return check
+
+
+def make_checker_context(opset_version):
+    """Returns the context to check nodes of the opset version."""
+    ctx = checker.C.CheckerContext()
+    ctx.ir_version = onnx.IR_VERSION
+    ctx.opset_imports = {'': opset_version}
+    return ctx
+
+
+def check_nodes(nodes, ctx, func_name):
+    """Checks nodes created by a converter.
+
+    Only nodes of the default domain are checked, since schemas of custom
+    operators are unknown.
+
+    Args:
+        nodes (list): ``onnx.NodeProto`` objects.
+        ctx: The checker context made by :func:`make_checker_context`.
+        func_name (str): The name of Chainer function converted to the
+            nodes, used in the error message.
+    """
+    for node in nodes:
+        if node.domain not in ('', 'ai.onnx'):
+            continue
+        try:
+            checker.check_node(node, ctx)
+        except checker.ValidationError as e:
+            raise checker.ValidationError(
+                'The converter of {} created an invalid {} node: {}'.format(
+                    func_name, node.op_type, e))
+
+
+def _make_placeholder(tensor):
+    # Placeholders of external tensors are inline as well, since the
+    # checker looks for data files relative to the current directory
+    placeholder = onnx.TensorProto()
+    placeholder.name = tensor.name
+    placeholder.data_type = tensor.data_type
+    placeholder.dims.extend(tensor.dims)
+    nelem = 1
+    for d in tensor.dims:
+        nelem *= d
+    if nelem == 0:
+        return placeholder
+    # The checker does not compare sizes of data with dims, so a value is
+    # enough to pass checks of data fields
+    if tensor.data_type == onnx.TensorProto.STRING:
+        placeholder.string_data.append(b'')
+    else:
+        placeholder.raw_data = b'\0'
+    return placeholder
+
+
+def _is_external(tensor):
+    return tensor.data_location == onnx.TensorProto.EXTERNAL
+
+
+def strip_initializers(onnx_model, external_only=False):
+    """Returns a copy of the model whose initializers have no payloads.
+
+    Args:
+        onnx_model (~onnx.ModelProto): The model.
+        external_only (bool): If True, only initializers whose payloads are
+            in data files are replaced.
+
+    Returns:
+        ~onnx.ModelProto: The model sharing the structure, where initializers
+        have the same names, types and shapes with dummy data.
+    """
+    stripped = onnx.ModelProto()
+    for field, value in onnx_model.ListFields():
+        if field.name == 'graph':
+            continue
+        if field.label == field.LABEL_REPEATED:
+            getattr(stripped, field.name).extend(value)
+        elif field.type == field.TYPE_MESSAGE:
+            getattr(stripped, field.name).CopyFrom(value)
+        else:
+            setattr(stripped, field.name, value)
+    graph = stripped.graph
+    for field, value in onnx_model.graph.ListFields():
+        if field.name == 'initializer':
+            graph.initializer.extend(
+                _make_placeholder(t) if _is_external(t) or not external_only
+                else t for t in value)
+        elif field.label == field.LABEL_REPEATED:
+            getattr(graph, field.name).extend(value)
+        elif field.type == field.TYPE_MESSAGE:
+            getattr(graph, field.name).CopyFrom(value)
+        else:
+            setattr(graph, field.name, value)
+    return stripped
+
+
+def _has_custom_domain_nodes(onnx_model):
+    return any(node.domain not in ('', 'ai.onnx', 'ai.onnx.ml')
+               for node in onnx_model.graph.node)
+
+
+def check_model(onnx_model, check, external_converters=None):
+    """Checks the exported model.
+
+    Args:
+        onnx_model (~onnx.ModelProto): The model.
+        check (str): One of :data:`CHECK_MODES`. On ``'structure-only'``,
+            payloads of initializers are not serialized to be checked.
+            Payloads in data files are not checked on ``'full'`` either,
+            since they are written from arrays by the exporter.
+        external_converters (dict): If set, validation errors are warned
+            instead of raised, since custom operators are not registered.
+            Errors are warned as well when nodes of domains other than ONNX
+            are in the graph, e.g. made by fusion passes.
+    """
+    if check == 'off':
+        return
+    if check == 'structure-only':
+        onnx_model = strip_initializers(onnx_model)
+    elif any(_is_external(t) for t in onnx_model.graph.initializer):
+        onnx_model = strip_initializers(onnx_model, external_only=True)
+    try:
+        checker.check_model(onnx_model)
+    except checker.ValidationError as e:
+        if external_converters is None and\
+                not _has_custom_domain_nodes(onnx_model):
+            raise e
+        else:
+            warnings.warn(
+                'Unregistered operator error is occurred but ignored because '
+                'exporting with `external_converters` or custom operators, '
+                'please take care about ONNX format check is insufficient. '
+                'Error message:\n{}'.format(str(e)))
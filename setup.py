@@ -61,6 +61,7 @@ setup(
     packages=[
         'onnx_chainer',
         'onnx_chainer.functions',
+        'onnx_chainer.optimizer',
         'onnx_chainer.testing',
     ],
     version='1.4.0',
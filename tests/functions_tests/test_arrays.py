@@ -49,6 +49,16 @@ from tests.helper import ONNXModelTest
               'constant_values': -1},
      'name': 'pad_with_constant_values'},
 
+    # permutate
+    {'ops': 'permutate', 'input_shape': (3, 4),
+     'input_argname': 'x',
+     'args': {'indices': np.array([2, 0, 1], dtype=np.int32), 'axis': 0}},
+    {'ops': 'permutate', 'input_shape': (3, 4),
+     'input_argname': 'x',
+     'args': {'indices': np.array([3, 1, 0, 2], dtype=np.int32), 'axis': 1,
+              'inv': True},
+     'name': 'permutate_inv'},
+
     # reshape
     {'ops': 'reshape', 'input_shape': (1, 6),
      'input_argname': 'x',
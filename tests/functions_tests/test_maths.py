@@ -1,6 +1,7 @@
 import chainer
 from chainer import testing
 
+import onnx_chainer
 from onnx_chainer.testing import input_generator
 from tests.helper import ONNXModelTest
 
@@ -81,6 +82,9 @@ class TestUnaryMathOperators(ONNXModelTest):
     {'op_name': 'Div', 'ops': 'a / b'},
     {'op_name': 'MatMul',
      'ops': 'chainer.functions.matmul(a, b, transb=True)'},
+    {'op_name': 'MatMul',
+     'ops': 'chainer.functions.matmul(a, b, transa=True)',
+     'condition': 'transa'},
     {'op_name': 'Maximum', 'ops': 'chainer.functions.maximum(a, b)'},
     {'op_name': 'Minimum', 'ops': 'chainer.functions.minimum(a, b)'},
 )
@@ -107,9 +111,50 @@ class TestBinaryMathOperators(ONNXModelTest):
 
     def test_output(self):
         name = self.op_name.lower()
+        if hasattr(self, 'condition'):
+            name += '_' + self.condition
         self.expect(self.model, self.x, name=name)
 
 
+@testing.parameterize(
+    {'a_shape': (2, 4, 3), 'b_shape': (2, 3, 5), 'transa': False,
+     'transb': False, 'condition': 'batched'},
+    {'a_shape': (2, 3, 4), 'b_shape': (2, 5, 3), 'transa': True,
+     'transb': True, 'condition': 'batched_trans'},
+    {'a_shape': (3, 2, 4, 3), 'b_shape': (3, 5), 'transa': False,
+     'transb': False, 'condition': 'broadcast'},
+)
+class TestBatchedMatMul(ONNXModelTest):
+
+    def setUp(self):
+        class Model(chainer.Chain):
+
+            def __init__(self, transa, transb):
+                super(Model, self).__init__()
+                self.transa = transa
+                self.transb = transb
+
+            def __call__(self, a, b):
+                return chainer.functions.matmul(
+                    a, b, transa=self.transa, transb=self.transb)
+
+        self.model = Model(self.transa, self.transb)
+        a = input_generator.increasing(*self.a_shape)
+        b = input_generator.increasing(*self.b_shape)
+        self.x = (a, b)
+
+    def test_output(self):
+        self.expect(
+            self.model, self.x, name='matmul_' + self.condition)
+
+    def test_no_bias(self):
+        onnx_model = onnx_chainer.export(self.model, self.x)
+        op_types = [node.op_type for node in onnx_model.graph.node]
+        assert op_types.count('MatMul') == 1
+        assert op_types.count('Transpose') == self.transa + self.transb
+        assert len(onnx_model.graph.initializer) == 0
+
+
 @testing.parameterize(
     {'op_name': 'LinearInterpolate',
      'ops': 'chainer.functions.linear_interpolate(a, b, c)'},
@@ -0,0 +1,196 @@
+import sys
+import unittest
+
+import chainer
+import chainer.functions as F
+import chainer.links as L
+from chainer import testing
+import numpy as np
+import pytest
+
+import onnx_chainer
+from onnx_chainer import fused_rnn
+from onnx_chainer import onnx_helper
+from onnx_chainer.testing import input_generator
+from tests.helper import ONNXModelTest
+
+
+class NStepRNNModel(chainer.Chain):
+
+    def __init__(self, link, n_layers, in_size, out_size):
+        super(NStepRNNModel, self).__init__()
+        with self.init_scope():
+            self.rnn = link(n_layers, in_size, out_size, 0.)
+
+    def __call__(self, *xs):
+        outputs = self.rnn(None, None, list(xs))\
+            if isinstance(self.rnn, (L.NStepLSTM, L.NStepBiLSTM))\
+            else self.rnn(None, list(xs))
+        return list(outputs[:-1]) + list(outputs[-1])
+
+
+@testing.parameterize(*testing.product({
+    'link': [L.NStepLSTM, L.NStepBiLSTM, L.NStepGRU, L.NStepBiGRU,
+             L.NStepRNNTanh, L.NStepBiRNNReLU],
+    'lengths': [(3, 3), (2, 4, 3)],
+}))
+class TestNStepRNN(ONNXModelTest):
+
+    def setUp(self):
+        self.model = NStepRNNModel(self.link, 1, 4, 3)
+        self.xs = [input_generator.increasing(length, 4) / 10.
+                   for length in self.lengths]
+
+    def test_output(self):
+        name = '{}_{}'.format(
+            self.link.__name__, '_'.join(str(x) for x in self.lengths))
+        self.expect(self.model, self.xs, name=name)
+
+
+class TestNStepLSTMMultiLayer(ONNXModelTest):
+
+    def setUp(self):
+
+        class Model(chainer.Chain):
+
+            def __init__(self):
+                super(Model, self).__init__()
+                with self.init_scope():
+                    self.rnn = L.NStepBiLSTM(2, 4, 3, 0.)
+
+            def __call__(self, hx, cx, *xs):
+                hy, cy, ys = F.n_step_bilstm(
+                    2, 0., hx, cx, self.rnn.ws, self.rnn.bs, list(xs))
+                return [hy, cy] + list(ys)
+
+        self.model = Model()
+        batch_sizes = (3, 3, 2, 1)
+        self.args = [input_generator.increasing(4, 3, 3) / 10.,
+                     input_generator.increasing(4, 3, 3) / 10.]
+        self.args += [input_generator.increasing(size, 4) / 10.
+                      for size in batch_sizes]
+
+    def test_output(self):
+        self.expect(self.model, self.args)
+
+
+class TestNStepGRUConstantState(ONNXModelTest):
+
+    def setUp(self):
+
+        class Model(chainer.Chain):
+
+            def __init__(self):
+                super(Model, self).__init__()
+                with self.init_scope():
+                    self.rnn = L.NStepGRU(2, 4, 3, 0.)
+
+            def __call__(self, *xs):
+                # The array is exported as a constant sliced for each layer
+                hx = np.full((2, 3, 3), 0.5, dtype=np.float32)
+                hy, ys = F.n_step_gru(
+                    2, 0., hx, self.rnn.ws, self.rnn.bs, list(xs))
+                return [hy] + list(ys)
+
+        self.model = Model()
+        self.xs = [input_generator.increasing(length, 4) / 10.
+                   for length in (3, 2)]
+
+    def test_output(self):
+        self.expect(self.model, self.xs)
+
+
+class TestNStepRNNExport(unittest.TestCase):
+
+    def test_fused_node(self):
+        model = NStepRNNModel(L.NStepLSTM, 2, 4, 3)
+        xs = [input_generator.increasing(length, 4) for length in (3, 2)]
+        onnx_model = onnx_chainer.export(model, xs)
+
+        op_types = [node.op_type for node in onnx_model.graph.node]
+        assert op_types.count('LSTM') == 2
+        assert 'MatMul' not in op_types
+        # Weights are exported only as packed constants
+        initializer_names = {t.name for t in onnx_model.graph.initializer}
+        param_names = {onnx_helper.cleanse_param_name(name)
+                       for name, _ in model.namedparams()}
+        assert not initializer_names & param_names
+        shapes = {tuple(t.dims) for t in onnx_model.graph.initializer}
+        assert (1, 12, 4) in shapes  # W of the first layer
+        assert (1, 12, 3) in shapes  # R and W of the second layer
+        assert (1, 24) in shapes  # B
+
+    def test_link_states(self):
+        model = NStepRNNModel(L.NStepBiLSTM, 1, 4, 3)
+        xs = [input_generator.increasing(length, 4) for length in (2, 3)]
+        onnx_model = onnx_chainer.export(model, xs)
+
+        lstm, = [n for n in onnx_model.graph.node if n.op_type == 'LSTM']
+        # Initial states of zeros made by the link are omitted
+        assert len(lstm.input) <= 5
+        # Last states are permutated back to the order of the batch
+        gathers = [n for n in onnx_model.graph.node if n.op_type == 'Gather']
+        assert len(gathers) == 2
+        graph_outputs = [o.name for o in onnx_model.graph.output]
+        assert all(n.output[0] in graph_outputs for n in gathers)
+
+    def test_dropout_on_train(self):
+        model = NStepRNNModel(L.NStepGRU, 1, 4, 3)
+        model.rnn.dropout = 0.5
+        xs = [input_generator.increasing(length, 4) for length in (2, 3)]
+        with pytest.raises(ValueError):
+            onnx_chainer.export(model, xs, train=True)
+        # Dropout is ignored on test mode
+        onnx_model = onnx_chainer.export(model, xs)
+        op_types = [node.op_type for node in onnx_model.graph.node]
+        assert 'GRU' in op_types
+
+    def test_original_functions_outside_export(self):
+        rnn = L.NStepGRU(1, 4, 3, 0.)
+        hx = np.zeros((1, 2, 3), dtype=np.float32)
+        xs = [np.ones((2, 4), dtype=np.float32)]
+        original = F.n_step_gru
+        with fused_rnn.fused_n_step_rnn():
+            hy, _ = F.n_step_gru(1, 0., hx, rnn.ws, rnn.bs, xs)
+        assert isinstance(hy.creator, fused_rnn.NStepGRU)
+        # The initial state of zeros is omitted
+        assert len(hy.creator.inputs) == len(rnn.ws[0]) * 2 + 1
+
+        hy, _ = F.n_step_gru(1, 0., hx, rnn.ws, rnn.bs, xs)
+        assert not isinstance(hy.creator, fused_rnn.NStepGRU)
+        # Functions of Chainer are restored after the context
+        assert F.n_step_gru is original
+        module = sys.modules[original.__module__]
+        assert module.n_step_gru is original
+
+    def test_zero_input_state(self):
+
+        class Model(chainer.Chain):
+
+            def __init__(self):
+                super(Model, self).__init__()
+                with self.init_scope():
+                    self.rnn = L.NStepGRU(1, 4, 3, 0.)
+
+            def __call__(self, hx, *xs):
+                hy, ys = self.rnn(hx, list(xs))
+                return [hy] + list(ys)
+
+        hx = np.zeros((1, 2, 3), dtype=np.float32)
+        xs = [input_generator.increasing(length, 4) for length in (2, 3)]
+        onnx_model = onnx_chainer.export(Model(), [hx] + xs)
+
+        # States given as inputs of the network are kept even if zeros
+        gru, = [n for n in onnx_model.graph.node if n.op_type == 'GRU']
+        assert len(gru.input) == 6
+        assert gru.input[5]
+
+
+def test_functions_not_replaced_without_links(monkeypatch):
+    def install():
+        raise AssertionError('functions must not be replaced')
+    monkeypatch.setattr(fused_rnn, '_install', install)
+
+    model = L.Linear(4, 3)
+    x = input_generator.increasing(2, 4)
+    onnx_chainer.export(model, x)
@@ -0,0 +1,164 @@
+import chainer
+import chainer.functions as F
+import numpy as np
+import onnx
+from onnx import helper
+from onnx.mapping import NP_TYPE_TO_TENSOR_TYPE
+from onnx import numpy_helper
+from onnx import TensorProto
+import pytest
+
+from onnx_chainer import export
+from onnx_chainer import optimizer
+
+
+def _output(name, shape, dtype=np.float32):
+    return helper.make_tensor_value_info(
+        name, NP_TYPE_TO_TENSOR_TYPE[np.dtype(dtype)], shape)
+
+
+def _make_model(nodes, initializers, outputs, opset_version=9):
+    initializers = [numpy_helper.from_array(array, name)
+                    for name, array in initializers]
+    inputs = [helper.make_tensor_value_info('x', TensorProto.FLOAT, (2, 3))]
+    inputs += [helper.make_tensor_value_info(t.name, t.data_type, t.dims)
+               for t in initializers]
+    graph = helper.make_graph(
+        nodes, 'graph', inputs, outputs, initializer=initializers)
+    return helper.make_model(
+        graph, opset_imports=[helper.make_operatorsetid('', opset_version)])
+
+
+def _fold(onnx_model):
+    optimizer.optimize(
+        onnx_model, ['fold_constants', 'eliminate_dead_nodes'])
+    onnx.checker.check_model(onnx_model)
+    initializers = {t.name: numpy_helper.to_array(t)
+                    for t in onnx_model.graph.initializer}
+    return [node.op_type for node in onnx_model.graph.node], initializers
+
+
+a = np.arange(6, dtype=np.float32).reshape(2, 3)
+b = np.array([3, -2, 1], dtype=np.float32)
+
+
+@pytest.mark.parametrize('op_type,inputs,attrs,expected,opset_version', [
+    ('Add', [a, b], {}, a + b, 9),
+    ('Sub', [b, a], {}, b - a, 9),
+    ('Div', [np.array([7, -7], dtype=np.int64),
+             np.array([2, 2], dtype=np.int64)], {},
+     np.array([3, -3], dtype=np.int64), 9),
+    ('Neg', [a], {}, -a, 9),
+    ('Sqrt', [a], {}, np.sqrt(a), 9),
+    ('Sum', [a, b, b], {}, a + 2 * b, 9),
+    ('MatMul', [a, a.T], {}, a.dot(a.T), 9),
+    ('Gemm', [a, a, np.array([1, -1], dtype=np.float32)],
+     {'transB': 1, 'alpha': 2.0},
+     (2 * a.dot(a.T) + [1, -1]).astype(np.float32), 9),
+    ('Cast', [a], {'to': TensorProto.INT64}, a.astype(np.int64), 9),
+    ('Concat', [a, a], {'axis': 0}, np.concatenate([a, a]), 9),
+    ('Transpose', [a], {'perm': [1, 0]}, a.T, 9),
+    ('Unsqueeze', [b], {'axes': [0, 2]}, b[None, :, None], 9),
+    ('Squeeze', [a[None]], {'axes': [0]}, a, 9),
+    ('Reshape', [a, np.array([0, -1, 1], dtype=np.int64)], {},
+     a.reshape(2, 3, 1), 9),
+    ('Shape', [a], {}, np.array([2, 3], dtype=np.int64), 9),
+    ('Gather', [a, np.array([1, 0], dtype=np.int64)], {'axis': 1},
+     a[:, [1, 0]], 9),
+    ('Slice', [a], {'starts': [1], 'ends': [100], 'axes': [1]}, a[:, 1:], 9),
+    ('Slice', [a, np.array([2], dtype=np.int64),
+               np.array([0], dtype=np.int64),
+               np.array([1], dtype=np.int64),
+               np.array([-1], dtype=np.int64)], {}, a[:, 2:0:-1], 10),
+    ('Tile', [b, np.array([2], dtype=np.int64)], {}, np.tile(b, 2), 9),
+    ('Expand', [b, np.array([2, 1], dtype=np.int64)], {},
+     np.broadcast_to(b, (2, 3)), 9),
+    ('ConstantOfShape', [np.array([2, 2], dtype=np.int64)],
+     {'value': numpy_helper.from_array(np.array([5], dtype=np.int64))},
+     np.full((2, 2), 5, dtype=np.int64), 9),
+])
+def test_fold_op(op_type, inputs, attrs, expected, opset_version):
+    if opset_version > onnx.defs.onnx_opset_version():
+        pytest.skip('Opset version {} is not supported'.format(
+            opset_version))
+    names = ['c{}'.format(i) for i in range(len(inputs))]
+    onnx_model = _make_model(
+        [helper.make_node(op_type, names, ['h'], **attrs),
+         helper.make_node('Identity', ['h'], ['y'])],
+        list(zip(names, inputs)),
+        [_output('y', expected.shape, expected.dtype)],
+        opset_version=opset_version)
+    op_types, initializers = _fold(onnx_model)
+
+    assert op_types == ['Identity']
+    assert set(initializers.keys()) == {'h'}
+    assert initializers['h'].dtype == expected.dtype
+    np.testing.assert_allclose(initializers['h'], expected)
+
+
+def test_fold_split():
+    onnx_model = _make_model(
+        [helper.make_node('Split', ['c'], ['h0', 'h1'], axis=1, split=[2, 1]),
+         helper.make_node('Mul', ['x', 'h1'], ['y'])],
+        [('c', a)], [_output('y', (2, 3))])
+    op_types, initializers = _fold(onnx_model)
+    assert op_types == ['Mul']
+    np.testing.assert_array_equal(initializers['h1'], a[:, 2:])
+    assert 'h0' not in initializers
+
+
+def test_fold_chain():
+    shape = numpy_helper.from_array(np.array([3], dtype=np.int64))
+    onnx_model = _make_model(
+        [helper.make_node('Constant', [], ['c0'], value=shape),
+         helper.make_node('Concat', ['c0', 'c1'], ['c2'], axis=0),
+         helper.make_node('Reshape', ['x', 'c2'], ['y'])],
+        [('c1', np.array([2], dtype=np.int64))], [_output('y', (3, 2))])
+    op_types, initializers = _fold(onnx_model)
+    assert op_types == ['Reshape']
+    assert list(onnx_model.graph.node[0].input) == ['x', 'c2']
+    np.testing.assert_array_equal(initializers['c2'], [3, 2])
+    assert [i.name for i in onnx_model.graph.input] == ['x', 'c2']
+
+
+def test_not_fold():
+    onnx_model = _make_model(
+        [helper.make_node('Mul', ['x', 'c0'], ['h0']),
+         helper.make_node('Add', ['c0', 'c0'], ['h1']),
+         helper.make_node('Expand', ['c0', 'c1'], ['h2']),
+         helper.make_node('Sum', ['h0', 'h2'], ['y0']),
+         helper.make_node('Neg', ['c0'], ['y1'], domain='custom')],
+        [('c0', b), ('c1', np.array([1 << 18, 1, 3], dtype=np.int64))],
+        [_output('h1', (3,)), _output('y0', (1 << 18, 2, 3)),
+         _output('y1', (3,))])
+    optimizer.optimize(onnx_model, ['fold_constants'])
+    # Graph outputs, non-constant nodes, too large results and custom
+    # operators are kept
+    assert [node.op_type for node in onnx_model.graph.node] ==\
+        ['Mul', 'Add', 'Expand', 'Sum', 'Neg']
+
+
+def test_fold_linear_interpolate():
+
+    class Model(chainer.Chain):
+
+        def __init__(self):
+            super(Model, self).__init__()
+            with self.init_scope():
+                self.p = chainer.Parameter(
+                    np.full((2, 3), 0.3, dtype=np.float32))
+
+        def __call__(self, x, y):
+            return F.linear_interpolate(self.p, x, y)
+
+    model = Model()
+    x = np.ones((2, 3), dtype=np.float32)
+    y = np.zeros((2, 3), dtype=np.float32)
+    onnx_model = export(model, (x, y), optimize=True)
+    assert sorted(node.op_type for node in onnx_model.graph.node) ==\
+        ['Add', 'Mul', 'Mul']
+    initializers = {t.name: numpy_helper.to_array(t)
+                    for t in onnx_model.graph.initializer}
+    one_minus_p = [v for k, v in initializers.items() if k != 'param_p']
+    assert len(one_minus_p) == 1
+    np.testing.assert_allclose(one_minus_p[0], 0.7)
@@ -0,0 +1,141 @@
+import chainer
+import chainer.functions as F
+import chainer.links as L
+import numpy as np
+from onnx import numpy_helper
+import pytest
+
+from onnx_chainer import export
+
+
+class ConvBN(chainer.Chain):
+
+    def __init__(self, nobias, groups):
+        super(ConvBN, self).__init__()
+        with self.init_scope():
+            self.conv = L.Convolution2D(
+                4, 6, ksize=3, pad=1, nobias=nobias, groups=groups)
+            self.bn = L.BatchNormalization(6)
+
+    def __call__(self, x):
+        return F.relu(self.bn(self.conv(x)))
+
+
+class LinearBN(chainer.Chain):
+
+    def __init__(self, nobias):
+        super(LinearBN, self).__init__()
+        with self.init_scope():
+            self.l1 = L.Linear(4, 6, nobias=nobias)
+            self.bn = L.BatchNormalization(6)
+
+    def __call__(self, x):
+        return F.relu(self.bn(self.l1(x)))
+
+
+def _randomize_bn(bn):
+    bn.avg_mean[...] = np.random.uniform(-1, 1, bn.avg_mean.shape)
+    bn.avg_var[...] = np.random.uniform(0.5, 2, bn.avg_var.shape)
+    bn.gamma.array[...] = np.random.uniform(0.5, 2, bn.gamma.shape)
+    bn.beta.array[...] = np.random.uniform(-1, 1, bn.beta.shape)
+
+
+def _get_fused_params(onnx_model, op_type):
+    initializers = {t.name: numpy_helper.to_array(t)
+                    for t in onnx_model.graph.initializer}
+    node, = [n for n in onnx_model.graph.node if n.op_type == op_type]
+    return [initializers[name] for name in node.input[1:]]
+
+
+@pytest.mark.parametrize('nobias', [False, True])
+@pytest.mark.parametrize('groups', [1, 2])
+def test_fuse_bn_into_conv(nobias, groups):
+    model = ConvBN(nobias, groups)
+    _randomize_bn(model.bn)
+    x = np.random.uniform(-1, 1, (2, 4, 5, 5)).astype(np.float32)
+    onnx_model = export(model, x, optimize=True)
+
+    op_types = [node.op_type for node in onnx_model.graph.node]
+    assert op_types == ['Conv', 'Relu']
+    w, b = _get_fused_params(onnx_model, 'Conv')
+    # Statistics and the original weights are removed
+    assert len(onnx_model.graph.initializer) == 2
+
+    with chainer.using_config('train', False):
+        expected = model(x).array
+    actual = F.relu(F.convolution_2d(x, w, b, pad=1, groups=groups)).array
+    np.testing.assert_allclose(actual, expected, rtol=1e-4, atol=1e-5)
+
+
+@pytest.mark.parametrize('nobias', [False, True])
+def test_fuse_bn_into_gemm(nobias):
+    model = LinearBN(nobias)
+    _randomize_bn(model.bn)
+    x = np.random.uniform(-1, 1, (3, 4)).astype(np.float32)
+    onnx_model = export(model, x, optimize=True)
+
+    op_types = [node.op_type for node in onnx_model.graph.node]
+    assert op_types == ['Gemm', 'Relu']
+    w, b = _get_fused_params(onnx_model, 'Gemm')
+    _check_gemm(onnx_model, model, x, w, b)
+
+
+def _check_gemm(onnx_model, model, x, w, b):
+    gemm, = [n for n in onnx_model.graph.node if n.op_type == 'Gemm']
+    trans_b = [a.i for a in gemm.attribute if a.name == 'transB']
+    # Weights of Linear are transposed by Gemm
+    if not trans_b or not trans_b[0]:
+        w = w.T
+
+    with chainer.using_config('train', False):
+        expected = model(x).array
+    actual = F.relu(F.linear(x, w, b)).array
+    np.testing.assert_allclose(actual, expected, rtol=1e-4, atol=1e-5)
+
+
+def test_fuse_bn_into_matmul():
+
+    class Model(chainer.Chain):
+
+        def __init__(self):
+            super(Model, self).__init__()
+            with self.init_scope():
+                self.w = chainer.Parameter(
+                    np.random.uniform(-1, 1, (4, 6)).astype(np.float32))
+                self.bn = L.BatchNormalization(6)
+
+        def __call__(self, x):
+            return F.relu(self.bn(F.matmul(x, self.w)))
+
+    model = Model()
+    _randomize_bn(model.bn)
+    x = np.random.uniform(-1, 1, (3, 4)).astype(np.float32)
+    onnx_model = export(model, x, optimize=True)
+
+    op_types = [node.op_type for node in onnx_model.graph.node]
+    assert op_types == ['Gemm', 'Relu']
+    w, b = _get_fused_params(onnx_model, 'Gemm')
+    _check_gemm(onnx_model, model, x, w, b)
+
+
+def test_fuse_bn_train():
+    model = ConvBN(False, 1)
+    x = np.ones((1, 4, 5, 5), dtype=np.float32)
+    onnx_model = export(model, x, train=True, optimize=True)
+    op_types = [node.op_type for node in onnx_model.graph.node]
+    assert 'BatchNormalization' in op_types
+
+
+def test_fuse_bn_shared_output():
+
+    class Model(ConvBN):
+
+        def __call__(self, x):
+            h = self.conv(x)
+            return self.bn(h), h
+
+    model = Model(False, 1)
+    x = np.ones((1, 4, 5, 5), dtype=np.float32)
+    onnx_model = export(model, x, optimize=True)
+    op_types = [node.op_type for node in onnx_model.graph.node]
+    assert sorted(op_types) == ['BatchNormalization', 'Conv']
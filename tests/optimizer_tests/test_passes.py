@@ -0,0 +1,195 @@
+import numpy as np
+import onnx
+from onnx import helper
+from onnx import numpy_helper
+from onnx import TensorProto
+import pytest
+
+from onnx_chainer import optimizer
+
+
+def _make_model(nodes, inputs, outputs, initializers=(), opset_version=9):
+    inputs = [helper.make_tensor_value_info(name, TensorProto.FLOAT, shape)
+              for name, shape in inputs]
+    initializers = [numpy_helper.from_array(array, name)
+                    for name, array in initializers]
+    inputs += [helper.make_tensor_value_info(t.name, t.data_type, t.dims)
+               for t in initializers]
+    outputs = [helper.make_tensor_value_info(name, TensorProto.FLOAT, shape)
+               for name, shape in outputs]
+    graph = helper.make_graph(
+        nodes, 'graph', inputs, outputs, initializer=initializers)
+    return helper.make_model(
+        graph, opset_imports=[helper.make_operatorsetid('', opset_version)])
+
+
+def _op_types(onnx_model):
+    return [node.op_type for node in onnx_model.graph.node]
+
+
+def test_eliminate_identity():
+    onnx_model = _make_model(
+        [helper.make_node('Identity', ['x'], ['h0']),
+         helper.make_node('Relu', ['h0'], ['h1']),
+         helper.make_node('Identity', ['h1'], ['y'])],
+        [('x', (1, 3))], [('y', (1, 3))])
+    optimizer.optimize(onnx_model, ['eliminate_identity'])
+    onnx.checker.check_model(onnx_model)
+
+    nodes = onnx_model.graph.node
+    assert _op_types(onnx_model) == ['Relu']
+    # The name of the graph output is kept
+    assert list(nodes[0].input) == ['x']
+    assert list(nodes[0].output) == ['y']
+
+
+def test_eliminate_identity_input_to_output():
+    onnx_model = _make_model(
+        [helper.make_node('Identity', ['x'], ['y'])],
+        [('x', (1, 3))], [('y', (1, 3))])
+    optimizer.optimize(onnx_model, ['eliminate_identity'])
+    assert _op_types(onnx_model) == ['Identity']
+
+
+@pytest.mark.parametrize('opset_version,attrs,removed', [
+    (9, {}, True),
+    (6, {'is_test': 1}, True),
+    (6, {'is_test': 0}, False),
+])
+def test_eliminate_dropout(opset_version, attrs, removed):
+    onnx_model = _make_model(
+        [helper.make_node('Dropout', ['x'], ['h'], ratio=0.5, **attrs),
+         helper.make_node('Relu', ['h'], ['y'])],
+        [('x', (1, 3))], [('y', (1, 3))], opset_version=opset_version)
+    optimizer.optimize(onnx_model, ['eliminate_dropout'])
+    assert ('Dropout' in _op_types(onnx_model)) != removed
+
+
+def test_eliminate_dropout_mask_used():
+    onnx_model = _make_model(
+        [helper.make_node('Dropout', ['x'], ['h', 'mask'])],
+        [('x', (1, 3))], [('h', (1, 3)), ('mask', (1, 3))])
+    optimizer.optimize(onnx_model, ['eliminate_dropout'])
+    assert _op_types(onnx_model) == ['Dropout']
+
+
+def test_eliminate_dead_nodes():
+    w = np.ones((3, 3), dtype=np.float32)
+    onnx_model = _make_model(
+        [helper.make_node('Relu', ['x'], ['y']),
+         helper.make_node('MatMul', ['x', 'W'], ['h0']),
+         helper.make_node('Sigmoid', ['h0'], ['h1'])],
+        [('x', (1, 3))], [('y', (1, 3))], initializers=[('W', w)])
+    pm = optimizer.PassManager(['eliminate_dead_nodes'])
+    pm.run(onnx_model)
+    onnx.checker.check_model(onnx_model)
+
+    assert _op_types(onnx_model) == ['Relu']
+    assert not onnx_model.graph.initializer
+    assert [i.name for i in onnx_model.graph.input] == ['x']
+    stats = pm.stats['eliminate_dead_nodes']
+    assert stats.calls == 1
+    assert stats.removed_nodes == 2
+    assert stats.removed_initializers == 1
+    assert stats.time >= 0
+
+
+@pytest.mark.parametrize('perm1,perm2,expected', [
+    ([0, 2, 1], [0, 2, 1], []),
+    ([1, 2, 0], [2, 0, 1], []),
+    ([0, 2, 1], [1, 0, 2], [2, 0, 1]),
+])
+def test_cancel_transpose(perm1, perm2, expected):
+    onnx_model = _make_model(
+        [helper.make_node('Transpose', ['x'], ['h'], perm=perm1),
+         helper.make_node('Transpose', ['h'], ['t'], perm=perm2),
+         helper.make_node('Relu', ['t'], ['y'])],
+        [('x', (2, 3, 4))],
+        [('y', np.empty((2, 3, 4)).transpose(perm1).transpose(perm2).shape)])
+    optimizer.optimize(
+        onnx_model, ['cancel_transpose', 'eliminate_dead_nodes'])
+    onnx.checker.check_model(onnx_model)
+
+    x = np.arange(24).reshape(2, 3, 4)
+    if expected:
+        assert _op_types(onnx_model) == ['Transpose', 'Relu']
+        node = onnx_model.graph.node[0]
+        assert list(node.input) == ['x']
+        perm = list(helper.get_attribute_value(node.attribute[0]))
+        assert perm == expected
+        np.testing.assert_array_equal(
+            x.transpose(perm), x.transpose(perm1).transpose(perm2))
+    else:
+        assert _op_types(onnx_model) == ['Relu']
+        assert list(onnx_model.graph.node[0].input) == ['x']
+
+
+def test_cancel_transpose_output():
+    onnx_model = _make_model(
+        [helper.make_node('Relu', ['x'], ['h0']),
+         helper.make_node('Transpose', ['h0'], ['h1'], perm=[1, 0]),
+         helper.make_node('Transpose', ['h1'], ['y'], perm=[1, 0])],
+        [('x', (2, 3))], [('y', (2, 3))])
+    optimizer.optimize(
+        onnx_model, ['cancel_transpose', 'eliminate_dead_nodes'])
+    onnx.checker.check_model(onnx_model)
+    assert _op_types(onnx_model) == ['Relu']
+    assert list(onnx_model.graph.node[0].output) == ['y']
+
+
+@pytest.mark.parametrize('shape,out_shape,cancelled', [
+    ([6, 4], (6, 4), True),
+    ([-1, 4], (6, 4), True),
+    ([0, 12], (2, 12), False),
+])
+def test_cancel_reshape(shape, out_shape, cancelled):
+    onnx_model = _make_model(
+        [helper.make_node('Reshape', ['x', 'shape0'], ['h']),
+         helper.make_node('Reshape', ['h', 'shape1'], ['y'])],
+        [('x', (2, 3, 4))], [('y', out_shape)],
+        initializers=[('shape0', np.array([2, 12], dtype=np.int64)),
+                      ('shape1', np.array(shape, dtype=np.int64))])
+    optimizer.optimize(onnx_model, ['cancel_reshape', 'eliminate_dead_nodes'])
+    onnx.checker.check_model(onnx_model)
+
+    if cancelled:
+        assert _op_types(onnx_model) == ['Reshape']
+        assert list(onnx_model.graph.node[0].input) == ['x', 'shape1']
+        assert {t.name for t in onnx_model.graph.initializer} == {'shape1'}
+    else:
+        assert _op_types(onnx_model) == ['Reshape', 'Reshape']
+
+
+def test_unknown_pass():
+    with pytest.raises(ValueError):
+        optimizer.PassManager(['unknown_pass'])
+
+
+def test_custom_pass():
+    calls = []
+
+    def custom_pass(onnx_model):
+        calls.append(onnx_model)
+
+    onnx_model = _make_model(
+        [helper.make_node('Relu', ['x'], ['y'])],
+        [('x', (1, 3))], [('y', (1, 3))])
+    pm = optimizer.PassManager([custom_pass])
+    pm.run(onnx_model)
+    assert calls == [onnx_model]
+    assert pm.stats['custom_pass'].calls == 1
+
+
+def test_pass_options():
+    calls = []
+
+    def custom_pass(onnx_model, factor=1):
+        calls.append(factor)
+
+    onnx_model = _make_model(
+        [helper.make_node('Relu', ['x'], ['y'])],
+        [('x', (1, 3))], [('y', (1, 3))])
+    pm = optimizer.PassManager([custom_pass, (custom_pass, {'factor': 2})])
+    pm.run(onnx_model)
+    assert calls == [1, 2]
+    assert pm.stats['custom_pass'].calls == 2
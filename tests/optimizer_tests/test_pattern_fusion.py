@@ -0,0 +1,187 @@
+import warnings
+
+import chainer
+import chainer.functions as F
+import numpy as np
+from onnx import numpy_helper
+import pytest
+
+from onnx_chainer import export
+from onnx_chainer import optimizer
+
+
+FUSION_PASSES = list(optimizer.DEFAULT_PASSES) + [
+    'fuse_layer_norm', 'fuse_attention', 'eliminate_dead_nodes']
+
+
+class LayerNorm(chainer.Chain):
+
+    def __init__(self, affine, square):
+        super(LayerNorm, self).__init__()
+        self.affine = affine
+        self.square = square
+        with self.init_scope():
+            self.gamma = chainer.Parameter(
+                np.random.uniform(0.5, 2, 6).astype(np.float32))
+            self.beta = chainer.Parameter(
+                np.random.uniform(-1, 1, 6).astype(np.float32))
+
+    def __call__(self, x):
+        mean = F.mean(x, axis=-1, keepdims=True)
+        centered = x - F.broadcast_to(mean, x.shape)
+        squared = F.square(centered) if self.square else centered ** 2
+        var = F.mean(squared, axis=-1, keepdims=True)
+        h = centered / F.broadcast_to(F.sqrt(var + 1e-5), x.shape)
+        if self.affine:
+            h = h * F.broadcast_to(self.gamma, x.shape) +\
+                F.broadcast_to(self.beta, x.shape)
+        return F.relu(h)
+
+
+class Attention(chainer.Chain):
+
+    def __init__(self, scale, mask):
+        super(Attention, self).__init__()
+        self.scale = scale
+        self.mask = mask
+
+    def __call__(self, q, k, v):
+        h = F.matmul(q, k, transb=True)
+        if self.scale:
+            h = h * (1. / np.sqrt(q.shape[-1]))
+        if self.mask:
+            mask = np.triu(np.full(h.shape, -1e4, dtype=np.float32), 1)
+            h = h + mask
+        return F.matmul(F.softmax(h, axis=-1), v)
+
+
+def _export(model, args, passes=FUSION_PASSES, **kwargs):
+    with warnings.catch_warnings():
+        # The checker does not know fused operators
+        warnings.simplefilter('ignore')
+        return export(model, args, optimize=passes, **kwargs)
+
+
+def _get_fused_node(onnx_model, op_type, domain=optimizer.FUSED_OPS_DOMAIN):
+    node, = [n for n in onnx_model.graph.node if n.op_type == op_type]
+    assert node.domain == domain
+    return node
+
+
+@pytest.mark.parametrize('affine', [False, True])
+@pytest.mark.parametrize('square', [False, True])
+def test_fuse_layer_norm(affine, square):
+    model = LayerNorm(affine, square)
+    x = np.random.uniform(-1, 1, (2, 3, 6)).astype(np.float32)
+    onnx_model = _export(model, x)
+
+    op_types = [node.op_type for node in onnx_model.graph.node]
+    assert op_types == ['LayerNormalization', 'Relu']
+    node = _get_fused_node(onnx_model, 'LayerNormalization')
+    attrs = {a.name: a for a in node.attribute}
+    assert attrs['axis'].i == -1
+    assert attrs['epsilon'].f == pytest.approx(1e-5)
+
+    initializers = {t.name: numpy_helper.to_array(t)
+                    for t in onnx_model.graph.initializer}
+    scale, shift = [initializers[name] for name in node.input[1:]]
+    if affine:
+        np.testing.assert_array_equal(scale, model.gamma.array)
+        np.testing.assert_array_equal(shift, model.beta.array)
+    else:
+        np.testing.assert_array_equal(scale, np.ones(6, dtype=np.float32))
+        np.testing.assert_array_equal(shift, np.zeros(6, dtype=np.float32))
+    domains = {o.domain: o.version for o in onnx_model.opset_import}
+    assert domains[optimizer.FUSED_OPS_DOMAIN] == 1
+
+
+def test_fuse_layer_norm_other_axis():
+
+    class Model(chainer.Chain):
+
+        def __call__(self, x):
+            mean = F.mean(x, axis=1, keepdims=True)
+            centered = x - F.broadcast_to(mean, x.shape)
+            var = F.mean(F.square(centered), axis=1, keepdims=True)
+            return centered / F.broadcast_to(F.sqrt(var + 1e-5), x.shape)
+
+    x = np.random.uniform(-1, 1, (2, 3, 6)).astype(np.float32)
+    onnx_model = _export(Model(), x)
+    op_types = [node.op_type for node in onnx_model.graph.node]
+    assert 'LayerNormalization' not in op_types
+
+
+@pytest.mark.parametrize('scale', [False, True])
+@pytest.mark.parametrize('mask', [False, True])
+def test_fuse_attention(scale, mask):
+    model = Attention(scale, mask)
+    q, k, v = [np.random.uniform(-1, 1, (2, 5, 4)).astype(np.float32)
+               for _ in range(3)]
+    onnx_model = _export(model, [q, k, v])
+
+    op_types = [node.op_type for node in onnx_model.graph.node]
+    assert op_types == ['ScaledDotProductAttention']
+    node = _get_fused_node(onnx_model, 'ScaledDotProductAttention')
+    graph_inputs = [i.name for i in onnx_model.graph.input]
+    # Q, K and V are given as they are
+    assert len(node.input) == (4 if mask else 3)
+    assert all(name in graph_inputs for name in node.input[:3])
+    expected_scale = 1. / np.sqrt(4) if scale else 1.
+    attrs = {a.name: a for a in node.attribute}
+    assert attrs['scale'].f == pytest.approx(expected_scale)
+
+
+def test_fuse_attention_shared_scores():
+
+    class Model(Attention):
+
+        def __call__(self, q, k, v):
+            h = F.matmul(q, k, transb=True)
+            return F.matmul(F.softmax(h, axis=-1), v), h
+
+    q, k, v = [np.random.uniform(-1, 1, (2, 5, 4)).astype(np.float32)
+               for _ in range(3)]
+    onnx_model = _export(Model(False, False), [q, k, v])
+    op_types = [node.op_type for node in onnx_model.graph.node]
+    assert 'ScaledDotProductAttention' not in op_types
+
+
+def test_fusion_domain_from_external_opset_imports():
+    model = Attention(True, False)
+    q, k, v = [np.random.uniform(-1, 1, (2, 5, 4)).astype(np.float32)
+               for _ in range(3)]
+    onnx_model = _export(
+        model, [q, k, v], external_opset_imports={'com.example': 3})
+    _get_fused_node(onnx_model, 'ScaledDotProductAttention', 'com.example')
+    domains = {o.domain: o.version for o in onnx_model.opset_import}
+    assert domains['com.example'] == 3
+    assert optimizer.FUSED_OPS_DOMAIN not in domains
+
+
+def test_fusion_domain_option():
+    model = LayerNorm(True, True)
+    x = np.random.uniform(-1, 1, (2, 3, 6)).astype(np.float32)
+    passes = list(optimizer.DEFAULT_PASSES) + [
+        ('fuse_layer_norm', {'domain': 'com.example', 'version': 2}),
+        'eliminate_dead_nodes']
+    onnx_model = _export(
+        model, x, passes=passes,
+        external_opset_imports={'com.example': 1, 'com.other': 1})
+    _get_fused_node(onnx_model, 'LayerNormalization', 'com.example')
+    domains = {o.domain: o.version for o in onnx_model.opset_import}
+    # The imported version is kept
+    assert domains['com.example'] == 1
+
+    # The domain is ambiguous without the option
+    with pytest.raises(ValueError):
+        _export(model, x,
+                external_opset_imports={'com.example': 1, 'com.other': 1})
+
+
+def test_fusion_not_run_by_default():
+    model = LayerNorm(True, True)
+    x = np.random.uniform(-1, 1, (2, 3, 6)).astype(np.float32)
+    onnx_model = export(model, x, optimize=True)
+    op_types = [node.op_type for node in onnx_model.graph.node]
+    assert 'LayerNormalization' not in op_types
+    assert all(o.domain == '' for o in onnx_model.opset_import)
@@ -0,0 +1,53 @@
+import chainer
+import chainer.functions as F
+import chainer.links as L
+import numpy as np
+import pytest
+
+import onnx_chainer
+
+
+class Model(chainer.Chain):
+
+    def __init__(self):
+        super(Model, self).__init__()
+        with self.init_scope():
+            self.l1 = L.Linear(None, 3)
+
+    def __call__(self, x):
+        h = self.l1(x)
+        h = F.stack([h, h])  # Not supported
+        h = F.where(h.array > 0, h, F.cos(h))  # Cos is not supported
+        return F.stack([F.relu(h), h])
+
+
+@pytest.fixture(scope='function')
+def x():
+    return np.ones((2, 5), dtype=np.float32)
+
+
+def test_check_exportable(x):
+    issues = onnx_chainer.check_exportable(Model(), x, opset_version=8)
+    assert [(i.func_name, i.count) for i in issues] ==\
+        [('Stack', 2), ('Where', 1), ('Cos', 1)]
+    assert 'opset_version 9' in issues[1].reason
+
+
+def test_check_exportable_latest(x):
+    issues = onnx_chainer.check_exportable(Model(), [x])
+    assert [i.func_name for i in issues] == ['Stack', 'Cos']
+
+
+def test_check_exportable_external_converters(x):
+    def dummy_converter(params):
+        pass
+
+    issues = onnx_chainer.check_exportable(
+        Model(), {'x': x}, opset_version=9,
+        external_converters={'Stack': dummy_converter})
+    assert [i.func_name for i in issues] == ['Cos']
+
+
+def test_check_exportable_supported(x):
+    model = chainer.Sequential(L.Linear(None, 3), F.relu)
+    assert onnx_chainer.check_exportable(model, x) == []
@@ -0,0 +1,44 @@
+import gc
+
+import chainer
+import numpy as np
+
+from onnx_chainer.context import Context
+
+
+def test_names_of_params():
+    model = chainer.Link()
+    with model.init_scope():
+        model.W = chainer.Parameter(np.zeros((2, 3), dtype=np.float32))
+    context = Context(model)
+    assert context.get_name(model.W) == 'param_W'
+    assert context.get_name(model.W.array) == 'param_W'
+
+
+def test_dead_objects_are_dropped():
+    context = Context(chainer.Chain())
+    x = chainer.Variable(np.zeros((2, 3), dtype=np.float32))
+    assert context.get_name(x) == 'v0'
+    assert len(context) == 2  # Variable and its array
+
+    del x
+    gc.collect()
+    assert len(context) == 0
+    assert context.name_list == {}
+
+    # IDs of dead objects may be recycled, but names are not
+    for _ in range(10):
+        y = np.zeros(3, dtype=np.float32)
+        name = context.get_name(y)
+        assert name != 'v0'
+        assert context.get_name(y) == name
+        del y
+
+
+def test_unreferenceable_objects_are_pinned():
+    context = Context(chainer.Chain())
+    key = (1, 2)  # tuples cannot be weakly referenced
+    name = context.get_name(key)
+    del key
+    gc.collect()
+    assert list(context.name_list.values()) == [name]
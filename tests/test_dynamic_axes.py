@@ -0,0 +1,97 @@
+import chainer
+import chainer.functions as F
+import chainer.links as L
+import numpy as np
+from onnx import numpy_helper
+import pytest
+
+from onnx_chainer import export
+
+
+class Model(chainer.Chain):
+
+    def __init__(self):
+        super(Model, self).__init__()
+        with self.init_scope():
+            self.conv = L.Convolution2D(3, 4, ksize=3, pad=1)
+            self.deconv = L.Deconvolution2D(4, 2, ksize=3, stride=2, pad=1)
+            self.l1 = L.Linear(None, 5)
+
+    def __call__(self, x):
+        h = F.relu(self.deconv(self.conv(x)))
+        h = h[:, 1:]
+        return self.l1(F.reshape(h, (h.shape[0], -1)))
+
+
+@pytest.fixture(scope='function')
+def model():
+    return Model()
+
+
+@pytest.fixture(scope='function')
+def x():
+    return np.random.uniform(-1, 1, (2, 3, 4, 4)).astype(np.float32)
+
+
+def _get_dims(value_info):
+    return [d.dim_param or d.dim_value
+            for d in value_info.type.tensor_type.shape.dim]
+
+
+def test_dynamic_axes(model, x):
+    onnx_model = export(
+        model, x, input_names='x', output_names='y',
+        dynamic_axes={'x': {0: 'batch', 2: 'height'}, 'y': [0]})
+
+    x_info, = [i for i in onnx_model.graph.input if i.name == 'x']
+    assert _get_dims(x_info) == ['batch', 3, 'height', 4]
+    assert _get_dims(onnx_model.graph.output[0]) == ['y_dim0', 5]
+
+    nodes = {node.op_type: node for node in onnx_model.graph.node}
+    attrs = {a.name for a in nodes['ConvTranspose'].attribute}
+    assert 'output_shape' not in attrs
+    assert 'output_padding' in attrs
+    slice_ends = [a.ints for a in nodes['Slice'].attribute
+                  if a.name == 'ends'][0]
+    assert slice_ends[0] == np.iinfo(np.int64).max
+    initializers = {t.name: numpy_helper.to_array(t)
+                    for t in onnx_model.graph.initializer}
+    assert initializers[nodes['Reshape'].input[1]].tolist() == [0, -1]
+
+
+def test_dynamic_axes_unknown_name(model, x):
+    with pytest.raises(ValueError):
+        export(model, x, input_names='x', dynamic_axes={'z': [0]})
+    with pytest.raises(ValueError):
+        export(model, x, input_names='x', dynamic_axes={'x': [4]})
+
+
+def test_dynamic_axes_softmax_cross_entropy():
+
+    class Loss(chainer.Chain):
+
+        def __call__(self, x, t):
+            return F.softmax_cross_entropy(x, t)
+
+    x = np.random.uniform(-1, 1, (2, 5)).astype(np.float32)
+    t = np.array([1, 3], dtype=np.int32)
+    onnx_model = export(
+        Loss(), (x, t), input_names=['x', 't'],
+        dynamic_axes={'x': [0], 't': [0]})
+    op_types = [node.op_type for node in onnx_model.graph.node]
+    assert 'Shape' in op_types
+    assert 'Gather' in op_types
+
+
+def test_dynamic_axes_run(model, x):
+    onnxruntime = pytest.importorskip('onnxruntime')
+    onnx_model = export(
+        model, x, input_names='x', output_names='y',
+        dynamic_axes={'x': [0], 'y': [0]})
+    session = onnxruntime.InferenceSession(onnx_model.SerializeToString())
+
+    x5 = np.random.uniform(-1, 1, (5, 3, 4, 4)).astype(np.float32)
+    actual, = session.run(['y'], {'x': x5})
+    with chainer.using_config('train', False):
+        expected = model(x5).array
+    np.testing.assert_allclose(actual, expected, rtol=1e-4, atol=1e-5)
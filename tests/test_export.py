@@ -0,0 +1,347 @@
+import os
+
+import chainer
+import chainer.functions as F
+import chainer.links as L
+import numpy as np
+from onnx import checker
+from onnx import numpy_helper
+import pytest
+
+from onnx_chainer import export
+from onnx_chainer.export import ONNXExport
+from onnx_chainer import mapping
+from onnx_chainer import onnx_helper
+from onnx_chainer import optimizer
+from onnx_chainer import update_weights
+from onnx_chainer import validation
+
+
+class BranchModel(chainer.Chain):
+
+    def __init__(self):
+        super(BranchModel, self).__init__()
+        with self.init_scope():
+            self.conv = L.Convolution2D(None, 4, ksize=3, stride=1)
+            self.bn = L.BatchNormalization(4)
+            self.l1 = L.Linear(None, 3)
+
+    def __call__(self, x):
+        h = self.bn(self.conv(x))
+        h1 = F.relu(h)
+        h2 = F.sigmoid(h)
+        return self.l1(h1 + h2), F.tanh(h)
+
+
+@pytest.fixture(scope='function')
+def model():
+    return BranchModel()
+
+
+@pytest.fixture(scope='function')
+def x():
+    return np.ones((1, 3, 8, 8), dtype=np.float32)
+
+
+def _graph_summary(onnx_model):
+    return [(node.op_type, list(node.input), list(node.output))
+            for node in onnx_model.graph.node]
+
+
+def test_trace_mode_equivalent(model, x):
+    forward_model = export(model, x, trace_mode='forward')
+    backward_model = export(model, x, trace_mode='backward')
+
+    assert _graph_summary(forward_model) == _graph_summary(backward_model)
+    assert [i.name for i in forward_model.graph.input] ==\
+        [i.name for i in backward_model.graph.input]
+    assert [o.name for o in forward_model.graph.output] ==\
+        [o.name for o in backward_model.graph.output]
+
+
+def test_trace_mode_forward_no_grad(model, x):
+    model.cleargrads()
+    export(model, x, trace_mode='forward')
+    for param in model.params():
+        assert param.grad is None
+
+
+def test_invalid_trace_mode(model, x):
+    with pytest.raises(ValueError):
+        export(model, x, trace_mode='sideways')
+
+
+def test_export_cache(tmpdir, monkeypatch, model, x):
+    cache_dir = str(tmpdir.mkdir('cache'))
+    first = export(model, x, cache_dir=cache_dir)
+    assert len(os.listdir(cache_dir)) == 2
+
+    model.l1.W.array[...] = 0.5
+
+    def convert_function(self, function):
+        raise AssertionError('conversion must be skipped on cache hit')
+
+    with monkeypatch.context() as m:
+        m.setattr(ONNXExport, 'convert_function', convert_function)
+        second, inputs, outputs = export(
+            model, x, cache_dir=cache_dir, return_named_inout=True)
+
+    assert _graph_summary(first) == _graph_summary(second)
+    assert set(outputs.keys()) == {o.name for o in first.graph.output}
+    initializers = {t.name: numpy_helper.to_array(t)
+                    for t in second.graph.initializer}
+    np.testing.assert_array_equal(
+        initializers['param_l1_W'], model.l1.W.array)
+
+
+def test_export_cache_optimize(tmpdir, model, x):
+    cache_dir = str(tmpdir.mkdir('cache'))
+    export(model, x, cache_dir=cache_dir, optimize=True)
+    model.conv.W.array[...] *= 2
+    onnx_model = export(model, x, cache_dir=cache_dir, optimize=True)
+    expected = export(model, x, optimize=True)
+
+    def _initializers(onnx_model):
+        return {t.name: numpy_helper.to_array(t)
+                for t in onnx_model.graph.initializer}
+
+    # Folded weights are computed from refreshed parameters
+    assert _graph_summary(onnx_model) == _graph_summary(expected)
+    actual_initializers = _initializers(onnx_model)
+    for name, array in _initializers(expected).items():
+        np.testing.assert_array_equal(actual_initializers[name], array)
+
+
+def test_export_cache_miss(tmpdir, model, x):
+    cache_dir = str(tmpdir.mkdir('cache'))
+    export(model, x, cache_dir=cache_dir, opset_version=7)
+    export(model, x, cache_dir=cache_dir, opset_version=8)
+    export(model, np.ones((2, 3, 8, 8), dtype=np.float32),
+           cache_dir=cache_dir, opset_version=8)
+    assert len(os.listdir(cache_dir)) == 6
+
+
+class ConstantModel(chainer.Chain):
+
+    def __init__(self, value):
+        super(ConstantModel, self).__init__()
+        # Variables other than parameters are exported as constants
+        self.c = chainer.Variable(np.full((3, 4), value, dtype=np.float32))
+
+    def __call__(self, x):
+        return x + self.c
+
+
+class WiredModel(chainer.Chain):
+
+    def __init__(self, swap):
+        super(WiredModel, self).__init__()
+        self.swap = swap
+
+    def __call__(self, x, y):
+        h = F.relu(x)
+        return y - h if self.swap else h - y
+
+
+class NamedModel(chainer.Chain):
+
+    def __init__(self, name):
+        super(NamedModel, self).__init__()
+        self.link_name = name
+        with self.init_scope():
+            setattr(self, name, L.Linear(4, 3))
+
+    def __call__(self, x):
+        return F.relu(getattr(self, self.link_name)(x))
+
+
+@pytest.mark.parametrize('make_model,x', [
+    (lambda i: chainer.Sequential(lambda x: x[..., i]),
+     np.arange(12, dtype=np.float32).reshape(3, 4)),
+    (ConstantModel, np.arange(12, dtype=np.float32).reshape(3, 4)),
+    (WiredModel, (np.ones((2, 3), dtype=np.float32),
+                  np.zeros((2, 3), dtype=np.float32))),
+    (lambda i: NamedModel('l{}'.format(i)),
+     np.ones((2, 4), dtype=np.float32)),
+])
+def test_export_cache_graphs(tmpdir, make_model, x):
+    # Graphs differing only in attributes of functions, constants, inputs
+    # given to functions or names of parameters must not share keys
+    cache_dir = str(tmpdir.mkdir('cache'))
+    export(make_model(0), x, cache_dir=cache_dir)
+    model = make_model(1)
+    onnx_model = export(model, x, cache_dir=cache_dir)
+    assert len(os.listdir(cache_dir)) == 4
+    assert onnx_model.graph == export(model, x).graph
+
+
+def test_export_cache_undescribable_attribute(tmpdir):
+
+    class Function(chainer.FunctionNode):
+
+        def __init__(self):
+            self.obj = object()
+
+        def forward(self, inputs):
+            return inputs[0] * 2,
+
+    cache_dir = str(tmpdir.mkdir('cache'))
+    x = np.ones((2, 3), dtype=np.float32)
+    model = chainer.Sequential(lambda x: Function().apply((x,))[0])
+    external_converters = {
+        'Function': lambda params: (onnx_helper.make_node(
+            'Identity', params.input_names, len(params.output_names)),),
+    }
+    export(model, x, cache_dir=cache_dir,
+           external_converters=external_converters)
+    assert not os.listdir(cache_dir)
+
+
+class RedundantModel(chainer.Chain):
+
+    def __init__(self):
+        super(RedundantModel, self).__init__()
+        with self.init_scope():
+            self.l1 = L.Linear(None, 6)
+
+    def __call__(self, x):
+        h = F.dropout(F.copy(x, -1), ratio=0.5)
+        h = F.transpose(F.transpose(h, (0, 2, 1)), (0, 2, 1))
+        h = F.reshape(F.reshape(h, (2, 12)), (4, 6))
+        return F.identity(self.l1(h))
+
+
+@pytest.mark.parametrize('train,expected', [
+    (False, ['Reshape', 'Gemm']),
+    (True, ['Dropout', 'Reshape', 'Gemm']),
+])
+def test_optimize(train, expected):
+    model = RedundantModel()
+    x = np.ones((2, 3, 4), dtype=np.float32)
+    test_mode_passes = ('eliminate_dropout', 'fuse_bn_into_conv')
+    pm = optimizer.PassManager(
+        [p for p in optimizer.DEFAULT_PASSES
+         if not (train and p in test_mode_passes)])
+    onnx_model = export(model, x, train=train, optimize=pm)
+
+    assert [node.op_type for node in onnx_model.graph.node] == expected
+    assert onnx_model.graph.output[0].name == export(
+        model, x, train=train).graph.output[0].name
+    assert list(pm.stats.keys()) == list(pm.pass_names)
+    assert sum(s.removed_nodes for s in pm.stats.values()) > 0
+
+    onnx_model_default = export(model, x, train=train, optimize=True)
+    assert _graph_summary(onnx_model_default) == _graph_summary(onnx_model)
+
+
+def test_deduplicate_constants():
+
+    class Model(chainer.Chain):
+
+        def __call__(self, x, y):
+            h = F.reshape(x, (2, 12)) + F.reshape(y, (2, 12))
+            h = F.linear_interpolate(F.sigmoid(h), h, h * 2)
+            h = F.linear_interpolate(F.sigmoid(h), h, h * 2)
+            return F.reshape(h, (4, 6)), F.reshape(h * 3, (4, 6))
+
+    x = np.ones((2, 3, 4), dtype=np.float32)
+    onnx_model = export(Model(), (x, x), opset_version=9)
+
+    arrays = [numpy_helper.to_array(t) for t in onnx_model.graph.initializer]
+    assert len(arrays) == len(
+        {(a.dtype.str, a.shape, a.tobytes()) for a in arrays})
+    shapes = [a.tolist() for a in arrays if a.dtype == np.int64]
+    assert sorted(shapes) == [[2, 12], [4, 6]]
+
+    initializer_names = {t.name for t in onnx_model.graph.initializer}
+    input_names = {i.name for i in onnx_model.graph.input}
+    assert initializer_names <= input_names
+    for node in onnx_model.graph.node:
+        if node.op_type == 'Reshape':
+            assert node.input[1] in initializer_names
+
+
+class TiedModel(chainer.Chain):
+
+    def __init__(self, share):
+        super(TiedModel, self).__init__()
+        with self.init_scope():
+            self.embed = L.EmbedID(10, 4)
+            self.out = L.Linear(4, 10, nobias=True)
+        if share == 'object':
+            self.out.W = self.embed.W
+        elif share == 'array':
+            self.out.W.array = self.embed.W.array
+        elif share == 'view':
+            self.out.W.array = self.embed.W.array[...]
+
+    def __call__(self, x):
+        return self.out(self.embed(x))
+
+
+@pytest.mark.parametrize('share', ['object', 'array', 'view'])
+def test_aliased_params(tmpdir, share):
+    model = TiedModel(share)
+    x = np.arange(3, dtype=np.int32)
+    path = os.path.join(str(tmpdir), 'model.onnx')
+    onnx_model = export(model, x, filename=path)
+
+    # Other initializers are constants like the zero bias of Gemm
+    initializer_names = [t.name for t in onnx_model.graph.initializer
+                         if t.name.startswith('param_')]
+    assert initializer_names == ['param_embed_W']
+    node_inputs = {name for node in onnx_model.graph.node
+                   for name in node.input}
+    assert 'param_embed_W' in node_inputs
+    assert 'param_out_W' not in node_inputs
+
+    model.embed.W.array[...] = 0.5
+    updated = update_weights(model, path)
+    np.testing.assert_array_equal(
+        numpy_helper.to_array(updated.graph.initializer[0]),
+        model.embed.W.array)
+
+
+def test_not_aliased_params():
+    model = TiedModel(None)
+    model.out.W.array[...] = model.embed.W.array
+    onnx_model = export(model, np.arange(3, dtype=np.int32))
+    assert sorted(t.name for t in onnx_model.graph.initializer
+                  if t.name.startswith('param_')) ==\
+        ['param_embed_W', 'param_out_W']
+
+
+@pytest.mark.parametrize('check', ['full', 'structure-only', 'off'])
+def test_check(model, x, check):
+    onnx_model = export(model, x, check=check)
+    assert onnx_model == export(model, x)
+
+
+def test_invalid_check(model, x):
+    with pytest.raises(ValueError):
+        export(model, x, check='foo')
+
+
+def test_strip_initializers(model, x):
+    onnx_model = export(model, x)
+    stripped = validation.strip_initializers(onnx_model)
+    assert stripped.graph.node == onnx_model.graph.node
+    assert stripped.graph.input == onnx_model.graph.input
+    assert stripped.opset_import == onnx_model.opset_import
+    for tensor, placeholder in zip(
+            onnx_model.graph.initializer, stripped.graph.initializer):
+        assert placeholder.name == tensor.name
+        assert placeholder.dims == tensor.dims
+        assert len(placeholder.raw_data) == 1
+    checker.check_model(stripped)
+
+
+def test_invalid_converter_node(model, x, monkeypatch):
+    def convert_relu(params):
+        return onnx_helper.make_node(
+            'Relu', params.input_names, 1, alpha=1.0),
+
+    monkeypatch.setitem(mapping.converters, 'ReLU', convert_relu)
+    with pytest.raises(checker.ValidationError) as e:
+        export(model, x, check='structure-only')
+    assert 'ReLU' in str(e.value)
@@ -0,0 +1,44 @@
+import os
+
+import chainer
+import chainer.functions as F
+import chainer.links as L
+import numpy as np
+import onnx
+
+import onnx_chainer
+from onnx_chainer import ExportJob
+
+
+def _model_factory():
+    model = chainer.Sequential(L.Linear(5, 4), F.relu, L.Linear(4, 3))
+    for param in model.params():
+        param.array[...] = 0.5
+    return model
+
+
+def _failing_factory():
+    raise RuntimeError('failed to build')
+
+
+def test_export_many(tmpdir):
+    x = np.ones((2, 5), dtype=np.float32)
+    jobs = [ExportJob(_model_factory, x,
+                      os.path.join(str(tmpdir), 'opset{}.onnx'.format(v)), v)
+            for v in range(onnx_chainer.MINIMUM_OPSET_VERSION,
+                           onnx.defs.onnx_opset_version() + 1)]
+    jobs.append((_failing_factory, x, os.path.join(str(tmpdir), 'ng.onnx')))
+    results = onnx_chainer.export_many(jobs, max_workers=2)
+
+    assert [r.job.filename for r in results] == [j[2] for j in jobs]
+    for job, result in zip(jobs[:-1], results[:-1]):
+        assert result.error is None
+        assert result.elapsed > 0
+        onnx_model = onnx.load(job.filename)
+        assert onnx_model.opset_import[0].version == job.opset_version
+        expected = onnx_chainer.export(
+            _model_factory(), x, opset_version=job.opset_version)
+        assert onnx_model == expected
+
+    assert 'failed to build' in results[-1].error
+    assert not os.path.exists(jobs[-1][2])
@@ -0,0 +1,94 @@
+import io
+import os
+
+import chainer
+import chainer.functions as F
+import chainer.links as L
+import numpy as np
+import onnx
+from onnx import numpy_helper
+import pytest
+
+from onnx_chainer import export
+from onnx_chainer.external_data import read_external_tensor
+
+
+@pytest.fixture(scope='function')
+def model():
+    return chainer.Sequential(
+        L.Convolution2D(None, 8, 3, 1, 1),
+        F.relu,
+        L.Linear(None, 10),
+    )
+
+
+@pytest.fixture(scope='function')
+def x():
+    return np.ones((1, 3, 8, 8), dtype=np.float32)
+
+
+def _param_arrays(model):
+    return {'param' + name.replace('/', '_'): param.array
+            for name, param in model.namedparams()}
+
+
+def test_external_data(tmpdir, model, x):
+    path = os.path.join(str(tmpdir), 'model.onnx')
+    onnx_model = export(model, x, filename=path, external_data=True,
+                        external_data_threshold=64)
+
+    assert os.path.isfile(path + '.data')
+    params = _param_arrays(model)
+    for tensor in onnx_model.graph.initializer:
+        if tensor.name not in params:
+            continue
+        array = params[tensor.name]
+        if array.nbytes < 64:
+            assert tensor.data_location != onnx.TensorProto.EXTERNAL
+            actual = numpy_helper.to_array(tensor)
+        else:
+            assert tensor.data_location == onnx.TensorProto.EXTERNAL
+            assert not tensor.raw_data
+            actual = read_external_tensor(tensor, str(tmpdir))
+        np.testing.assert_array_equal(actual, array)
+
+
+def test_external_data_sharding(tmpdir, model, x):
+    path = os.path.join(str(tmpdir), 'model.onnx')
+    export(model, x, filename=path, external_data=True,
+           external_data_threshold=0, external_data_max_file_size=1024)
+
+    data_files = [f for f in os.listdir(str(tmpdir))
+                  if f.startswith('model.onnx.data')]
+    assert len(data_files) > 1
+    param_sizes = {a.nbytes for a in _param_arrays(model).values()}
+    for f in data_files:
+        size = os.path.getsize(os.path.join(str(tmpdir), f))
+        # Only a single tensor larger than the limit can exceed it
+        assert size <= 1024 or size in param_sizes
+
+
+def test_external_data_requires_path(model, x):
+    with pytest.raises(ValueError):
+        export(model, x, filename=io.BytesIO(), external_data=True)
+    with pytest.raises(ValueError):
+        export(model, x, external_data=True)
+
+
+@pytest.mark.parametrize('check', ['full', 'structure-only'])
+def test_external_data_check(tmpdir, monkeypatch, model, x, check):
+    # Data files are not looked up from the current directory
+    monkeypatch.chdir(str(tmpdir.mkdir('cwd')))
+    path = os.path.join(str(tmpdir.mkdir('out')), 'model.onnx')
+    export(model, x, filename=path, external_data=True,
+           external_data_threshold=64, check=check)
+    assert os.path.isfile(path + '.data')
+
+
+def test_external_data_optimize(tmpdir, monkeypatch, model, x):
+    monkeypatch.chdir(str(tmpdir.mkdir('cwd')))
+    path = os.path.join(str(tmpdir.mkdir('out')), 'model.onnx')
+    onnx_model = export(model, x, filename=path, external_data=True,
+                        external_data_threshold=64, optimize=True)
+    assert any(t.data_location == onnx.TensorProto.EXTERNAL
+               for t in onnx_model.graph.initializer)
@@ -0,0 +1,122 @@
+import os
+
+import chainer
+import chainer.functions as F
+import chainer.links as L
+import numpy as np
+import onnx
+from onnx import numpy_helper
+from onnx import TensorProto
+import pytest
+
+from onnx_chainer import export
+from onnx_chainer import export_testcase
+from onnx_chainer.optimizer import graph_utils
+
+
+class Model(chainer.Chain):
+
+    def __init__(self):
+        super(Model, self).__init__()
+        with self.init_scope():
+            self.l1 = L.Linear(5, 4)
+            self.l2 = L.Linear(4, 3)
+
+    def __call__(self, x):
+        h = F.softmax(self.l1(x))
+        return self.l2(h), F.sum(h, axis=1)
+
+
+def _get_nodes(onnx_model, op_type):
+    return [n for n in onnx_model.graph.node if n.op_type == op_type]
+
+
+@pytest.mark.parametrize('dtype', ['float16', np.float16])
+def test_float16(dtype):
+    model = Model()
+    x = np.random.uniform(-1, 1, (2, 5)).astype(np.float32)
+    onnx_model = export(model, x, dtype=dtype)
+
+    for tensor in onnx_model.graph.initializer:
+        assert tensor.data_type == TensorProto.FLOAT16
+    initializers = {t.name: numpy_helper.to_array(t)
+                    for t in onnx_model.graph.initializer}
+    np.testing.assert_array_equal(
+        initializers['param_l1_W'], model.l1.W.array.astype(np.float16))
+    for value_info in list(onnx_model.graph.input) +\
+            list(onnx_model.graph.output):
+        assert value_info.type.tensor_type.elem_type == TensorProto.FLOAT16
+
+    # Softmax and the following reduction are computed in float32
+    softmax, = _get_nodes(onnx_model, 'Softmax')
+    reduce_sum, = _get_nodes(onnx_model, 'ReduceSum')
+    assert reduce_sum.input[0] == softmax.output[0]
+    producers = {o: n for n in onnx_model.graph.node for o in n.output}
+    cast = producers[softmax.input[0]]
+    assert cast.op_type == 'Cast'
+    assert cast.attribute[0].i == TensorProto.FLOAT
+    casts = _get_nodes(onnx_model, 'Cast')
+    to_types = sorted(n.attribute[0].i for n in casts)
+    # The softmax is cast back for Gemm, and the sum for the graph output
+    assert to_types == sorted([TensorProto.FLOAT] + [TensorProto.FLOAT16] * 2)
+    onnx.checker.check_model(onnx_model)
+
+
+def test_float16_without_shape_inference(monkeypatch):
+    def infer_shapes(onnx_model):
+        raise RuntimeError('shape inference is unavailable')
+    monkeypatch.setattr(
+        graph_utils.shape_inference, 'infer_shapes', infer_shapes)
+
+    model = Model()
+    x = np.random.uniform(-1, 1, (2, 5)).astype(np.float32)
+    with pytest.warns(UserWarning):
+        onnx_model = export(model, x, dtype='float16')
+
+    # Types of values are unknown, but the softmax and the reduction are
+    # still computed in float32
+    softmax, = _get_nodes(onnx_model, 'Softmax')
+    reduce_sum, = _get_nodes(onnx_model, 'ReduceSum')
+    producers = {o: n for n in onnx_model.graph.node for o in n.output}
+    assert producers[softmax.input[0]].op_type == 'Cast'
+    assert reduce_sum.input[0] == softmax.output[0]
+    assert len(_get_nodes(onnx_model, 'Cast')) == 3
+    onnx.checker.check_model(onnx_model)
+
+
+def test_float16_fp32_ops():
+    model = Model()
+    x = np.random.uniform(-1, 1, (2, 5)).astype(np.float32)
+    onnx_model = export(model, x, dtype='float16', fp32_ops=[])
+    assert not _get_nodes(onnx_model, 'Cast')
+    onnx.checker.check_model(onnx_model)
+
+
+def test_float32():
+    model = Model()
+    x = np.random.uniform(-1, 1, (2, 5)).astype(np.float32)
+    onnx_model = export(model, x, dtype='float32')
+    assert not _get_nodes(onnx_model, 'Cast')
+    for tensor in onnx_model.graph.initializer:
+        assert tensor.data_type == TensorProto.FLOAT
+
+
+def test_invalid_dtype():
+    model = Model()
+    x = np.random.uniform(-1, 1, (2, 5)).astype(np.float32)
+    with pytest.raises(ValueError):
+        export(model, x, dtype='int32')
+
+
+def test_float16_testcase(tmpdir):
+    model = Model()
+    x = np.random.uniform(-1, 1, (2, 5)).astype(np.float32)
+    path = str(tmpdir)
+    export_testcase(model, (x,), path, dtype='float16')
+
+    test_data_dir = os.path.join(path, 'test_data_set_0')
+    for filename in ('input_0.pb', 'output_0.pb', 'output_1.pb'):
+        tensor = onnx.TensorProto()
+        with open(os.path.join(test_data_dir, filename), 'rb') as f:
+            tensor.ParseFromString(f.read())
+        assert tensor.data_type == TensorProto.FLOAT16
@@ -0,0 +1,81 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+from onnx_chainer import functions
+from onnx_chainer import mapping
+
+
+# Seconds to import ONNX-Chainer after Chainer and ONNX are imported
+IMPORT_TIME_BUDGET = 0.5
+
+
+def _run(code):
+    output = subprocess.check_output([sys.executable, '-c', code])
+    return json.loads(output.decode())
+
+
+def test_converters_not_imported():
+    modules = _run(
+        'import json, sys\n'
+        'import onnx_chainer\n'
+        'print(json.dumps(sorted(sys.modules)))\n')
+    for module in functions._converter_names:
+        assert 'onnx_chainer.functions.' + module not in modules
+    # Modules of optional features are imported on use
+    assert 'onnx_chainer.optimizer' not in modules
+    assert 'onnx_chainer.fused_rnn' not in modules
+    assert 'onnx_chainer.float16' not in modules
+
+
+def test_converter_imported_on_lookup():
+    modules = _run(
+        'import json, sys\n'
+        'from onnx_chainer import mapping\n'
+        'assert \'ReLU\' in mapping.converters\n'
+        'mapping.converters[\'ReLU\']\n'
+        'print(json.dumps(sorted(sys.modules)))\n')
+    assert 'onnx_chainer.functions.activation' in modules
+    assert 'onnx_chainer.functions.pooling' not in modules
+
+
+def test_import_time_budget():
+    elapsed = _run(
+        'import json, time\n'
+        'import chainer, onnx\n'
+        'start = time.time()\n'
+        'import onnx_chainer\n'
+        'print(json.dumps(time.time() - start))\n')
+    assert elapsed < IMPORT_TIME_BUDGET
+
+
+def test_converters_mapping():
+    assert set(mapping.converters) == mapping._supported_function_node_set
+    assert 'Foo' not in mapping.converters
+    with pytest.raises(KeyError):
+        mapping.converters['Foo']
+    converter = mapping.converters['ReLU']
+    assert converter.converter is functions.convert_ReLU
+    assert mapping.converters['ReLU'] is converter
+
+
+def test_functions_attributes():
+    assert 'convert_ReLU' in dir(functions)
+    with pytest.raises(AttributeError):
+        functions.convert_Foo
+
+
+def test_import_converter_from_functions():
+    modules = _run(
+        'import json, sys\n'
+        'from onnx_chainer.functions import convert_ReLU\n'
+        'print(json.dumps(sorted(sys.modules)))\n')
+    assert 'onnx_chainer.functions.activation' in modules
+    assert 'onnx_chainer.functions.pooling' not in modules
+
+
+def test_version():
+    import onnx_chainer
+    assert isinstance(onnx_chainer.__version__, str)
@@ -0,0 +1,58 @@
+import threading
+
+import chainer
+import chainer.functions as F
+import numpy as np
+
+import onnx_chainer
+from onnx_chainer import onnx_helper
+
+
+def test_name_generator_independent():
+    gen1 = onnx_helper.NameGenerator()
+    gen2 = onnx_helper.NameGenerator()
+    gen1.set_func_name('Foo')
+    gen2.set_func_name('Foo')
+    assert gen1.gensym() == 'tmpFoo_1'
+    assert gen1.gensym() == 'tmpFoo_2'
+    assert gen2.gensym() == 'tmpFoo_1'
+
+
+def test_using_name_generator():
+    gen = onnx_helper.NameGenerator()
+    default_gen = onnx_helper.get_name_generator()
+    with onnx_helper.using_name_generator(gen):
+        assert onnx_helper.get_name_generator() is gen
+        onnx_helper.set_func_name('Bar')
+        node = onnx_helper.make_node('Relu', ['x'], 1)
+        gb = onnx_helper.GraphBuilder()
+        y = gb.op('Relu', ['x'])
+    assert onnx_helper.get_name_generator() is default_gen
+    assert node.output[0] == 'tmpBar_1'
+    assert y == 'tmpBar_2'
+
+
+class Model(chainer.Chain):
+
+    def __call__(self, x):
+        # Converters of these functions create temporary values
+        return F.matmul(F.matmul(x, x, transa=True), x, transb=True)
+
+
+def test_export_in_threads():
+    x = np.ones((3, 3), dtype=np.float32)
+    expected = onnx_chainer.export(Model(), x)
+
+    results = [None] * 4
+
+    def run(i):
+        results[i] = onnx_chainer.export(Model(), x)
+
+    threads = [threading.Thread(target=run, args=(i,))
+               for i in range(len(results))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for onnx_model in results:
+        assert onnx_model == expected
@@ -0,0 +1,38 @@
+import onnx
+import pytest
+
+import onnx_chainer
+from onnx_chainer.functions.opset_version import support
+
+
+@support((8, 6))
+def _converter(func, opset_version):
+    return opset_version
+
+
+@pytest.mark.parametrize('requested,expected', [
+    (6, 6), (7, 6), (8, 8), (9, 8),
+])
+def test_support(requested, expected):
+    assert _converter(None, requested) == expected
+    assert _converter.opset_versions == (6, 8)
+    assert _converter.resolve_opset_version(requested) == expected
+
+
+def test_support_unsupported():
+    assert _converter.resolve_opset_version(5) is None
+    with pytest.raises(RuntimeError):
+        _converter(None, 5)
+
+
+def test_supported_ops():
+    ops = onnx_chainer.supported_ops(8)
+    assert ops['Reshape'] == 5
+    assert ops['ReLU'] == 6
+    assert 'Where' not in ops  # Since opset version 9
+    assert list(ops.keys()) == sorted(ops.keys())
+
+    latest = onnx_chainer.supported_ops()
+    assert latest == onnx_chainer.supported_ops(
+        onnx.defs.onnx_opset_version())
+    assert set(latest) == set(onnx_chainer.mapping.converters)
@@ -0,0 +1,58 @@
+import json
+import os
+
+import chainer
+import chainer.functions as F
+import chainer.links as L
+import numpy as np
+import pytest
+
+import onnx_chainer
+from onnx_chainer import profiler
+
+
+def _make_model():
+    return chainer.Sequential(L.Linear(None, 4), F.relu, L.Linear(None, 3))
+
+
+@pytest.mark.parametrize('trace_memory', [True, False])
+def test_profile(tmpdir, trace_memory):
+    x = np.ones((2, 5), dtype=np.float32)
+    path = os.path.join(str(tmpdir), 'model.onnx')
+    with onnx_chainer.profile(trace_memory=trace_memory) as prof:
+        assert profiler.get_profiler() is prof
+        onnx_chainer.export(_make_model(), x, filename=path, optimize=True)
+    assert profiler.get_profiler() is None
+
+    report = prof.report()
+    assert set(report['phases'].keys()) == {
+        'forward', 'trace', 'initializers', 'optimize', 'check', 'save'}
+    assert report['phases']['initializers']['calls'] == 1
+    assert set(report['converters'].keys()) == {'LinearFunction', 'ReLU'}
+    assert report['converters']['LinearFunction']['calls'] == 2
+    for record in list(report['phases'].values()) +\
+            list(report['converters'].values()):
+        assert record['time'] >= 0
+        if trace_memory:
+            assert record['peak'] >= 0
+        else:
+            assert record['allocated'] is None
+            assert record['peak'] is None
+    assert json.loads(prof.to_json()) == json.loads(json.dumps(report))
+
+
+def test_profile_accumulate():
+    x = np.ones((2, 5), dtype=np.float32)
+    prof = onnx_chainer.Profiler(trace_memory=False)
+    for _ in range(2):
+        with onnx_chainer.profile(prof):
+            onnx_chainer.export(_make_model(), x)
+    assert prof.phases['forward'].calls == 2
+    assert prof.converters['ReLU'].calls == 2
+
+
+def test_no_profile():
+    x = np.ones((2, 5), dtype=np.float32)
+    prof = onnx_chainer.Profiler()
+    onnx_chainer.export(_make_model(), x)
+    assert not prof.phases
@@ -0,0 +1,88 @@
+import gzip
+import io
+import os
+
+import chainer
+import chainer.functions as F
+import chainer.links as L
+import numpy as np
+import onnx
+from onnx import numpy_helper
+import pytest
+
+from onnx_chainer import export
+from onnx_chainer import serialization
+
+
+@pytest.mark.parametrize('value', [0, 1, 127, 128, 300, 2 ** 32, 2 ** 63])
+def test_encode_varint(value):
+    encoded = serialization.encode_varint(value)
+    decoded, shift = 0, 0
+    for b in bytearray(encoded):
+        decoded |= (b & 0x7f) << shift
+        shift += 7
+    assert decoded == value
+    assert all(b & 0x80 for b in bytearray(encoded[:-1]))
+    assert not bytearray(encoded)[-1] & 0x80
+
+
+def test_as_buffer_no_copy():
+    array = np.arange(12, dtype=np.float32).reshape(3, 4)
+    buf = serialization.as_buffer(array)
+    assert len(buf) == array.nbytes
+    assert np.shares_memory(np.frombuffer(buf, dtype=np.uint8), array)
+
+
+@pytest.mark.parametrize('array', [
+    np.arange(12, dtype=np.float32).reshape(3, 4),
+    np.arange(12, dtype=np.int64).reshape(3, 4).T,
+    np.arange(12, dtype=np.float16)[::2],
+    np.array(3.5, dtype=np.float64),
+    np.array([True, False, True]),
+])
+def test_write_tensor(array):
+    f = io.BytesIO()
+    size = serialization.write_tensor(f, array, 'x')
+    data = f.getvalue()
+    assert size == len(data)
+    assert data == numpy_helper.from_array(array, 'x').SerializeToString()
+
+
+def test_write_tensor_empty():
+    array = np.zeros((0, 3), dtype=np.float32)
+    f = io.BytesIO()
+    serialization.write_tensor(f, array, 'empty')
+
+    tensor = onnx.TensorProto()
+    tensor.ParseFromString(f.getvalue())
+    assert tensor.name == 'empty'
+    assert numpy_helper.to_array(tensor).shape == (0, 3)
+
+
+@pytest.fixture(scope='function')
+def onnx_model():
+    model = chainer.Sequential(
+        L.Convolution2D(None, 4, 3, 1, 1),
+        F.relu,
+        L.Linear(None, 10),
+    )
+    return export(model, np.ones((1, 3, 8, 8), dtype=np.float32))
+
+
+def test_write_model(onnx_model):
+    f = io.BytesIO()
+    size = serialization.write_model(f, onnx_model)
+    data = f.getvalue()
+    assert size == len(data) == onnx_model.ByteSize()
+    assert onnx.load_model_from_string(data) == onnx_model
+
+
+def test_export_to_stream(tmpdir):
+    model = chainer.Sequential(L.Linear(None, 10), F.relu)
+    x = np.ones((2, 5), dtype=np.float32)
+    path = os.path.join(str(tmpdir), 'model.onnx.gz')
+    with gzip.open(path, 'wb') as f:
+        onnx_model = export(model, x, filename=f)
+    with gzip.open(path, 'rb') as f:
+        loaded = onnx.load_model_from_string(f.read())
+    assert loaded == onnx_model
@@ -0,0 +1,101 @@
+import os
+
+import chainer
+import chainer.functions as F
+import chainer.links as L
+import numpy as np
+import onnx
+from onnx import numpy_helper
+import pytest
+
+from onnx_chainer import export
+from onnx_chainer import update_weights
+
+
+@pytest.fixture(scope='function')
+def model():
+    return chainer.Sequential(
+        L.Convolution2D(None, 4, 3, 1, 1),
+        F.relu,
+        L.Linear(None, 10),
+    )
+
+
+@pytest.fixture(scope='function')
+def x():
+    return np.ones((1, 3, 8, 8), dtype=np.float32)
+
+
+def test_update_weights(tmpdir, model, x):
+    path = os.path.join(str(tmpdir), 'model.onnx')
+    exported = export(model, x, filename=path)
+
+    for param in model.params():
+        param.array[...] = 0.25
+    updated = update_weights(model, path)
+
+    loaded = onnx.load(path)
+    assert loaded == updated
+    assert [n.name for n in loaded.graph.node] ==\
+        [n.name for n in exported.graph.node]
+    initializers = {t.name: numpy_helper.to_array(t)
+                    for t in loaded.graph.initializer}
+    for name, param in model.namedparams():
+        onnx_name = 'param' + name.replace('/', '_')
+        np.testing.assert_array_equal(initializers[onnx_name], param.array)
+
+
+def test_update_weights_out_path(tmpdir, model, x):
+    path = os.path.join(str(tmpdir), 'model.onnx')
+    out_path = os.path.join(str(tmpdir), 'updated.onnx')
+    export(model, x, filename=path)
+    original = onnx.load(path)
+
+    for param in model.params():
+        param.array[...] = 0.25
+    update_weights(model, path, out_path=out_path)
+
+    assert onnx.load(path) == original
+    assert os.path.isfile(out_path)
+
+
+def test_update_weights_mismatch(tmpdir, model, x):
+    path = os.path.join(str(tmpdir), 'model.onnx')
+    export(model, x, filename=path)
+
+    other = chainer.Sequential(L.Linear(3, 10))
+    other(np.ones((1, 3), dtype=np.float32))
+    with pytest.raises(ValueError):
+        update_weights(other, path)
+
+
+def test_update_weights_external_data(tmpdir, model, x):
+    path = os.path.join(str(tmpdir), 'model.onnx')
+    export(model, x, filename=path, external_data=True,
+           external_data_threshold=64, external_data_max_file_size=1024)
+    data_files = {f for f in os.listdir(str(tmpdir)) if f != 'model.onnx'}
+    assert len(data_files) > 1
+
+    for param in model.params():
+        param.array[...] = 0.25
+    updated = update_weights(model, path)
+
+    # Large initializers are still stored in data files, and data files of
+    # the original model which are not referred any more are removed
+    assert sorted(os.listdir(str(tmpdir))) ==\
+        ['model.onnx', 'model.onnx.data']
+    loaded = onnx.load(path)
+    initializers = {t.name: t for t in updated.graph.initializer}
+    for name, param in model.namedparams():
+        onnx_name = 'param' + name.replace('/', '_')
+        tensor = initializers[onnx_name]
+        if param.array.nbytes < 64:
+            assert tensor.data_location != onnx.TensorProto.EXTERNAL
+        else:
+            assert tensor.data_location == onnx.TensorProto.EXTERNAL
+    loaded_initializers = {t.name: numpy_helper.to_array(t)
+                           for t in loaded.graph.initializer}
+    for name, param in model.namedparams():
+        onnx_name = 'param' + name.replace('/', '_')
+        np.testing.assert_array_equal(
+            loaded_initializers[onnx_name], param.array)